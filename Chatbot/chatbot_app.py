@@ -1,17 +1,29 @@
-import streamlit as st
-import matlab.engine
-import numpy as np
-import matplotlib.pyplot as plt
-import math
-import textwrap
-import io
+import os
+import sys
 from textwrap import wrap
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from langchain.llms import LlamaCpp
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationChain
-from langchain import PromptTemplate
+
+# Shared modules (engine pool, ...) live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lazy_imports import import_report, lazy_import, timed_import
+st = timed_import("streamlit")
+np = timed_import("numpy")
+# Heavy dependencies are imported on first use: reportlab on the first report,
+# langchain/llama.cpp on the first chat message, MATLAB on the first simulation
+plt = lazy_import("matplotlib.pyplot")
+lc_llms = lazy_import("langchain.llms")
+from concurrent.futures import ThreadPoolExecutor
+from engine_pool import pool_from_env
+from result_cache import ResultCache
+from surrogate import SurrogateStore
+import cap_search
+import simulation
+from decimate import decimate
+from native_backend import V_HIGH, V_LOW
+from current_profile import current_profile
+from chat_session import PAST_RESULTS, ChatSession
+from llm_server import LLMClient
+from results_store import ResultsStore, describe
+import reports
 
 st.set_page_config(
     page_title="ABS Super-Capacitor Calculator",
@@ -19,41 +31,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-def generate_pdf_report(mode, inputs, results):
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    c.setFont("Helvetica", 12)
-    c.drawString(100, 750, "ABS Super-Capacitor Calculator Report")
-    c.drawString(100, 730, f"Date: {st.session_state.get('current_date', 'July 14, 2025')}")
-    c.drawString(100, 710, f"Mode: {mode}")
-    c.drawString(100, 690, "Inputs:")
-
-    y = 670
-    for key, value in inputs.items():
-        c.drawString(120, y, f"{key}: {value}")
-        y -= 20
-
-    c.drawString(100, y - 20, "Results:")
-    y -= 40
-
-    for key, value in results.items():
-        if key != "Notes":
-            c.drawString(120, y, f"{key}: {value}")
-            y -= 20
-
-    # Wrap and add Notes (if exists)
-    if "Notes" in results:
-        note_lines = textwrap.wrap(results["Notes"], width=90)
-        c.drawString(120, y, "Notes:")
-        y -= 20
-        for line in note_lines:
-            c.drawString(130, y, line)
-            y -= 18
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
+def generate_pdf_report(mode, inputs, results, **plots):
+    # Paginated report with vector plots, shared with the main app (reports.py)
+    return reports.design_report(mode, inputs, results, date=st.session_state.get('current_date', 'July 14, 2025'),
+                                 **plots)
 
 def format_context(inputs: dict, results: dict) -> str:
     lines = ["— Simulation Context —"]
@@ -212,29 +193,49 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 @st.cache_resource
-def get_matlab_engine():
-    eng = matlab.engine.start_matlab()
-    eng.addpath(r'C:\Users\adars\OneDrive\Desktop\Matlab', nargout=0)
-    return eng
+def get_engine_pool():
+    return pool_from_env()
+
+@st.cache_resource
+def get_result_cache():
+    # Same on-disk cache as the main app (ABS_CACHE_DIR)
+    return ResultCache()
+
+@st.cache_resource
+def get_surrogates():
+    return SurrogateStore(get_result_cache())
+
+@st.cache_resource
+def get_sweep_executor():
+    # Threads for the parallel k-ary search; MATLAB runs are bounded by the engine pool size
+    return ThreadPoolExecutor(max_workers=int(os.environ.get("ABS_SWEEP_WORKERS", os.cpu_count() or 4)))
+
+@st.cache_resource
+def get_results_store():
+    return ResultsStore()
 
 @st.cache_resource
 def load_chatbot_pipeline():
-    return LlamaCpp(
+    # With ABS_LLM_URL the model lives in the shared llm_server.py worker instead of this process
+    if os.environ.get("ABS_LLM_URL"):
+        return LLMClient(os.environ["ABS_LLM_URL"], max_tokens=256, temperature=0.7)
+    return lc_llms.LlamaCpp(
         model_path="TinyLlama-1.1B-Chat-v1.0.GGUF",
+        n_ctx=2048,
         max_tokens=256,
         temperature=0.7,
+        streaming=True,
     )
 
+def get_chat_session():
+    # Built on the first chat message, so langchain and the model load only when chat is used
+    if "chat_session" not in st.session_state:
+        st.session_state.chat_session = ChatSession(count_tokens=load_chatbot_pipeline().get_num_tokens)
+    return st.session_state.chat_session
+
 def plot_current_profile(periodic, time_period, spike_time, peak_current, static_current, duration=1.0, sample_rate=10000):
-    t = np.linspace(0, duration, int(duration * sample_rate))
-    current = np.zeros_like(t)
-    if periodic == "Periodic":
-        for i in range(len(t)):
-            t_mod = t[i] % time_period
-            current[i] = peak_current if t_mod <= spike_time else static_current
-    else:
-        current[:] = static_current
-        current[t <= spike_time] = peak_current
+    t, current = current_profile(periodic, time_period, spike_time, peak_current, static_current,
+                                 duration=duration, sample_rate=sample_rate)
 
     fig, ax = plt.subplots(figsize=(6, 2.5))
     ax.plot(t, current, linewidth=2, color='#4682B4')
@@ -247,69 +248,61 @@ def plot_current_profile(periodic, time_period, spike_time, peak_current, static
     fig.tight_layout()
     st.pyplot(fig)
 
-def compute_log_times(C_val: float, model_name: str):
-    eng = get_matlab_engine()
+def compute_log_times(C_val: float, model_name: str, workspace: dict):
     try:
-        t_rise, deltaT, t, Vcap = eng.LogTimes(C_val, model_name, nargout=4)
-        t = np.array(t).flatten()
-        Vcap = np.array(Vcap).flatten()
+        # Same LogTimes.m call and result cache as the main app
+        t_rise, deltaT, t, Vcap = simulation.log_times(C_val, model_name, workspace, backend="matlab",
+                                                       pool=get_engine_pool(), cache=get_result_cache())
         mask = t <= 100.0
         return float(t_rise), float(deltaT), t[mask], Vcap[mask]
     except Exception as e:
         st.error(f"MATLAB computation failed: {str(e)}")
         return None, None, None, None
 
-def sweep_for_cap(target_dt: float, c_min: float, c_max: float, tol_dt: float, cap_tol: float, model_name: str):
+def sweep_for_cap(target_dt: float, c_min: float, c_max: float, tol_dt: float, cap_tol: float, model_name: str, workspace: dict,
+                  strategy: str = "brent", probes: int = 4):
     status = st.empty()
     status.info(f"Sweeping C from {c_min:.3f}F to {c_max:.3f}F (step {cap_tol}F)…")
-
-    bestC = None
-    bestDt = None
-    bestErr = float("inf")
-    t_data = v_data = None
-    best_t_rise = None
-
-    left, right = c_min, c_max
-
-    while (right - left) > cap_tol:
-        mid = 0.5 * (left + right)
-        c = cap_tol * math.floor(mid / cap_tol)
-        if c <= left:
-            c = left + cap_tol
-        if c >= right:
-            c = right - cap_tol
-
-        status.info(f"Testing C = {c:.4f} F; interval = [{left:.4f}, {right:.4f}]")
-
-        t_rise, deltaT, t_arr, v_arr = compute_log_times(c, model_name)
-        if t_rise is None:
-            break
-
-        err = abs(deltaT - target_dt)
-        if err < bestErr:
-            bestErr = err
-            bestC = c
-            bestDt = deltaT
-            t_data, v_data = t_arr, v_arr
-            best_t_rise = t_rise
-
-        if err <= tol_dt:
-            status.success(f"Converged early: C={c:.4f}F ±{cap_tol}F, Δt err {err:.04f}s")
-            return bestC, bestDt, bestErr, cap_tol, t_data, v_data, best_t_rise
-
-        if deltaT < target_dt:
-            left = c
-        else:
-            right = c
-
+    # Fetched here: the k-ary probes run on executor threads
+    pool, cache, surrogates = get_engine_pool(), get_result_cache(), get_surrogates()
+
+    def evaluate(c):
+        # Search runs stop at the 12 V crossing with interpolated crossing times
+        out = simulation.log_times(c, model_name, workspace, backend="matlab", pool=pool, cache=cache, events=True)
+        surrogates.add(model_name, workspace, "matlab", c, out[0], out[1])
+        return out
+
+    def on_progress(message, level="info"):
+        status.info(message)
+
+    options = {}
+    if strategy == "kary":
+        options = {"executor": get_sweep_executor(), "probes": probes}
+    elif strategy == "surrogate":
+        options = {"predict": surrogates.get(model_name, workspace, "matlab").invert}
+    result = cap_search.run_search(
+        strategy, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=on_progress, **options
+    )
+    if result.error:
+        st.error(f"MATLAB computation failed: {result.error}")
+    if result.best_c is None:
+        return None, None, None, cap_tol, None, None, None
+
+    # Full-horizon run of the answer, for the multi-cycle voltage plot
+    status.info(f"Simulating C = {result.best_c:.4f} F over the full horizon for the plot…")
+    best_t_rise, _, t_data, v_data = compute_log_times(result.best_c, model_name, workspace)
+    if t_data is None:
+        return None, None, None, cap_tol, None, None, None
+    verb = "Converged early" if result.converged else "Sweep done"
     status.success(
-        f"Sweep done: Best C ≈ {bestC:.4f}F ±{cap_tol:.4f}F, "
-        f"Δt={bestDt:.4f}s err ±{bestErr:.4f}s"
+        f"{verb} after {result.n_sims} simulations: Best C ≈ {result.best_c:.4f}F ±{cap_tol:.4f}F, "
+        f"Δt={result.best_dt:.4f}s err ±{result.best_err:.4f}s"
     )
-    return bestC, bestDt, bestErr, cap_tol, t_data, v_data, best_t_rise
+    return result.best_c, result.best_dt, result.best_err, cap_tol, t_data, v_data, best_t_rise
 
 def plot_voltage_time(t_data, v_data, x_lim=(0, 100), figsize=(6, 4), title_size=16, label_size=14, tick_size=12):
     fig, ax = plt.subplots(figsize=figsize)
+    t_data, v_data = decimate(t_data, v_data, x_range=x_lim, width_px=figsize[0] * fig.dpi, levels=(V_HIGH, V_LOW))
     ax.plot(t_data, v_data, linewidth=2, color='#4682B4')
     ax.set_title("Capacitor Voltage vs. Time", fontsize=title_size, pad=10)
     ax.set_xlabel("Time (s)", fontsize=label_size)
@@ -327,10 +320,6 @@ def main():
         st.session_state.simulation_context = None
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
-    if "chat_memory" not in st.session_state:
-        st.session_state.chat_memory = ConversationBufferMemory(
-            memory_key="history", input_key="input", return_messages=True
-        )
 
     st.title("ABS Super-Capacitor Calculator")
     st.markdown("\n\n")
@@ -411,17 +400,20 @@ def main():
             }
             model_name = model_map[model_option]
 
-    eng = get_matlab_engine()
-    eng.workspace['myFlag'] = bool(myFlag == "Periodic")
-    eng.workspace['low_current'] = static_current
-    eng.workspace['high_current'] = peak_current
-    eng.workspace['TimePeriod'] = time_period
-    eng.workspace['SpikeTime'] = spike_time
-    eng.workspace['CurrentSource'] = CurrentSource
+    # Pushed into whichever pooled engine runs the simulation
+    workspace = {
+        'myFlag': bool(myFlag == "Periodic"),
+        'low_current': static_current,
+        'high_current': peak_current,
+        'TimePeriod': time_period,
+        'SpikeTime': spike_time,
+        'CurrentSource': CurrentSource,
+    }
+    profile = (myFlag, time_period, spike_time, peak_current, static_current)
     if myFlag == "Periodic":
-        eng.workspace['OnTime'] = (spike_time / time_period) * 100.0
+        workspace['OnTime'] = (spike_time / time_period) * 100.0
     else:
-        eng.workspace['OnTime'] = 1000.0
+        workspace['OnTime'] = 1000.0
 
     mode = st.radio("Select Mode:", ["Find ABS On/Off Time", "Find Capacitor Value"], horizontal=True)
 
@@ -437,7 +429,7 @@ def main():
             return
         if st.button("Compute Times"):
             with st.spinner("Simulating in MATLAB..."):
-                t_rise, deltaT, t, Vcap = compute_log_times(C_val, model_name)
+                t_rise, deltaT, t, Vcap = compute_log_times(C_val, model_name, workspace)
             if t_rise is not None:
                 st.success("Simulation Complete.")
                 graph_limit = t_rise + deltaT
@@ -479,8 +471,17 @@ def main():
                     )
                 }
                 st.session_state.simulation_context = {"inputs": inputs, "results": results}
+                get_results_store().add(
+                    inputs, results, model=model_option, profile=myFlag,
+                    capacitance=C_val, on_time=deltaT, off_time=t_rise,
+                    peak_current=peak_current, static_current=static_current, current_source=CurrentSource,
+                    time_period_ms=time_period_ms if myFlag == "Periodic" else None, spike_time_ms=spike_time_ms,
+                )
 
-                pdf_buffer = generate_pdf_report(mode, inputs, results)
+                pdf_buffer = generate_pdf_report(
+                    mode, inputs, results, t=t, vcap=Vcap, x_lim=(0, 5 * graph_limit), profile=profile,
+                    profile_duration=deltaT,
+                )
                 st.download_button(
                     label="Download Report",
                     data=pdf_buffer,
@@ -514,15 +515,31 @@ def main():
         if c_min >= c_max:
             st.error("Minimum capacitance must be less than maximum capacitance.")
             return
+        strategy_option = st.selectbox(
+            "Search Strategy",
+            list(cap_search.STRATEGY_LABELS),
+            help=cap_search.STRATEGY_HELP,
+        )
+        strategy = cap_search.STRATEGY_LABELS[strategy_option]
+        probes = 1
+        if strategy == "kary":
+            probes = st.slider(
+                "Parallel probes per round (k)",
+                min_value=2, max_value=16, value=min(os.cpu_count() or 4, 8),
+                help="Simulations run concurrently; MATLAB runs are limited by the engine pool size."
+            )
         if st.button("Find Best Capacitance"):
-            with st.spinner("Running binary‐search sweep in MATLAB..."):
+            with st.spinner(f"Searching in MATLAB ({strategy_option})..."):
                 bestC, bestDt, bestErr, accuracy, bestT, bestV, best_charge_time = sweep_for_cap(
                     target_dt=target_dt,
                     c_min=c_min,
                     c_max=c_max,
                     tol_dt=1e-3,
                     cap_tol=cap_tol,
-                    model_name=model_name
+                    model_name=model_name,
+                    workspace=workspace,
+                    strategy=strategy,
+                    probes=probes,
                 )
             if bestC is not None:
                 st.success("Sweep Complete.")
@@ -568,8 +585,17 @@ def main():
                     )
                 }
                 st.session_state.simulation_context = {"inputs": inputs, "results": results}
+                get_results_store().add(
+                    inputs, results, model=model_option, profile=myFlag,
+                    capacitance=bestC, on_time=bestDt, off_time=best_charge_time,
+                    peak_current=peak_current, static_current=static_current, current_source=CurrentSource,
+                    time_period_ms=time_period_ms if myFlag == "Periodic" else None, spike_time_ms=spike_time_ms,
+                )
 
-                pdf_buffer = generate_pdf_report(mode, inputs, results)
+                pdf_buffer = generate_pdf_report(
+                    mode, inputs, results, t=bestT, vcap=bestV, x_lim=(0, 5 * graph_limit), profile=profile,
+                    profile_duration=bestDt,
+                )
                 st.download_button(
                     label="Download Report",
                     data=pdf_buffer,
@@ -588,17 +614,46 @@ def main():
     user_input = st.chat_input("Ask me anything about ABS…")
     if user_input:
         st.session_state.chat_history.append({"role": "user", "content": user_input})
-        
+        with st.chat_message("user"):
+            st.markdown(user_input)
+
+        session = get_chat_session()
+        # The prompt only changes where the context does, so the model re-reads it once per new simulation
         if st.session_state.simulation_context:
-            context = format_context(st.session_state.simulation_context["inputs"], st.session_state.simulation_context["results"])
+            session.set_context(format_context(st.session_state.simulation_context["inputs"], st.session_state.simulation_context["results"]))
         else:
-            context = "No simulation has been run yet."
-        
-        output = chat_chain.predict(input=user_input, context=context)
-        
-        st.session_state.chat_history.append({"role": "assistant", "content": output})
+            session.set_context(None)
+
+        # Past design points close to what the question asks about, so it can be answered without simulating
+        past = get_results_store().search_question(user_input, limit=PAST_RESULTS) if PAST_RESULTS else []
+        reference = "\n".join(["— Past Results —"] + [describe(run) for run in past]) if past else None
+
         with st.chat_message("assistant"):
-            st.markdown(output)
+            try:
+                output = st.write_stream(session.stream(load_chatbot_pipeline(), user_input, reference))
+            except OSError as e:
+                output = None
+                st.error(f"The chat model is not reachable: {e}")
+            except RuntimeError as e:
+                # LLMClient.stream: the worker reached the model but generation failed
+                output = None
+                st.error(f"The chat model failed: {e}")
+        if output is not None:
+            st.session_state.chat_history.append({"role": "assistant", "content": output})
+
+    with st.sidebar.expander("Startup profile"):
+        for r in import_report():
+            if r["mode"] == "preloaded":
+                st.caption(f"{r['module']}: preloaded (cold cost: python lazy_imports.py {r['module']})")
+                continue
+            when = "startup" if r["mode"] == "eager" else "on first use"
+            st.caption(f"{r['module']}: {r['seconds']:.3f} s ({when})")
+    if st.session_state.get("chat_session") and st.session_state.chat_session.last:
+        session = st.session_state.chat_session
+        with st.sidebar.expander("Chat latency"):
+            st.caption(f"First token: {session.last['first_token']:.2f} s, whole reply: {session.last['turn']:.2f} s")
+            st.caption(f"History: {len(session.turns)} turns, {session.history_size()} of "
+                       f"{session.history_tokens} tokens ({session.dropped} dropped)")
 
     # Footer
     st.markdown(
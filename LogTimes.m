@@ -0,0 +1,102 @@
+
+
+
+function [t_rise, deltaT, t, Vcap] = LogTimes(C_val, modelName, stopAtEvents, params)
+% stopAtEvents: simulate in growing chunks, continuing from the saved
+% operating point, and stop once both threshold crossings are found;
+% crossing times are then interpolated between logged samples.
+% params: struct of workspace variables for this run only (see
+% parameter_set.py). They are set on the Simulink.SimulationInput, so the
+% base workspace is neither read nor changed.
+
+    in = Simulink.SimulationInput(modelName);
+    names = fieldnames(params);
+    for k = 1:numel(names)
+        in = in.setVariable(names{k}, params.(names{k}));
+    end
+    in = in.setVariable('C_val', C_val);
+    in = in.setVariable('modelName', modelName);
+
+    if stopAtEvents
+        [t, Vcap, riseIdx, fallIdx] = simUntilEvents(in);
+    else
+        % Run Simulink simulation
+        simOut = sim(in);
+
+        % Extract output data
+        Vcap = simOut.VcapLog.Data;
+        t    = simOut.VcapLog.Time;
+
+        [riseIdx, fallIdx] = findCrossings(t, Vcap);
+    end
+
+    if isempty(riseIdx) || isempty(fallIdx)
+        error('For C_val = %.2f F, voltage never crossed thresholds.', C_val);
+    end
+
+    if stopAtEvents
+        t_rise  = crossingTime(t, Vcap, riseIdx, 14.4);
+        deltaT  = crossingTime(t, Vcap, fallIdx, 12) - t_rise;
+    else
+        t_rise  = t(riseIdx);
+        deltaT  = t(fallIdx) - t_rise;
+    end
+    
+end
+
+function [riseIdx, fallIdx] = findCrossings(t, Vcap)
+    riseIdx = find(Vcap >= 14.4 - 1e-6, 1, 'first');
+    fallIdx = [];
+    if ~isempty(riseIdx)
+        fallIdx = find(Vcap <= 12 + 1e-6 & t > t(riseIdx), 1, 'first');
+    end
+end
+
+function [t, Vcap, riseIdx, fallIdx] = simUntilEvents(base)
+    % Chunks start at 10 s and double, so a run costs at most about twice
+    % the time to the 12 V crossing plus one restart per chunk
+    stopTime = str2double(get_param(base.ModelName, 'StopTime'));
+    chunk = 10;
+    tEnd = 0;
+    op = [];
+    t = [];
+    Vcap = [];
+    riseIdx = [];
+    fallIdx = [];
+    while tEnd < stopTime && isempty(fallIdx)
+        tEnd = min(tEnd + chunk, stopTime);
+        chunk = 2 * chunk;
+        in = base.setModelParameter('StopTime', num2str(tEnd, 17), ...
+            'SaveFinalState', 'on', 'SaveOperatingPoint', 'on', 'FinalStateName', 'absOpPoint');
+        if ~isempty(op)
+            in = in.setInitialState(op);
+        end
+        simOut = sim(in);
+        op = simOut.absOpPoint;
+
+        tChunk = simOut.VcapLog.Time;
+        vChunk = simOut.VcapLog.Data;
+        if ~isempty(t)
+            % A continued run logs its start time again
+            keep = tChunk > t(end);
+            tChunk = tChunk(keep);
+            vChunk = vChunk(keep);
+        end
+        t = [t; tChunk(:)];
+        Vcap = [Vcap; vChunk(:)];
+        [riseIdx, fallIdx] = findCrossings(t, Vcap);
+    end
+end
+
+function tc = crossingTime(t, Vcap, idx, level)
+    % Linear interpolation between the samples either side of the crossing
+    if idx == 1 || Vcap(idx) == Vcap(idx - 1)
+        tc = t(idx);
+        return
+    end
+    frac = (level - Vcap(idx - 1)) / (Vcap(idx) - Vcap(idx - 1));
+    frac = min(max(frac, 0), 1);
+    tc = t(idx - 1) + frac * (t(idx) - t(idx - 1));
+end
+
+
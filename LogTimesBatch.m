@@ -0,0 +1,48 @@
+function [t_rise, deltaT] = LogTimesBatch(modelName, C_vals, low_current, high_current, TimePeriod, SpikeTime, CurrentSource, periodic)
+% Evaluate many design points of one model in a single parsim call.
+% Every input after modelName is a vector with one entry per design point.
+% Runs on Parallel Computing Toolbox workers when available, serially
+% otherwise. Points whose voltage never crosses the thresholds return NaN.
+
+    n = numel(C_vals);
+    in(1:n) = Simulink.SimulationInput(modelName);
+    for k = 1:n
+        if periodic(k)
+            OnTime = (SpikeTime(k) / TimePeriod(k)) * 100;
+        else
+            OnTime = 1000;
+        end
+        in(k) = in(k).setVariable('C_val',         C_vals(k));
+        in(k) = in(k).setVariable('myFlag',        logical(periodic(k)));
+        in(k) = in(k).setVariable('low_current',   low_current(k));
+        in(k) = in(k).setVariable('high_current',  high_current(k));
+        in(k) = in(k).setVariable('TimePeriod',    TimePeriod(k));
+        in(k) = in(k).setVariable('SpikeTime',     SpikeTime(k));
+        in(k) = in(k).setVariable('OnTime',        OnTime);
+        in(k) = in(k).setVariable('CurrentSource', CurrentSource(k));
+    end
+
+    out = parsim(in, 'ShowProgress', 'off', 'TransferBaseWorkspaceVariables', 'on');
+
+    t_rise = nan(n, 1);
+    deltaT = nan(n, 1);
+    for k = 1:n
+        if ~isempty(out(k).ErrorMessage)
+            continue
+        end
+        Vcap = out(k).VcapLog.Data;
+        t    = out(k).VcapLog.Time;
+
+        % Same threshold rules as LogTimes.m
+        riseIdx = find(Vcap >= 14.4 - 1e-6, 1, 'first');
+        if isempty(riseIdx)
+            continue
+        end
+        fallIdx = find(Vcap <= 12 + 1e-6 & t > t(riseIdx), 1, 'first');
+        if isempty(fallIdx)
+            continue
+        end
+        t_rise(k) = t(riseIdx);
+        deltaT(k) = t(fallIdx) - t_rise(k);
+    end
+end
@@ -1,14 +1,24 @@
-import streamlit as st
-import matlab.engine
-import numpy as np
-import matplotlib.pyplot as plt
-import math
-import textwrap
-import io
-import pandas as pd
+from lazy_imports import import_report, lazy_import, measure_cold_imports, timed_import
+st = timed_import("streamlit")
+np = timed_import("numpy")
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import wrap 
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+# Heavy dependencies are imported on first use (MATLAB on the first simulation, see engine_pool.py;
+# matplotlib and reportlab on the first plot or report, see figures.py)
+pd = lazy_import("pandas")
+from engine_pool import pool_from_env
+from job_queue import queue_from_env
+from instrumentation import activate, new_trace_id, prometheus_text, span, spans, to_jsonl
+from matlab_transfer import transfer_stats
+from decimate import page_bounds
+from figures import generate_pdf_report, plot_current_profile, plot_model_signals, plot_voltage_time
+from model_registry import MODELS, STEADY_STATE, TABS, model_status, models_in_tab, simulate as simulate_model
+from result_cache import ResultCache
+from surrogate import SurrogateStore
+import cap_search
+import simulation
 
 st.set_page_config(
     page_title="ABS Super-Capacitor & Power Electronics Calculator",
@@ -192,182 +202,337 @@ h1 {
 """, unsafe_allow_html=True)
 
 @st.cache_resource
-def get_matlab_engine():
-    eng = matlab.engine.start_matlab()
-    eng.addpath(r'C:\Users\adars\OneDrive\Desktop\Matlab', nargout=0)
-    # Add paths for Simulink models (adjust paths as needed)
-    eng.addpath(r'C:\Users\adars\OneDrive\Desktop\SimulinkModels', nargout=0)  # Assume models in this folder
-    return eng
-
-def generate_pdf_report(mode, inputs, results):
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    c.setFont("Helvetica", 12)
-    c.drawString(100, 750, "ABS Super-Capacitor Calculator Report")
-    c.drawString(100, 730, f"Date: {st.session_state.get('current_date', 'July 17, 2025')}")
-    c.drawString(100, 710, f"Mode: {mode}")
-    c.drawString(100, 690, "Inputs:")
-
-    y = 670
-    for key, value in inputs.items():
-        c.drawString(120, y, f"{key}: {value}")
-        y -= 20
-
-    c.drawString(100, y - 20, "Results:")
-    y -= 40
-
-    for key, value in results.items():
-        if key != "Notes":
-            c.drawString(120, y, f"{key}: {value}")
-            y -= 20
-
-    # Wrap and add Notes (if exists)
-    if "Notes" in results:
-        note_lines = textwrap.wrap(results["Notes"], width=90)
-        c.drawString(120, y, "Notes:")
-        y -= 20
-        for line in note_lines:
-            c.drawString(130, y, line)
-            y -= 18
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer
-
-def plot_current_profile(periodic, time_period, spike_time, peak_current, static_current, duration=1.0, sample_rate=10000):
-    t = np.linspace(0, duration, int(duration * sample_rate))
-    current = np.zeros_like(t)
-    if periodic == "Periodic":
-        for i in range(len(t)):
-            t_mod = t[i] % time_period
-            current[i] = peak_current if t_mod <= spike_time else static_current
-    else:
-        current[:] = static_current
-        current[t <= spike_time] = peak_current
-
-    fig, ax = plt.subplots(figsize=(10, 4))  # Wider for dashboard
-    ax.plot(t, current, linewidth=2, color='#4682B4')
-    ax.set_title("Current Profile (A)", fontsize=14, pad=10)
-    ax.set_xlabel("Time (s)", fontsize=12)
-    ax.set_ylabel("Current (A)", fontsize=12)
-    ax.set_xlim(0, duration)
-    ax.grid(True, linestyle='--', alpha=0.5)
-    ax.set_facecolor('#f8f9fa')
-    fig.tight_layout()
-    return fig
-
-def compute_log_times(C_val: float, model_name: str):
-    eng = get_matlab_engine()
-    try:
-        t_rise, deltaT, t, Vcap = eng.LogTimes(C_val, model_name, nargout=4)
-        t = np.array(t).flatten()
-        Vcap = np.array(Vcap).flatten()
-        mask = t <= 250.0
-        return float(t_rise), float(deltaT), t[mask], Vcap[mask]
-    except Exception as e:
-        st.error(f"MATLAB computation failed: {str(e)}")
-        return None, None, None, None
-
-def sweep_for_cap(target_dt: float, c_min: float, c_max: float, tol_dt: float, cap_tol: float, model_name: str):
-    status = st.empty()
-    status.info(f"Sweeping C from {c_min:.3f}F to {c_max:.3f}F (step {cap_tol}F)…")
-
-    bestC = None
-    bestDt = None
-    bestErr = float("inf")
-    t_data = v_data = None
-    best_t_rise = None
-
-    left, right = c_min, c_max
-
-    while (right - left) > cap_tol:
-        mid = 0.5 * (left + right)
-        c = cap_tol * math.floor(mid / cap_tol)
-        if c <= left:
-            c = left + cap_tol
-        if c >= right:
-            c = right - cap_tol
-
-        status.info(f"Testing C = {c:.4f} F; interval = [{left:.4f}, {right:.4f}]")
-
-        t_rise, deltaT, t_arr, v_arr = compute_log_times(c, model_name)
-        if t_rise is None:
-            break
-
-        err = abs(deltaT - target_dt)
-        if err < bestErr:
-            bestErr = err
-            bestC = c
-            bestDt = deltaT
-            t_data, v_data = t_arr, v_arr
-            best_t_rise = t_rise
-
-        if err <= tol_dt:
-            status.success(f"Converged early: C={c:.4f}F ±{cap_tol}F, Δt err {err:.4f}s")
-            return bestC, bestDt, bestErr, cap_tol, t_data, v_data, best_t_rise
-
-        if deltaT < target_dt:
-            left = c
-        else:
-            right = c
-
-    status.success(
-        f"Sweep done: Best C ≈ {bestC:.4f}F ±{cap_tol:.4f}F, "
-        f"Δt={bestDt:.4f}s err ±{bestErr:.4f}s"
+def get_engine_pool():
+    # Shared by all sessions; size/recycling set via ABS_ENGINE_* env vars
+    return pool_from_env()
+
+@st.cache_resource
+def get_result_cache():
+    # On-disk and shared between processes; location set via ABS_CACHE_DIR
+    return ResultCache()
+
+@st.cache_resource
+def get_surrogates():
+    # Δt(C) fits per model and current profile, seeded from the result cache
+    return SurrogateStore(get_result_cache())
+
+@st.cache_resource
+def get_job_queue():
+    # Shared by all sessions, so jobs survive reruns and refreshes; sized via ABS_JOB_* env vars
+    return queue_from_env()
+
+def simulate_log_times(C_val: float, model_name: str, workspace: dict, backend: str = "matlab", events: bool = False):
+    # Streamlit-free so it can also run on sweep worker threads
+    pool = get_engine_pool() if backend == "matlab" else None
+    # Native full-horizon runs stop simulating once the charge/discharge cycle repeats (ABS_STEADY_TOL);
+    # the settled cycle is repeated to the end of the horizon, so plots are not cut short
+    t_rise, deltaT, t, Vcap = simulation.log_times(
+        C_val, model_name, workspace, backend=backend, pool=pool, cache=get_result_cache(), events=events,
+        steady_tol=simulation.STEADY_TOL or None,
     )
-    return bestC, bestDt, bestErr, cap_tol, t_data, v_data, best_t_rise
-
-def plot_voltage_time(t_data, v_data, x_lim=(0, 100), figsize=(10, 4), title_size=16, label_size=14, tick_size=12):
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.plot(t_data, v_data, linewidth=2, color='#4682B4')
-    ax.set_title("Capacitor Voltage vs. Time", fontsize=title_size, pad=10)
-    ax.set_xlabel("Time (s)", fontsize=label_size)
-    ax.set_ylabel("Vcap (V)", fontsize=label_size)
-    ax.set_xlim(x_lim)
-    ax.tick_params(labelsize=tick_size)
-    ax.grid(True, linestyle='--', alpha=0.5)
-    ax.set_facecolor('#f8f9fa')
-    fig.tight_layout()
-    return fig
+    if events:
+        # The surrogates fit event-terminated runs only, the kind the capacitor search makes
+        get_surrogates().add(model_name, workspace, backend, C_val, t_rise, deltaT)
+    mask = t <= 250.0
+    return t_rise, deltaT, t[mask], Vcap[mask]
+
+@st.cache_resource
+def get_sweep_executor():
+    # Worker threads for parallel sweeps; MATLAB runs are bounded by the engine pool size
+    return ThreadPoolExecutor(max_workers=int(os.environ.get("ABS_SWEEP_WORKERS", os.cpu_count() or 4)))
+
+def times_job(C_val: float, model_name: str, workspace: dict, backend: str, progress, trace_id=None):
+    progress(f"Simulating C = {C_val:.4f} F ({backend} backend)…")
+    with activate(trace_id), span("compute_log_times", C_val=C_val, backend=backend):
+        return simulate_log_times(C_val, model_name, workspace, backend)
+
+def sweep_job(target_dt: float, c_min: float, c_max: float, tol_dt: float, cap_tol: float, model_name: str, workspace: dict, backend: str, strategy: str, probes: int, progress, trace_id=None):
+    with activate(trace_id), span("sweep_for_cap", strategy=strategy, backend=backend) as attrs:
+        result = _sweep(target_dt, c_min, c_max, tol_dt, cap_tol, model_name, workspace, backend, strategy, probes, progress, trace_id)
+        attrs["simulations"] = result.n_sims
+    return result
+
+def _sweep(target_dt, c_min, c_max, tol_dt, cap_tol, model_name, workspace, backend, strategy, probes, progress, trace_id):
+    # Search runs stop at the 12 V crossing with interpolated crossing times; each
+    # finished simulation is reported as a partial result (C, Δt)
+    def evaluate(c):
+        # k-ary probes run on executor threads, so the trace is re-activated here
+        with activate(trace_id), span("sweep.probe", C_val=c):
+            out = simulate_log_times(c, model_name, workspace, backend, events=True)
+        progress(partial=(c, out[1]))
+        return out
+
+    def on_progress(message, level="info"):
+        progress(message)
+
+    progress(f"Sweeping C from {c_min:.3f}F to {c_max:.3f}F (step {cap_tol}F)…")
+    options = {}
+    if strategy == "kary":
+        options = {"executor": get_sweep_executor(), "probes": probes}
+    elif strategy == "surrogate":
+        options = {"predict": get_surrogates().get(model_name, workspace, backend).invert}
+    result = cap_search.run_search(
+        strategy, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=on_progress, **options
+    )
+    if result.best_c is not None and not result.error:
+        # Full-horizon run of the answer, for the multi-cycle voltage plot
+        progress(f"Simulating C = {result.best_c:.4f} F over the full horizon for the plot…")
+        with span("sweep.full_run", C_val=result.best_c):
+            _, _, result.t, result.v = simulate_log_times(result.best_c, model_name, workspace, backend)
+    return result
 
 # New Functions for Simulink Models
-def run_simulink_model(model_name, params=None):
-    """Run a Simulink model and return results (e.g., time series data, plots)."""
-    eng = get_matlab_engine()
-    try:
-        # Load model
-        eng.load_system(model_name, nargout=0)
-        
-        # Set parameters if provided (example for common params)
-        if params:
-            for key, value in params.items():
-                eng.workspace[key] = value
-        
-        # Simulate
-        out = eng.sim(model_name, nargout=1)  # Returns simulation output
-        
-        # Extract data (adapt based on model outputs; assume tout, yout)
-        t = np.array(eng.workspace['tout']).flatten()
-        y = np.array(eng.workspace['yout']).flatten() if 'yout' in eng.workspace else None
-        
-        # Generate plot
-        fig, ax = plt.subplots(figsize=(10, 4))
-        if y is not None:
-            ax.plot(t, y, linewidth=2, color='#FF6B6B')
-            ax.set_title(f"Simulation Output for {model_name}", fontsize=16)
-            ax.set_xlabel("Time (s)")
-            ax.set_ylabel("Output")
-            ax.grid(True, alpha=0.3)
-        else:
-            ax.text(0.5, 0.5, 'No output data', ha='center', va='center', transform=ax.transAxes)
-            ax.set_title(f"Simulation for {model_name} (No Plot Data)")
-        
-        fig.tight_layout()
-        return fig, t, y, out
-    except Exception as e:
-        st.error(f"Simulation failed for {model_name}: {str(e)}")
-        return None, None, None, None
+def run_simulink_model(title, params, steady_tol=None, progress=None, trace_id=None):
+    """Run a registered Simulink model (model_registry.py) and return its ``ModelRun``.
+
+    With ``steady_tol`` the run stops once its signals repeat cycle to cycle.
+    """
+    spec = MODELS[title]
+    if progress is not None:
+        progress(f"Running {spec.file} in MATLAB/Simulink…")
+    with activate(trace_id), span("run_simulink_model", model=spec.file, steady=bool(steady_tol)):
+        return simulate_model(spec, params, get_engine_pool(), steady_tol=steady_tol)
+
+# Background jobs: each result panel remembers its job in session state and the URL,
+# so it is picked up again after a rerun or a browser refresh
+def watch_job(slot, job_id):
+    st.session_state[slot] = job_id
+    st.query_params[slot] = job_id
+
+def watched_job(slot):
+    job_id = st.session_state.get(slot) or st.query_params.get(slot)
+    if not job_id:
+        return None
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.pop(slot, None)
+    return job
+
+def show_job_status(job):
+    """Status line for an unfinished job; returns True once the job has finished."""
+    if job.done:
+        return True
+    if job.status == "queued":
+        st.info(f"{job.label}: queued…")
+        st.button("Cancel", key=f"cancel_{job.id}", on_click=get_job_queue().cancel, args=(job.id,))
+    else:
+        st.info(f"{job.label}: {job.message or 'running…'} ({job.elapsed:.1f} s)")
+    st.session_state["polling"] = True
+    return False
+
+def poll_jobs():
+    # Rerun while a watched job is unfinished; any widget interaction interrupts the wait
+    if st.session_state.pop("polling", False):
+        time.sleep(float(os.environ.get("ABS_JOB_POLL_SECONDS", "1.0")))
+        st.rerun()
+
+def jobs_sidebar():
+    queue = get_job_queue()
+    stats = queue.stats()
+    with st.sidebar.expander(f"Background jobs ({stats['running']} running, {stats['queued']} queued)"):
+        jobs = queue.jobs()
+        if not jobs:
+            st.caption("No jobs yet.")
+        for job in jobs[:20]:
+            line = f"**{job.label}** — {job.status}"
+            if job.started is not None:
+                line += f" ({job.elapsed:.1f} s)"
+            st.markdown(line)
+            if job.error:
+                st.caption(job.error)
+            slot = job.params.get("slot")
+            if slot and job.status != "cancelled":
+                st.button("Show", key=f"show_{job.id}", on_click=watch_job, args=(slot, job.id))
+        st.caption(f"{stats['workers']} worker threads")
+
+def time_window(t, default_end, key):
+    """Slider for the plotted time range; the trace is re-decimated for each window."""
+    t_end = float(t[-1]) if len(t) and t[-1] > 0 else 1.0
+    return st.slider(
+        "Time window (s)", 0.0, t_end, (0.0, min(float(default_end), t_end)), key=key,
+        help="Zoom into the trace; the plot keeps full detail at every zoom level."
+    )
+
+def show_paged_table(columns, key, page_size=500):
+    """Table of equal-length arrays, one page at a time (only the visible rows are sent to the browser)."""
+    n_rows = min(len(v) for v in columns.values())
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", [100, 500, 1000, 5000], index=1, key=f"{key}_size")
+    _, _, n_pages = page_bounds(n_rows, 1, page_size)
+    with col2:
+        page = st.number_input(f"Page (of {n_pages})", 1, n_pages, 1, key=f"{key}_page")
+    start, stop, _ = page_bounds(n_rows, page, page_size)
+    st.dataframe(pd.DataFrame({name: v[start:stop] for name, v in columns.items()},
+                              index=range(start, stop)), use_container_width=True)
+    st.caption(f"Rows {start + 1}–{stop} of {n_rows}")
+
+def show_performance(job):
+    """Per-phase timings of a job and of the rendering that followed it."""
+    records = spans(job.params.get("trace"))
+    if not records:
+        return
+    with st.expander("Performance"):
+        phases = {}
+        for r in records:
+            calls, total = phases.get(r["name"], (0, 0.0))
+            phases[r["name"]] = (calls + 1, total + r["seconds"])
+        lines = ["| Phase | Calls | Total (s) | Mean (ms) |", "|---|---:|---:|---:|"]
+        for name, (calls, total) in sorted(phases.items(), key=lambda kv: kv[1][1], reverse=True):
+            lines.append(f"| `{name}` | {calls} | {total:.3f} | {1000 * total / calls:.1f} |")
+        st.markdown("\n".join(lines))
+        st.caption("Nested phases are included in their parents' totals; render phases repeat on every rerun.")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Spans (JSON lines)", to_jsonl(records), file_name=f"trace_{job.id}.jsonl",
+                               mime="application/jsonl", key=f"trace_{job.id}")
+        with col2:
+            st.download_button("All phases (Prometheus)", prometheus_text(), file_name="abs_metrics.prom",
+                               mime="text/plain", key=f"prom_{job.id}")
+
+def show_times_result(job):
+    if job.status == "failed":
+        st.error(f"Simulation failed ({job.params['backend']} backend): {job.error}")
+        return
+    if job.status != "done":
+        return
+    t_rise, deltaT, t, Vcap = job.result
+    myFlag, time_period, spike_time, peak_current, static_current = job.params["profile"]
+    mode, inputs = job.params["mode"], job.params["inputs"]
+    if t_rise is not None:
+        st.success("Simulation Complete.")
+        graph_limit = t_rise + deltaT
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("ABS Off Time (Charging)", f"{t_rise:.4f} s")
+        with col2:
+            st.metric("ABS On Time (Discharging)", f"{deltaT:.4f} s")
+
+        with span("render.current_plot"):
+            fig_current = plot_current_profile(myFlag, time_period, spike_time, peak_current, static_current, duration=deltaT, sample_rate=10000)
+            st.pyplot(fig_current)
+
+        window = time_window(t, 5 * graph_limit, key=f"window_{job.id}")
+        with span("render.voltage_plot"):
+            fig_voltage = plot_voltage_time(t, Vcap, x_lim=window)
+            st.pyplot(fig_voltage)
+
+        st.markdown(
+            f"""<div style='font-size:20px; font-weight:bold;'>
+            The ABS on time signifies that the super‑capacitor will be able to provide the load current for {deltaT:.4f} seconds, 
+            and the ABS off time signifies that the super‑capacitor will be charging for {t_rise:.4f} seconds and ABS will be inactive during this period.
+            </div>""",
+            unsafe_allow_html=True
+        )
+
+        st.markdown(
+            """<div style='font-size:20px; font-weight:bold;'>
+            The Super-Capacitor during this period of charging and discharging will vary within 12V and 14.4V as shown in the above graph.
+            </div>""",
+            unsafe_allow_html=True
+        )
+
+        # PDF Report
+        note = (
+            f"The ABS on time signifies that the super-capacitor will be able to provide the load current for "
+            f"{deltaT:.4f} seconds, and the ABS off time signifies that the super-capacitor will be charging for "
+            f"{t_rise:.4f} seconds (ABS will be inactive during this period).\n"
+            f"The super-capacitor voltage during this period will vary between 12 V and 14.4 V as shown in the graph."
+        )
+        results = {
+            "ABS Off Time (s)": f"{t_rise:.4f}",
+            "ABS On Time (s)": f"{deltaT:.4f}",
+            "Notes": note
+        }
+        with span("render.pdf"):
+            pdf_buffer = generate_pdf_report(
+                mode, inputs, results, date=st.session_state.get('current_date', 'July 17, 2025'),
+                t=t, vcap=Vcap, x_lim=window, profile=job.params["profile"], profile_duration=deltaT,
+            )
+        st.download_button(
+            label="📥 Download Report",
+            data=pdf_buffer,
+            file_name="abs_calculator_report.pdf",
+            mime="application/pdf"
+        )
+
+def show_sweep_result(job):
+    if job.status == "failed":
+        st.error(f"Sweep failed ({job.params['backend']} backend): {job.error}")
+        return
+    if job.status != "done":
+        return
+    result = job.result
+    backend = job.params["backend"]
+    if result.error:
+        st.error(f"Simulation failed ({backend} backend): {result.error}")
+    if result.converged:
+        st.caption(f"Converged early after {result.n_sims} simulations.")
+    elif result.best_c is not None:
+        st.caption(f"Sweep done after {result.n_sims} simulations.")
+    bestC, bestDt, bestErr, accuracy = result.best_c, result.best_dt, result.best_err, result.cap_tol
+    bestT, bestV, best_charge_time = result.t, result.v, result.t_rise
+    myFlag, time_period, spike_time, peak_current, static_current = job.params["profile"]
+    mode, inputs = job.params["mode"], job.params["inputs"]
+    if bestC is not None:
+        st.success("Sweep Complete.")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Best Capacitance", f"{bestC:.4f} F")
+        with col2:
+            st.metric("ABS Off Time (Charging)", f"{best_charge_time:.4f} s")
+        with col3:
+            st.metric("Achieved ABS On Time(Discharging)", f"{bestDt:.4f} s")
+        with col4:
+            st.metric("Absolute Error", f"±{bestErr:.4f} s")
+
+        graph_limit = best_charge_time + bestDt
+        with span("render.current_plot"):
+            fig_current = plot_current_profile(myFlag, time_period, spike_time, peak_current, static_current, duration=bestDt, sample_rate=10000)
+            st.pyplot(fig_current)
+
+        window = time_window(bestT, 5 * graph_limit, key=f"window_{job.id}")
+        with span("render.voltage_plot"):
+            fig_voltage = plot_voltage_time(bestT, bestV, x_lim=window)
+            st.pyplot(fig_voltage)
+
+        st.markdown(
+            f"**The minimum super-capacitor value that will achieve an ABS on-time of "
+            f"{bestDt:.4f} s is {bestC:.4f} F within the provided range.**"
+        )
+
+        st.markdown(
+            f"**This means that to get ABS operation of {bestDt:.4f} s without interruption, "
+            f"you will need at least {bestC:.4f} F of super-capacitor capacity.**"
+        )
+
+        # PDF Report
+        notes = (
+            f"The minimum super-capacitor value that will achieve an ABS on-time of "
+            f"{bestDt:.4f} s is {bestC:.4f} F within the provided range.\n"
+            f"This means that to get ABS operation of {bestDt:.4f} s without interruption, "
+            f"you will need at least {bestC:.4f} F of super-capacitor capacity, "
+            "with voltage swinging between 12 V and 14.4 V as shown above."
+        )
+        results = {
+            "Best Capacitance (F)": f"{bestC:.4f} ±{accuracy:.4f}",
+            "Achieved ABS On Time (s)": f"{bestDt:.4f}",
+            "Absolute Error (s)": f"±{bestErr:.4f}",
+            "Notes": notes
+        }
+        with span("render.pdf"):
+            pdf_buffer = generate_pdf_report(
+                mode, inputs, results, date=st.session_state.get('current_date', 'July 17, 2025'),
+                t=bestT, vcap=bestV, x_lim=window, profile=job.params["profile"], profile_duration=bestDt,
+            )
+        st.download_button(
+            label="📥 Download Report",
+            data=pdf_buffer,
+            file_name="abs_calculator_report.pdf",
+            mime="application/pdf"
+        )
+    else:
+        st.warning("No suitable capacitor found within the given range.")
 
 # Super-Capacitor Main (original, wrapped in tab)
 def super_cap_tab():
@@ -448,17 +613,35 @@ def super_cap_tab():
             }
             model_name = model_map[model_option]
 
-    eng = get_matlab_engine()
-    eng.workspace['myFlag'] = bool(myFlag == "Periodic")
-    eng.workspace['low_current'] = static_current
-    eng.workspace['high_current'] = peak_current
-    eng.workspace['TimePeriod'] = time_period
-    eng.workspace['SpikeTime'] = spike_time
-    eng.workspace['CurrentSource'] = CurrentSource
+            backend_option = st.radio(
+                "Simulation Backend",
+                ["MATLAB/Simulink", "Native (Python)"],
+                horizontal=True,
+                help="Native runs an equivalent NumPy capacitor model in milliseconds, without MATLAB."
+            )
+            backend = "native" if backend_option == "Native (Python)" else "matlab"
+
+            cache_stats = get_result_cache().stats()
+            st.caption(
+                f"Result cache: {cache_stats['entries']} stored, "
+                f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+            )
+
+    # Pushed into whichever pooled engine runs the simulation
+    workspace = {
+        'myFlag': bool(myFlag == "Periodic"),
+        'low_current': static_current,
+        'high_current': peak_current,
+        'TimePeriod': time_period,
+        'SpikeTime': spike_time,
+        'CurrentSource': CurrentSource,
+    }
     if myFlag == "Periodic":
-        eng.workspace['OnTime'] = (spike_time / time_period) * 100.0
+        workspace['OnTime'] = (spike_time / time_period) * 100.0
     else:
-        eng.workspace['OnTime'] = 1000.0
+        workspace['OnTime'] = 1000.0
+
+    profile = (myFlag, time_period, spike_time, peak_current, static_current)
 
     mode = st.radio("Select Mode:", ["Find ABS On/Off Time", "Find Capacitor Value"], horizontal=True)
 
@@ -473,67 +656,29 @@ def super_cap_tab():
             st.error("Capacitance must be positive.")
             return
         if st.button("Compute Times"):
-            with st.spinner("Simulating in MATLAB..."):
-                t_rise, deltaT, t, Vcap = compute_log_times(C_val, model_name)
-            if t_rise is not None:
-                st.success("Simulation Complete.")
-                graph_limit = t_rise + deltaT
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("ABS Off Time (Charging)", f"{t_rise:.4f} s")
-                with col2:
-                    st.metric("ABS On Time (Discharging)", f"{deltaT:.4f} s")
-
-                fig_current = plot_current_profile(myFlag, time_period, spike_time, peak_current, static_current, duration=deltaT, sample_rate=10000)
-                st.pyplot(fig_current)
-
-                fig_voltage = plot_voltage_time(t, Vcap, x_lim=(0, 5 * graph_limit))
-                st.pyplot(fig_voltage)
-
-                st.markdown(
-                    f"""<div style='font-size:20px; font-weight:bold;'>
-                    The ABS on time signifies that the super‑capacitor will be able to provide the load current for {deltaT:.4f} seconds, 
-                    and the ABS off time signifies that the super‑capacitor will be charging for {t_rise:.4f} seconds and ABS will be inactive during this period.
-                    </div>""",
-                    unsafe_allow_html=True
-                )
-
-                st.markdown(
-                    """<div style='font-size:20px; font-weight:bold;'>
-                    The Super-Capacitor during this period of charging and discharging will vary within 12V and 14.4V as shown in the above graph.
-                    </div>""",
-                    unsafe_allow_html=True
-                )
-
-                # PDF Report
-                inputs = {
-                    "Profile": myFlag,
-                    "Time Period (ms)": f"{time_period_ms:.3f}",
-                    "Spike Time (ms)": f"{spike_time_ms:.3f}",
-                    "Peak Current (A)": f"{peak_current:.2f}",
-                    "Static Current (A)": f"{static_current:.2f}",
-                    "Current Source (A)": f"{CurrentSource:.4f}",
-                    "Capacitance (F)": f"{C_val:.4f}",
-                    "Charging Model": model_option
-                }
-                note = (
-                    f"The ABS on time signifies that the super-capacitor will be able to provide the load current for "
-                    f"{deltaT:.4f} seconds, and the ABS off time signifies that the super-capacitor will be charging for "
-                    f"{t_rise:.4f} seconds (ABS will be inactive during this period).\n"
-                    f"The super-capacitor voltage during this period will vary between 12 V and 14.4 V as shown in the graph."
-                )
-                results = {
-                    "ABS Off Time (s)": f"{t_rise:.4f}",
-                    "ABS On Time (s)": f"{deltaT:.4f}",
-                    "Notes": note
-                }
-                pdf_buffer = generate_pdf_report(mode, inputs, results)
-                st.download_button(
-                    label="📥 Download Report",
-                    data=pdf_buffer,
-                    file_name="abs_calculator_report.pdf",
-                    mime="application/pdf"
-                )
+            inputs = {
+                "Profile": myFlag,
+                "Time Period (ms)": f"{time_period_ms:.3f}",
+                "Spike Time (ms)": f"{spike_time_ms:.3f}",
+                "Peak Current (A)": f"{peak_current:.2f}",
+                "Static Current (A)": f"{static_current:.2f}",
+                "Current Source (A)": f"{CurrentSource:.4f}",
+                "Capacitance (F)": f"{C_val:.4f}",
+                "Charging Model": model_option
+            }
+            trace_id = new_trace_id()
+            job_id = get_job_queue().submit(
+                times_job, C_val, model_name, workspace, backend, trace_id=trace_id,
+                label=f"Compute times, C = {C_val:.4f} F",
+                params={"slot": "times_job", "mode": mode, "backend": backend, "profile": profile, "inputs": inputs,
+                        "trace": trace_id},
+            )
+            watch_job("times_job", job_id)
+        job = watched_job("times_job")
+        if job is not None and show_job_status(job):
+            with activate(job.params["trace"]):
+                show_times_result(job)
+            show_performance(job)
 
     else:
         st.header("Target ABS On Time → Find Capacitance")
@@ -561,143 +706,173 @@ def super_cap_tab():
         if c_min >= c_max:
             st.error("Minimum capacitance must be less than maximum capacitance.")
             return
+        strategy_option = st.selectbox(
+            "Search Strategy",
+            list(cap_search.STRATEGY_LABELS),
+            help=cap_search.STRATEGY_HELP,
+        )
+        strategy = cap_search.STRATEGY_LABELS[strategy_option]
+        surrogate = get_surrogates().get(model_name, workspace, backend)
+        prediction = surrogate.invert(target_dt)
+        if prediction is not None:
+            c_pred, c_err = prediction
+            err_text = f"±{c_err:.3f} F" if np.isfinite(c_err) else "error not yet known"
+            st.info(f"Estimate from {len(surrogate)} earlier simulations: C ≈ {c_pred:.3f} F ({err_text}). "
+                    "Run the search to verify it.")
+        probes = 1
+        if strategy == "kary":
+            probes = st.slider(
+                "Parallel probes per round (k)",
+                min_value=2, max_value=16, value=min(os.cpu_count() or 4, 8),
+                help="Simulations run concurrently; MATLAB runs are limited by the engine pool size."
+            )
         if st.button("Find Best Capacitance"):
-            with st.spinner("Running binary‐search sweep in MATLAB..."):
-                bestC, bestDt, bestErr, accuracy, bestT, bestV, best_charge_time = sweep_for_cap(
-                    target_dt=target_dt,
-                    c_min=c_min,
-                    c_max=c_max,
-                    tol_dt=1e-3,
-                    cap_tol=cap_tol,
-                    model_name=model_name
-                )
-            if bestC is not None:
-                st.success("Sweep Complete.")
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Best Capacitance", f"{bestC:.4f} F")
-                with col2:
-                    st.metric("ABS Off Time (Charging)", f"{best_charge_time:.4f} s")
-                with col3:
-                    st.metric("Achieved ABS On Time(Discharging)", f"{bestDt:.4f} s")
-                with col4:
-                    st.metric("Absolute Error", f"±{bestErr:.4f} s")
-
-                graph_limit = best_charge_time + bestDt
-                fig_current = plot_current_profile(myFlag, time_period, spike_time, peak_current, static_current, duration=bestDt, sample_rate=10000)
-                st.pyplot(fig_current)
-
-                fig_voltage = plot_voltage_time(bestT, bestV, x_lim=(0, 5 * graph_limit))
-                st.pyplot(fig_voltage)
-
-                st.markdown(
-                    f"**The minimum super-capacitor value that will achieve an ABS on-time of "
-                    f"{bestDt:.4f} s is {bestC:.4f} F within the provided range.**"
-                )
-
-                st.markdown(
-                    f"**This means that to get ABS operation of {bestDt:.4f} s without interruption, "
-                    f"you will need at least {bestC:.4f} F of super-capacitor capacity.**"
-                )
-
-                # PDF Report
-                inputs = {
-                    "Profile": myFlag,
-                    "Time Period (ms)": f"{time_period_ms:.3f}",
-                    "Spike Time (ms)": f"{spike_time_ms:.3f}",
-                    "Peak Current (A)": f"{peak_current:.2f}",
-                    "Static Current (A)": f"{static_current:.2f}",
-                    "Current Source (A)": f"{CurrentSource:.4f}",
-                    "Target ABS On Time (s)": f"{target_dt:.4f}",
-                    "Capacitance Range (F)": f"{c_min:.2f} to {c_max:.2f}",
-                    "Capacitance Accuracy (±F)": f"{cap_tol:.2f}",
-                    "Charging Model": model_option
-                }
-                notes = (
-                    f"The minimum super-capacitor value that will achieve an ABS on-time of "
-                    f"{bestDt:.4f} s is {bestC:.4f} F within the provided range.\n"
-                    f"This means that to get ABS operation of {bestDt:.4f} s without interruption, "
-                    f"you will need at least {bestC:.4f} F of super-capacitor capacity, "
-                    "with voltage swinging between 12 V and 14.4 V as shown above."
-                )
-                results = {
-                    "Best Capacitance (F)": f"{bestC:.4f} ±{accuracy:.4f}",
-                    "Achieved ABS On Time (s)": f"{bestDt:.4f}",
-                    "Absolute Error (s)": f"±{bestErr:.4f}",
-                    "Notes": notes
-                }
-                pdf_buffer = generate_pdf_report(mode, inputs, results)
-                st.download_button(
-                    label="📥 Download Report",
-                    data=pdf_buffer,
-                    file_name="abs_calculator_report.pdf",
-                    mime="application/pdf"
-                )
-            else:
-                st.warning("No suitable capacitor found within the given range.")
+            inputs = {
+                "Profile": myFlag,
+                "Time Period (ms)": f"{time_period_ms:.3f}",
+                "Spike Time (ms)": f"{spike_time_ms:.3f}",
+                "Peak Current (A)": f"{peak_current:.2f}",
+                "Static Current (A)": f"{static_current:.2f}",
+                "Current Source (A)": f"{CurrentSource:.4f}",
+                "Target ABS On Time (s)": f"{target_dt:.4f}",
+                "Capacitance Range (F)": f"{c_min:.2f} to {c_max:.2f}",
+                "Capacitance Accuracy (±F)": f"{cap_tol:.2f}",
+                "Charging Model": model_option
+            }
+            trace_id = new_trace_id()
+            job_id = get_job_queue().submit(
+                sweep_job, target_dt, c_min, c_max, 1e-3, cap_tol, model_name, workspace, backend, strategy, probes,
+                trace_id=trace_id,
+                label=f"Find capacitance, target Δt = {target_dt:.4f} s",
+                params={"slot": "sweep_job", "mode": mode, "backend": backend, "profile": profile, "inputs": inputs,
+                        "trace": trace_id},
+            )
+            watch_job("sweep_job", job_id)
+        job = watched_job("sweep_job")
+        if job is not None:
+            if job.partial:
+                probes_df = pd.DataFrame(job.partial, columns=["C (F)", "Δt (s)"])
+                st.caption(f"{len(job.partial)} simulations so far")
+                st.dataframe(probes_df, use_container_width=True, height=180)
+            if show_job_status(job):
+                with activate(job.params["trace"]):
+                    show_sweep_result(job)
+                show_performance(job)
 
 # New Tab for Simulink Models
-def simulink_models_tab():
+def simulink_models_tab(tab):
+    specs = models_in_tab(tab)
     st.header("Power Electronics Simulink Models")
     st.markdown("Select and run simulations for various power electronics circuits. Adjust parameters and view outputs.")
 
-    model_options = {
-        "3-Phase Diode Rectifier": "3-Phase Diode Rectifier.slx",
-        "IGBTs with RC Snubbers": "IGBTs with RC snubbers for switching.slx",
-        "Permanent Magnet Synchronous Machine": "Permanent Magnet Synchronous Machine Model.slx",
-        "RLC Output Filter (Sine Wave)": "RLC output filter to obtain sine wave.slx"
-    }
-
-    selected_model = st.selectbox("Choose a Model", list(model_options.keys()))
-    model_path = model_options[selected_model]
-
-    with st.expander(f"Parameters for {selected_model}"):
-        # Generic parameters (adapt per model; these are examples)
-        col1, col2 = st.columns(2)
-        with col1:
-            input_voltage = st.slider("Input Voltage (V)", 0.0, 500.0, 220.0)
-            frequency = st.slider("Frequency (Hz)", 10.0, 1000.0, 50.0)
-        with col2:
-            load_resistance = st.slider("Load Resistance (Ohm)", 1.0, 1000.0, 10.0)
-            simulation_time = st.slider("Simulation Time (s)", 0.1, 10.0, 1.0)
-
-        params = {
-            "Vin": input_voltage,
-            "f": frequency,
-            "Rload": load_resistance,
-            "Tsim": simulation_time
-        }
-
-    if st.button(f"Run Simulation for {selected_model}"):
-        with st.spinner(f"Running {selected_model} in MATLAB/Simulink..."):
-            fig, t, y, out = run_simulink_model(model_path, params)
-            if fig:
-                st.pyplot(fig)
-                if y is not None and len(y) > 0:
-                    df = pd.DataFrame({"Time (s)": t[:len(y)], "Output": y})
-                    st.dataframe(df, use_container_width=True)
-                st.success("Simulation complete!")
+    if len(specs) > 1:
+        title = st.selectbox("Choose a Model", [spec.title for spec in specs], key=f"model_select_{tab}")
+        spec = MODELS[title]
+    else:
+        spec = specs[0]
+    st.caption(spec.description)
+    problem = model_status(spec)
+    if problem:
+        st.warning(problem)
+        return
+
+    with st.expander(f"Parameters for {spec.title}"):
+        # Declared per model in model_registry.py
+        cols = st.columns(2)
+        values = {}
+        for i, p in enumerate(spec.params):
+            with cols[i % 2]:
+                label = f"{p.label} ({p.unit})" if p.unit else p.label
+                values[p.name] = st.slider(label, p.min, p.max, p.default, help=p.help or None,
+                                           key=f"param_{spec.title}_{p.name}")
+        params = spec.workspace(values)
+        steady_tol = None
+        if spec.period is not None:
+            if st.checkbox("Stop at steady state", value=simulation.STEADY_TOL > 0, key=f"steady_{spec.title}",
+                           help="End the run once every signal repeats from one period to the next; "
+                                "the simulation time becomes an upper limit."):
+                steady_tol = st.number_input("Cycle-to-cycle tolerance", 1e-6, 0.1, simulation.STEADY_TOL or 1e-3,
+                                             format="%.0e", key=f"steady_tol_{spec.title}")
+
+    slot = f"model_job_{spec.title}"
+    if st.button(f"Run Simulation for {spec.title}", key=f"run_{spec.title}"):
+        trace_id = new_trace_id()
+        job_id = get_job_queue().submit(
+            run_simulink_model, spec.title, params, steady_tol, trace_id=trace_id,
+            label=f"Run {spec.title}",
+            params={"slot": slot, "trace": trace_id, "tsim": params[spec.stop_time]},
+        )
+        watch_job(slot, job_id)
+    job = watched_job(slot)
+    if job is not None and show_job_status(job):
+        if job.status == "failed":
+            st.error(f"Simulation failed for {spec.file}: {job.error}")
+        elif job.status == "done":
+            run = job.result
+            if run.metrics:
+                units = {metric.label: metric.unit for metric in spec.metrics}
+                units[STEADY_STATE] = "s"
+                cols = st.columns(len(run.metrics))
+                for col, (label, value) in zip(cols, run.metrics.items()):
+                    col.metric(f"{label} ({units[label]})" if units[label] else label,
+                               "n/a" if np.isnan(value) else f"{value:.4g}")
+                if len(run.t) and "tsim" in job.params:
+                    st.caption(f"Simulated {run.t[-1]:.4g} s of the {job.params['tsim']:.4g} s limit.")
+            t = run.t
+            window = time_window(t, t[-1] if len(t) else 1.0, key=f"window_{job.id}") if run.signals else None
+            with activate(job.params["trace"]), span("render.output_plot"):
+                st.pyplot(plot_model_signals(spec, t, run.signals, x_lim=window))
+            moved = transfer_stats()
+            moved.pop("last")
+            st.caption(
+                "Signal transfer so far: " + ", ".join(
+                    f"{m} {e['bytes'] / 1e6:.1f} MB in {e['seconds'] * 1000:.0f} ms" for m, e in moved.items()
+                )
+            )
+            if run.signals:
+                show_paged_table({"Time (s)": t, **{s.label: run.signals[s.name] for s in spec.signals
+                                                    if s.name in run.signals}}, key=f"table_{job.id}")
+            st.success("Simulation complete!")
+        show_performance(job)
+
+def startup_profile_sidebar():
+    with st.sidebar.expander("Startup profile"):
+        records = import_report()
+        if not records:
+            st.caption("No imports recorded yet.")
+            return
+        cold = st.session_state.get("cold_imports", {})
+        lines = ["| Module | Load (s) | When |", "|---|---:|---|"]
+        for r in records:
+            if r["mode"] == "preloaded":
+                # Imported by the host process (e.g. streamlit run) before the app could time it
+                cost = cold.get(r["module"])
+                load, when = (f"{cost[0]:.3f}" if cost else "?"), "preloaded" + (" (cold)" if cost else "")
             else:
-                st.warning("Simulation completed but no plot data available.")
+                load = f"{r['seconds']:.3f}"
+                when = "startup" if r["mode"] == "eager" else f"on first use (+{r['at']:.1f} s)"
+            lines.append(f"| `{r['module']}` | {load} | {when} |")
+        st.markdown("\n".join(lines))
+        st.caption(f"Total: {sum(r['seconds'] for r in records):.3f} s, excluding preloaded modules")
+        preloaded = [r["module"] for r in records if r["mode"] == "preloaded"]
+        if preloaded and st.button("Measure preloaded imports", help="Imports each one in a fresh interpreter"):
+            st.session_state["cold_imports"] = measure_cold_imports(preloaded)
+            st.rerun()
 
 # Main App with Tabs
 def main():
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Super-Capacitor Calculator", "3-Phase Diode Rectifier", "IGBTs with RC Snubbers", "PMSM Model", "RLC Sine Wave Filter"])
+    tabs = st.tabs(["Super-Capacitor Calculator"] + TABS)
 
-    with tab1:
+    with tabs[0]:
         super_cap_tab()
 
-    with tab2:
-        simulink_models_tab()  # Reuse for all, but filter by name if needed
-
-    with tab3:
-        simulink_models_tab()
+    # One tab per model group in model_registry.py
+    for tab, name in zip(tabs[1:], TABS):
+        with tab:
+            simulink_models_tab(name)
 
-    with tab4:
-        simulink_models_tab()
-
-    with tab5:
-        simulink_models_tab()
+    jobs_sidebar()
+    startup_profile_sidebar()
 
     # Footer
     st.markdown(
@@ -705,5 +880,7 @@ def main():
         unsafe_allow_html=True
     )
 
+    poll_jobs()
+
 if __name__ == "__main__":
     main()
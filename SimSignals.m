@@ -0,0 +1,132 @@
+function [t, values] = SimSignals(modelName, params, signalNames, stopTime, period, tol)
+% Simulate modelName until stopTime and return only the requested signals.
+% params is a struct of workspace variables for this run only (set on the
+% Simulink.SimulationInput). signalNames is a cell array of To Workspace
+% variable or logged signal names. values holds one column vector per name,
+% resampled onto t. A signal the model does not log comes back empty, and
+% of a multi-channel signal only the first channel is returned.
+%
+% With period > 0 the run stops early at steady state: it simulates in
+% growing chunks, continuing from the saved operating point, until the last
+% three periods of every signal each differ from the period before by less
+% than tol (relative to the signal's range), or stopTime is reached.
+
+    if ischar(signalNames)
+        signalNames = {signalNames};
+    end
+    in = Simulink.SimulationInput(modelName);
+    names = fieldnames(params);
+    for k = 1:numel(names)
+        in = in.setVariable(names{k}, params.(names{k}));
+    end
+
+    if nargin < 5 || isempty(period) || period <= 0
+        in = in.setModelParameter('StopTime', num2str(stopTime, 17));
+        [t, values] = collect(sim(in), signalNames);
+        return
+    end
+    if nargin < 6
+        tol = 1e-3;
+    end
+
+    % Chunks start at 20 periods and double, so a run costs at most about
+    % twice the time to steady state plus one restart per chunk
+    chunk = 20 * period;
+    tEnd = 0;
+    op = [];
+    t = [];
+    values = cell(1, numel(signalNames));
+    while tEnd < stopTime
+        tEnd = min(tEnd + chunk, stopTime);
+        chunk = 2 * chunk;
+        step = in.setModelParameter('StopTime', num2str(tEnd, 17), ...
+            'SaveFinalState', 'on', 'SaveOperatingPoint', 'on', 'FinalStateName', 'absOpPoint');
+        if ~isempty(op)
+            step = step.setInitialState(op);
+        end
+        simOut = sim(step);
+        op = simOut.absOpPoint;
+
+        [tChunk, vChunk] = collect(simOut, signalNames);
+        % A continued run logs its start time again
+        keep = true(size(tChunk));
+        if ~isempty(t)
+            keep = tChunk > t(end);
+        end
+        t = [t; tChunk(keep)];
+        for k = 1:numel(values)
+            if ~isempty(vChunk{k})
+                values{k} = [values{k}; vChunk{k}(keep)];
+            end
+        end
+        if isSteady(t, values, period, tol)
+            break
+        end
+    end
+end
+
+function [t, values] = collect(simOut, signalNames)
+    series = cell(1, numel(signalNames));
+    t = [];
+    for k = 1:numel(signalNames)
+        series{k} = findSignal(simOut, signalNames{k});
+        if isempty(t) && ~isempty(series{k})
+            t = series{k}.Time(:);
+        end
+    end
+
+    values = cell(1, numel(signalNames));
+    for k = 1:numel(signalNames)
+        ts = series{k};
+        if isempty(ts)
+            values{k} = [];
+            continue
+        end
+        data = reshape(ts.Data, numel(ts.Time), []);
+        data = double(data(:, 1));
+        if numel(ts.Time) ~= numel(t) || any(ts.Time(:) ~= t)
+            data = interp1(ts.Time(:), data, t, 'linear', 'extrap');
+        end
+        values{k} = data;
+    end
+end
+
+function ts = findSignal(simOut, name)
+    % To Workspace variable (saved as timeseries) or an element of logsout
+    ts = [];
+    saved = simOut.who;
+    if any(strcmp(saved, name))
+        ts = simOut.get(name);
+    elseif any(strcmp(saved, 'logsout'))
+        element = simOut.get('logsout').getElement(name);
+        if ~isempty(element)
+            ts = element.Values;
+        end
+    end
+    if ~isempty(ts) && ~isa(ts, 'timeseries')
+        ts = [];
+    end
+end
+
+function steady = isSteady(t, values, period, tol)
+    % Same test as signal_metrics.steady_state_time, on the last four periods
+    cycles = 3;
+    points = 200;
+    steady = false;
+    if isempty(t) || t(end) - t(1) < (cycles + 1) * period
+        return
+    end
+    grid = t(end) - (cycles + 1) * period + (0:(cycles + 1) * points - 1)' * (period / points);
+    for k = 1:numel(values)
+        if isempty(values{k})
+            continue
+        end
+        y = reshape(interp1(t, values{k}, grid), points, cycles + 1);
+        last = y(:, end);
+        scale = max([max(last) - min(last), max(abs(last)), realmin]);
+        if any(max(abs(diff(y, 1, 2)), [], 1) / scale >= tol)
+            return
+        end
+    end
+    steady = true;
+end
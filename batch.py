@@ -0,0 +1,226 @@
+"""Batch design-of-experiments evaluation of the super-capacitor model.
+
+``evaluate_design_points`` takes a DataFrame (or dict of arrays) of complete
+design points and returns one results row per point:
+
+    points = design_grid(C_val=range(1, 101), peak_current=[25, 30], CurrentSource=[2.5, 4.0])
+    results = evaluate_design_points(points, backend="native")
+
+Native points run on a process pool. MATLAB points run either one LogTimes call
+per point across the engine pool, or per model through ``parsim`` (LogTimesBatch.m).
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import simulation
+from decimate import decimate
+from native_backend import V_HIGH, V_LOW
+
+# Column defaults match the Super-Capacitor tab's initial inputs
+DEFAULT_DESIGN = {
+    "model": "Week_5_day_4_original",
+    "periodic": True,
+    "peak_current": 25.0,
+    "static_current": 10.0,
+    "TimePeriod": 0.1,
+    "SpikeTime": 0.02,
+    "CurrentSource": 4.0,
+}
+RESULT_COLUMNS = ["t_rise", "deltaT", "error", "elapsed"]
+
+
+def design_grid(**axes):
+    """Cartesian product of the given columns, e.g. ``design_grid(C_val=[10, 20], CurrentSource=[2, 4])``."""
+    names = list(axes)
+    rows = itertools.product(*(list(np.atleast_1d(axes[n])) for n in names))
+    return pd.DataFrame(list(rows), columns=names)
+
+
+def normalise_points(points):
+    """DataFrame of design points with every column filled in."""
+    df = pd.DataFrame(points).reset_index(drop=True)
+    if "C_val" not in df:
+        raise ValueError("Design points need a 'C_val' column.")
+    for column, default in DEFAULT_DESIGN.items():
+        df[column] = df[column].fillna(default) if column in df else default
+    df["periodic"] = df["periodic"].astype(bool)
+    return df
+
+
+def design_workspace(row):
+    """The workspace dict super_cap_tab() would push for this design point."""
+    periodic = bool(row["periodic"])
+    workspace = {
+        'myFlag': periodic,
+        'low_current': float(row["static_current"]),
+        'high_current': float(row["peak_current"]),
+        'TimePeriod': float(row["TimePeriod"]),
+        'SpikeTime': float(row["SpikeTime"]),
+        'CurrentSource': float(row["CurrentSource"]),
+    }
+    if periodic:
+        workspace['OnTime'] = (workspace['SpikeTime'] / workspace['TimePeriod']) * 100.0
+    else:
+        workspace['OnTime'] = 1000.0
+    return workspace
+
+
+_worker_cache = None
+
+
+def _native_point(args):
+    # Runs in a worker process; opens the shared on-disk cache once per process
+    global _worker_cache
+    index, row, cache_path, trace_points = args
+    cache = None
+    if cache_path is not None:
+        if _worker_cache is None or _worker_cache.path != cache_path:
+            from result_cache import ResultCache
+            _worker_cache = ResultCache(cache_path)
+        cache = _worker_cache
+    return index, _evaluate_point(row, "native", None, cache, trace_points)
+
+
+def plot_trace(t, vcap, t_rise, deltaT, points):
+    """Vcap over the window the app plots (five cycles), decimated to ``points`` buckets."""
+    x_range = (0.0, 5 * (t_rise + deltaT)) if np.isfinite(t_rise + deltaT) else None
+    return np.vstack(decimate(t, vcap, x_range=x_range, width_px=points, levels=(V_HIGH, V_LOW)))
+
+
+def _evaluate_point(row, backend, pool, cache, trace_points=0):
+    start = time.perf_counter()
+    trace = None
+    try:
+        t_rise, deltaT, t, vcap = simulation.log_times(
+            float(row["C_val"]), row["model"], design_workspace(row), backend=backend, pool=pool, cache=cache
+        )
+        error = None
+        if trace_points:
+            # Decimated in the worker, so only about 16 kB per point come back
+            trace = plot_trace(t, vcap, t_rise, deltaT, trace_points)
+    except Exception as e:
+        t_rise = deltaT = np.nan
+        error = str(e)
+    result = {"t_rise": t_rise, "deltaT": deltaT, "error": error, "elapsed": time.perf_counter() - start}
+    if trace_points:
+        result["trace"] = trace
+    return result
+
+
+def _matlab_vector(values, cast=float):
+    values = [cast(v) for v in values]
+    try:
+        import matlab
+        return matlab.logical(values) if cast is bool else matlab.double(values)
+    except ImportError:  # StubEngine
+        return values
+
+
+def _parsim_batch(df, pool, cache, on_result):
+    for model, group in df.groupby("model", sort=False):
+        if cache is not None:
+            pending = []
+            for index, row in group.iterrows():
+                cached = cache.get_scalars(float(row["C_val"]), model, design_workspace(row), "matlab")
+                if cached is None:
+                    pending.append(index)
+                else:
+                    on_result(index, {"t_rise": cached[0], "deltaT": cached[1], "error": None, "elapsed": 0.0})
+            group = group.loc[pending]
+            if group.empty:
+                continue
+        start = time.perf_counter()
+        try:
+            with pool.engine() as eng:
+                t_rise, deltaT = eng.LogTimesBatch(
+                    model,
+                    _matlab_vector(group["C_val"]),
+                    _matlab_vector(group["static_current"]),
+                    _matlab_vector(group["peak_current"]),
+                    _matlab_vector(group["TimePeriod"]),
+                    _matlab_vector(group["SpikeTime"]),
+                    _matlab_vector(group["CurrentSource"]),
+                    _matlab_vector(group["periodic"], bool),
+                    nargout=2,
+                )
+        except Exception as e:
+            # One failing model must not lose the other models' results
+            elapsed = (time.perf_counter() - start) / len(group)
+            for index in group.index:
+                on_result(index, {"t_rise": np.nan, "deltaT": np.nan, "error": str(e), "elapsed": elapsed})
+            continue
+        elapsed = (time.perf_counter() - start) / len(group)
+        t_rise = np.asarray(t_rise, dtype=np.float64).ravel()
+        deltaT = np.asarray(deltaT, dtype=np.float64).ravel()
+        for k, (index, row) in enumerate(group.iterrows()):
+            if np.isnan(deltaT[k]):
+                error = "Voltage never crossed thresholds."
+            else:
+                error = None
+                if cache is not None:
+                    args = (float(row["C_val"]), model, design_workspace(row), "matlab")
+                    cache.put(cache.key(*args, scalars=True), (t_rise[k], deltaT[k], np.empty(0), np.empty(0)), *args,
+                              kind="scalars")
+            on_result(index, {"t_rise": t_rise[k], "deltaT": deltaT[k], "error": error, "elapsed": elapsed})
+
+
+def evaluate_design_points(points, backend="native", pool=None, cache=None, max_workers=None,
+                           parsim=False, on_progress=None, executor=None, trace_points=0):
+    """Evaluate every design point; returns the points with t_rise/deltaT/error/elapsed columns.
+
+    ``max_workers`` defaults to the CPU count (native) or the engine pool size
+    (MATLAB). ``parsim=True`` sends each model's points to MATLAB in one
+    LogTimesBatch call; with a ``cache`` it only sends the points that miss, and
+    a model whose call fails gets an ``error`` on each of its rows.
+    ``on_progress(done, total)`` is called as rows finish.
+    Pass a ``ProcessPoolExecutor`` as ``executor`` to reuse native workers
+    across calls. With ``trace_points`` a ``trace`` column holds each run's
+    Vcap over the plotted window (five charge/discharge cycles), decimated to
+    that many buckets as a ``(2, n)`` array, for reports; parsim runs have none.
+    """
+    df = normalise_points(points)
+    total = len(df)
+    results = {}
+
+    def on_result(index, row):
+        results[index] = row
+        if on_progress is not None:
+            on_progress(len(results), total)
+
+    if backend == "native":
+        workers = max_workers or os.cpu_count() or 1
+        cache_path = cache.path if cache is not None else None
+        tasks = [(i, row, cache_path, trace_points) for i, row in df.iterrows()]
+        chunksize = max(1, total // (workers * 4))
+        if executor is not None:
+            for index, row in executor.map(_native_point, tasks, chunksize=chunksize):
+                on_result(index, row)
+        elif workers == 1 or total < 2:
+            for task in tasks:
+                on_result(*_native_point(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for index, row in ex.map(_native_point, tasks, chunksize=chunksize):
+                    on_result(index, row)
+    elif backend == "matlab":
+        if pool is None:
+            raise ValueError("The MATLAB backend needs an engine pool.")
+        if parsim:
+            _parsim_batch(df, pool, cache, on_result)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers or pool.size) as ex:
+                futures = {ex.submit(_evaluate_point, row, backend, pool, cache, trace_points): i
+                           for i, row in df.iterrows()}
+                for fut in as_completed(futures):
+                    on_result(futures[fut], fut.result())
+    else:
+        raise ValueError(f"Unknown simulation backend {backend!r}; expected one of {simulation.BACKENDS}.")
+
+    out = pd.DataFrame.from_dict(results, orient="index").reindex(df.index)
+    columns = RESULT_COLUMNS + (["trace"] if trace_points else [])
+    return pd.concat([df, out.reindex(columns=columns)], axis=1)
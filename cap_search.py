@@ -0,0 +1,331 @@
+"""Capacitance searches for a target ABS on-time (Δt grows monotonically with C).
+
+Strategies are registered in ``STRATEGIES`` and share one signature; run one
+with ``run_search(name, evaluate, ...)``. Every strategy keeps a guaranteed
+bracket, only probes points on the ``cap_tol`` grid and reports the number of
+simulations it used in ``SweepResult.n_sims``. ``"surrogate"`` starts from a
+fitted Δt(C) prediction (surrogate.py), so a good fit needs only verification runs.
+
+``evaluate(c)`` must return ``(t_rise, deltaT, t, Vcap)`` for capacitance
+``c``; searches stop at the first simulation failure and return the best point
+found so far together with the error message.
+"""
+import functools
+import math
+from decimal import Decimal
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# Relative slack on the cap_tol grid so float round-off cannot stall a search
+GRID_EPS = 1e-6
+
+
+@dataclass
+class SweepResult:
+    best_c: float = None
+    best_dt: float = None
+    best_err: float = float("inf")
+    cap_tol: float = None
+    t: np.ndarray = None
+    v: np.ndarray = None
+    t_rise: float = None
+    n_sims: int = 0
+    converged: bool = False
+    error: str = None
+    probes: list = field(default_factory=list)  # (C, deltaT) in evaluation order
+
+    def record(self, c, t_rise, deltaT, t, v, target_dt):
+        self.n_sims += 1
+        self.probes.append((c, deltaT))
+        err = abs(deltaT - target_dt)
+        if err < self.best_err:
+            self.best_c, self.best_dt, self.best_err = c, deltaT, err
+            self.t, self.v, self.t_rise = t, v, t_rise
+        return err
+
+
+def grid_digits(cap_tol):
+    """Decimal places of the ``cap_tol`` grid (0.05 -> 2, 1e-3 -> 3, 2 -> 0)."""
+    return max(0, -Decimal(repr(float(cap_tol))).normalize().as_tuple().exponent)
+
+
+def snap(c, cap_tol, left, right, mode="floor"):
+    """Snap ``c`` to the ``cap_tol`` grid, keeping it strictly inside (left, right).
+
+    The result is rounded to the grid's decimal places, so equal grid points
+    are equal floats (33.66, not 33.660000000000004) and share cache keys.
+    """
+    if mode == "nearest":
+        c = cap_tol * round(c / cap_tol)
+    else:
+        c = cap_tol * math.floor(c / cap_tol)
+    if c <= left:
+        c = left + cap_tol
+    if c >= right:
+        c = right - cap_tol
+    return round(c, grid_digits(cap_tol))
+
+
+def _noop(message, level="info"):
+    pass
+
+
+def _bracket_search(propose, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress, snap_mode):
+    """Shared loop for the single-probe strategies.
+
+    Δt is monotonic in C, so every probe replaces one end of [left, right] and
+    the answer stays bracketed whatever ``propose`` suggests. ``propose`` gets
+    the bracket, ``f = Δt - target`` at its ends (``None`` until evaluated),
+    every point seen so far and a per-search ``state`` dict.
+    """
+    result = SweepResult(cap_tol=cap_tol)
+    left, right = c_min, c_max
+    f_left = f_right = None
+    # Δt -> 0 as C -> 0: a free point for the interpolating strategies
+    history = [(0.0, -target_dt)]
+    state = {}
+
+    while (right - left) > cap_tol * (1 + GRID_EPS):
+        guess = propose(left, f_left, right, f_right, history, state)
+        if guess is None or not math.isfinite(guess):
+            guess = 0.5 * (left + right)
+        c = snap(guess, cap_tol, left, right, snap_mode)
+        if not left < c < right:
+            break  # bracket is a single grid step
+        on_progress(f"Testing C = {c:.4f} F; interval = [{left:.4f}, {right:.4f}]")
+        try:
+            t_rise, deltaT, t_arr, v_arr = evaluate(c)
+        except Exception as e:
+            result.error = str(e)
+            break
+
+        err = result.record(c, t_rise, deltaT, t_arr, v_arr, target_dt)
+        if err <= tol_dt:
+            result.converged = True
+            break
+
+        f = deltaT - target_dt
+        history.append((c, f))
+        if f < 0:
+            left, f_left = c, f
+            state["moved"] = "left"
+        else:
+            right, f_right = c, f
+            state["moved"] = "right"
+    return result
+
+
+def _propose_bisection(left, f_left, right, f_right, history, state):
+    return 0.5 * (left + right)
+
+
+def _interpolate(p0, p1):
+    (x0, f0), (x1, f1) = p0, p1
+    if f1 == f0:
+        return None
+    return x1 - f1 * (x1 - x0) / (f1 - f0)
+
+
+def _propose_illinois(left, f_left, right, f_right, history, state):
+    # Regula falsi on the bracket ends; the origin stands in for an unevaluated left end
+    lo = (left, f_left) if f_left is not None else history[0]
+    if f_right is None:
+        # No upper end yet: extrapolate the straight line through the last points
+        return _interpolate(history[-2], history[-1]) if len(history) > 1 else None
+    # Illinois: halve the stale end's weight when the same end moves twice running
+    moved, prev = state.get("moved"), state.get("prev_moved")
+    state["prev_moved"] = moved
+    scale = state.get("scale", {"left": 1.0, "right": 1.0})
+    if moved is not None and moved == prev:
+        stale = "right" if moved == "left" else "left"
+        scale[stale] *= 0.5
+    elif moved is not None:
+        scale = {"left": 1.0, "right": 1.0}
+    state["scale"] = scale
+    return _interpolate((lo[0], lo[1] * scale["left"]), (right, f_right * scale["right"]))
+
+
+def _propose_secant(left, f_left, right, f_right, history, state):
+    if len(history) < 2:
+        return None
+    guess = _interpolate(history[-2], history[-1])
+    if guess is None:
+        return None
+    # Overshooting an end that has not been simulated yet: probe next to it
+    if guess >= right and f_right is None:
+        return right
+    if guess <= left and f_left is None:
+        return left
+    if not left < guess < right:
+        return None
+    return guess
+
+
+def _propose_brent(left, f_left, right, f_right, history, state):
+    # Inverse quadratic interpolation on the last three points, falling back to
+    # the secant step; bisect unless the bracket at least halves every two steps.
+    widths = state.setdefault("widths", [])
+    widths.append(right - left)
+    if len(widths) >= 3 and widths[-1] > 0.5 * widths[-3]:
+        return None
+    guess = None
+    if len(history) >= 3:
+        (a, fa), (b, fb), (c, fc) = history[-3:]
+        if len({fa, fb, fc}) == 3:
+            guess = (a * fb * fc / ((fa - fb) * (fa - fc))
+                     + b * fa * fc / ((fb - fa) * (fb - fc))
+                     + c * fa * fb / ((fc - fa) * (fc - fb)))
+    if guess is None or not left < guess < right:
+        guess = _propose_secant(left, f_left, right, f_right, history, state)
+    return guess
+
+
+def bisection_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop):
+    return _bracket_search(_propose_bisection, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol,
+                           on_progress, "floor")
+
+
+def illinois_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop):
+    return _bracket_search(_propose_illinois, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol,
+                           on_progress, "nearest")
+
+
+def secant_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop):
+    return _bracket_search(_propose_secant, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol,
+                           on_progress, "nearest")
+
+
+def brent_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop):
+    return _bracket_search(_propose_brent, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol,
+                           on_progress, "nearest")
+
+
+def _propose_surrogate(prediction, cap_tol, left, f_left, right, f_right, history, state):
+    probes_so_far = len(history) - 1
+    if prediction is not None and probes_so_far < 2:
+        c_pred, c_err = prediction
+        if probes_so_far == 0:
+            return c_pred
+        # Verify: the neighbouring grid point towards the target brackets the answer
+        # whenever the prediction was within one grid step
+        return history[-1][0] + (cap_tol if history[-1][1] < 0 else -cap_tol)
+    return _propose_brent(left, f_left, right, f_right, history, state)
+
+
+def surrogate_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop, predict=None):
+    """Start from a surrogate prediction, verify it by simulation, then continue as Brent.
+
+    ``predict(target_dt)`` returns ``(C, C_err)`` or ``None``. The first probe
+    is the predicted C on the grid and the second its neighbour towards the
+    target, so a prediction within one grid step brackets the answer in one or
+    two simulations. Without a prediction this is Brent's method.
+    """
+    prediction = predict(target_dt) if predict is not None else None
+    if prediction is None:
+        on_progress("No surrogate fit for these inputs yet; searching with Brent's method.")
+    else:
+        on_progress(f"Surrogate predicts C ≈ {prediction[0]:.4f} F; verifying by simulation…")
+    propose = functools.partial(_propose_surrogate, prediction, cap_tol)
+    return _bracket_search(propose, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress, "nearest")
+
+
+def kary_probes(left, right, k, cap_tol):
+    """Up to ``k`` distinct grid points splitting (left, right) into k+1 parts."""
+    probes = []
+    for i in range(1, k + 1):
+        c = snap(left + (right - left) * i / (k + 1), cap_tol, left, right)
+        if left < c < right and (not probes or c > probes[-1] + 0.5 * cap_tol):
+            probes.append(c)
+    return probes
+
+
+def kary_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop, executor=None, probes=4):
+    """Evaluate ``probes`` capacitances per round concurrently on ``executor``.
+
+    Each round narrows the bracket (probes+1)-fold; the search exits as soon as
+    any probe meets ``tol_dt``. Queued probes are then cancelled and running
+    ones are waited for, so ``evaluate`` is never still running on return.
+    """
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=probes) as executor:
+            return kary_search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol,
+                               on_progress, executor, probes)
+    result = SweepResult(cap_tol=cap_tol)
+    left, right = c_min, c_max
+    rnd = 0
+
+    while (right - left) > cap_tol * (1 + GRID_EPS):
+        rnd += 1
+        cs = kary_probes(left, right, probes, cap_tol)
+        if not cs:
+            break
+        on_progress(f"Round {rnd}: testing {len(cs)} values of C in [{left:.4f}, {right:.4f}]")
+        pending = {executor.submit(evaluate, c): c for c in cs}
+        deltas = {}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                c = pending.pop(fut)
+                try:
+                    t_rise, deltaT, t_arr, v_arr = fut.result()
+                except Exception as e:
+                    result.error = str(e)
+                    continue
+                deltas[c] = deltaT
+                err = result.record(c, t_rise, deltaT, t_arr, v_arr, target_dt)
+                on_progress(
+                    f"Round {rnd}: C = {c:.4f} F → Δt = {deltaT:.4f} s "
+                    f"({len(deltas)}/{len(cs)}); best C = {result.best_c:.4f} F"
+                )
+                if err <= tol_dt:
+                    result.converged = True
+            if result.converged or result.error:
+                for fut in pending:
+                    fut.cancel()
+                # A running simulation cannot be cancelled; its result is dropped
+                wait(pending)
+                return result
+
+        below = [c for c in cs if deltas[c] < target_dt]
+        above = [c for c in cs if deltas[c] >= target_dt]
+        if below:
+            left = max(below)
+        if above:
+            right = min(above)
+    return result
+
+
+STRATEGIES = {
+    "bisection": bisection_search,
+    "illinois": illinois_search,
+    "secant": secant_search,
+    "brent": brent_search,
+    "kary": kary_search,
+    "surrogate": surrogate_search,
+}
+
+# Choices offered by the apps, fastest first
+STRATEGY_LABELS = {
+    "Surrogate + verification (fastest)": "surrogate",
+    "Brent": "brent",
+    "Secant": "secant",
+    "Regula falsi (Illinois)": "illinois",
+    "Bisection": "bisection",
+    "Parallel k-ary": "kary",
+}
+STRATEGY_HELP = (
+    "Surrogate starts from a Δt(C) fit of earlier results for these inputs and verifies it with 1-2 simulations; "
+    "Brent, secant and Illinois use the near-linear Δt(C) relationship to need 3-5 simulations; "
+    "parallel k-ary evaluates several capacitances at once and narrows the range k+1 ways per round."
+)
+
+
+def run_search(strategy, evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress=_noop, **options):
+    """Run a registered strategy; ``options`` go to strategies that take them (e.g. kary's ``probes``)."""
+    try:
+        search = STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown search strategy {strategy!r}; expected one of {sorted(STRATEGIES)}.")
+    return search(evaluate, target_dt, c_min, c_max, tol_dt, cap_tol, on_progress, **options)
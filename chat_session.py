@@ -0,0 +1,111 @@
+"""Bounded, prefix-stable prompts for the ABS Helper Chat, streamed token by token.
+
+``ConversationBufferMemory`` re-sends the whole conversation every turn, so
+prompt evaluation grows with the session. ``ChatSession`` keeps the recent
+turns within a token budget (``ABS_CHAT_HISTORY_TOKENS``, default 1024). When
+the budget is exceeded it drops the oldest turns down to half the budget in
+one go.
+
+Prompts are laid out so their beginning changes as rarely as possible:
+system prompt, simulation context, then the turns. llama.cpp keeps the KV
+cache of the previous prompt and only evaluates the tokens after the longest
+common prefix. The context is therefore evaluated once per change (see
+``set_context``), and the history only when turns are dropped. A normal turn
+costs its own new tokens. With the shared inference worker the prefix's state
+is also saved and reused across sessions (prefix_cache.py).
+
+``stream`` yields the reply as it is generated and records ``chat.first_token``
+and ``chat.turn`` spans (instrumentation.py), so time-to-first-token and
+per-turn latency can be watched over long sessions.
+"""
+import itertools
+import os
+import time
+
+from instrumentation import span
+
+HISTORY_TOKENS = int(os.environ.get("ABS_CHAT_HISTORY_TOKENS", "1024"))
+PAST_RESULTS = int(os.environ.get("ABS_CHAT_PAST_RESULTS", "3"))  # see results_store.py
+SYSTEM_PROMPT = (
+    "You are the ABS Helper, an assistant for the ABS super-capacitor calculator.\n"
+    "Use the simulation context below when it is relevant."
+)
+NO_CONTEXT = "No simulation has been run yet."
+STOP = ["\nUser:"]
+
+
+def _approx_tokens(text):
+    # About four characters per token for English text with a Llama tokenizer
+    return max(1, len(text) // 4)
+
+
+class ChatSession:
+    """Conversation state of one user: current context plus the recent turns."""
+
+    def __init__(self, count_tokens=None, history_tokens=HISTORY_TOKENS, system=SYSTEM_PROMPT):
+        self.count_tokens = count_tokens or _approx_tokens
+        self.history_tokens = history_tokens
+        self.system = system
+        self.context = NO_CONTEXT
+        self.context_version = 0
+        self.turns = []  # (user, assistant, tokens)
+        self.dropped = 0
+        self.last = {}
+
+    def set_context(self, text):
+        """Use ``text`` as the simulation context; returns True if it changed."""
+        text = text or NO_CONTEXT
+        if text == self.context:
+            return False
+        self.context = text
+        self.context_version += 1
+        return True
+
+    def history_size(self):
+        return sum(tokens for _, _, tokens in self.turns)
+
+    def add_turn(self, user, assistant):
+        self.turns.append((user, assistant, self.count_tokens(self._format_turn(user, assistant))))
+        if self.history_size() > self.history_tokens:
+            # Drop down to half the budget so the prompt prefix stays stable for several turns
+            while self.turns and self.history_size() > self.history_tokens // 2:
+                self.turns.pop(0)
+                self.dropped += 1
+
+    @staticmethod
+    def _format_turn(user, assistant):
+        return f"User: {user}\nAssistant: {assistant}\n"
+
+    def prefix(self):
+        """Start of every prompt until the context changes: system prompt and simulation context."""
+        return f"{self.system}\n\n{self.context}\n\n"
+
+    def prompt(self, user_input, reference=None):
+        """``reference`` (e.g. past results found for this question) goes right before the
+        question, so it neither breaks the cached prefix nor stays in the history."""
+        history = "".join(self._format_turn(u, a) for u, a, _ in self.turns)
+        note = f"({self.dropped} earlier exchanges omitted)\n" if self.dropped else ""
+        reference = f"{reference}\n" if reference else ""
+        return f"{self.prefix()}{note}{history}{reference}User: {user_input}\nAssistant:"
+
+    def stream(self, llm, user_input, reference=None):
+        """Yield the reply to ``user_input`` chunk by chunk; the turn is stored once complete."""
+        prompt = self.prompt(user_input, reference)
+        chunks = []
+        start = time.perf_counter()
+        with span("chat.turn", history_turns=len(self.turns), context_version=self.context_version) as attrs:
+            # llm.stream is lazy: prompt evaluation happens on the first next()
+            # The inference worker (llm_server.py) caches the evaluated prefix across sessions
+            options = {"prefix": self.prefix()} if getattr(llm, "supports_prefix", False) else {}
+            chunk_iter = iter(llm.stream(prompt, stop=STOP, **options))
+            with span("chat.first_token"):
+                first = next(chunk_iter, None)
+            self.last["first_token"] = time.perf_counter() - start
+            if first is not None:
+                for chunk in itertools.chain([first], chunk_iter):
+                    chunks.append(chunk)
+                    yield chunk
+            reply = "".join(chunks).strip()
+            attrs["reply_chars"] = len(reply)
+        self.last["turn"] = time.perf_counter() - start
+        self.add_turn(user_input, reply)
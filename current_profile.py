@@ -0,0 +1,122 @@
+"""ABS load-current profiles, generated with array operations.
+
+A profile is a sequence of ``(duration, current)`` segments. A periodic profile
+repeats them with period ``sum(durations)``; a non-periodic one plays them once
+and then holds ``tail``. The spike/static pulse used throughout the app is the
+two-segment case, but any duty cycle or number of levels works. The same
+profile feeds the current plot and the native simulation backend.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CurrentProfile:
+    segments: tuple  # ((duration_s, current_A), ...)
+    periodic: bool = True
+    tail: float = 0.0  # current after the segments of a non-periodic profile
+
+    @classmethod
+    def from_pulse(cls, periodic, time_period, spike_time, peak_current, static_current):
+        """The app's spike/static profile; ``periodic`` may be a bool or "Periodic"."""
+        if periodic in (True, "Periodic"):
+            spike_time = min(float(spike_time), float(time_period))
+            segments = ((spike_time, float(peak_current)),
+                        (float(time_period) - spike_time, float(static_current)))
+            return cls(segments, periodic=True)
+        return cls(((float(spike_time), float(peak_current)),), periodic=False, tail=float(static_current))
+
+    @classmethod
+    def from_workspace(cls, workspace):
+        return cls.from_pulse(bool(workspace['myFlag']), workspace['TimePeriod'], workspace['SpikeTime'],
+                              workspace['high_current'], workspace['low_current'])
+
+    @property
+    def period(self):
+        return sum(d for d, _ in self.segments)
+
+    def mean(self):
+        """Long-run average current."""
+        if not self.periodic:
+            return self.tail
+        period = self.period
+        if period <= 0:
+            return self.segments[0][1]
+        return sum(d * i for d, i in self.segments) / period
+
+    def at(self, t):
+        """Current at times ``t`` (scalar or array)."""
+        bounds = np.cumsum([d for d, _ in self.segments])
+        levels = np.array([i for _, i in self.segments], dtype=np.float64)
+        t = np.asarray(t, dtype=np.float64)
+        if self.periodic:
+            period = bounds[-1]
+            phase = np.mod(t, period) if period > 0 else np.zeros_like(t)
+            idx = np.minimum(np.searchsorted(bounds, phase, side='left'), len(levels) - 1)
+            return levels[idx]
+        idx = np.searchsorted(bounds, t, side='left')
+        return np.append(levels, self.tail)[idx]
+
+    def grid(self, n, dt, offset=0.0):
+        """Current at ``(k + offset) * dt`` for ``k = 0 .. n-1``.
+
+        ``offset=0.5`` samples step midpoints, which integrates a piecewise
+        constant profile exactly when its edges lie on the grid. When the period
+        is a whole number of steps only one period is evaluated and then tiled.
+        """
+        if self.periodic:
+            steps = self.period / dt
+            per = int(round(steps))
+            if per > 0 and abs(steps - per) < 1e-9 * steps and per < n:
+                return np.resize(self.at((np.arange(per) + offset) * dt), n)
+        return self.at((np.arange(n) + offset) * dt)
+
+    def sample(self, duration=1.0, sample_rate=10000):
+        """``(t, current)`` on ``np.linspace(0, duration, duration * sample_rate)``; cached, read-only."""
+        return _sample(self, float(duration), float(sample_rate))
+
+    def steps(self, duration=1.0):
+        """Corner points ``(t, current)`` of the profile on ``[0, duration]``.
+
+        Plotted as a line they draw the exact square wave with a few points
+        per segment, where ``sample`` needs thousands.
+        """
+        durations = np.array([d for d, _ in self.segments], dtype=np.float64)
+        levels = np.array([i for _, i in self.segments], dtype=np.float64)
+        offsets = np.concatenate([[0.0], np.cumsum(durations)[:-1]])
+        if self.periodic and self.period > 0:
+            n = int(np.ceil(duration / self.period))
+            starts = (np.arange(n)[:, None] * self.period + offsets[None, :]).ravel()
+            levels = np.tile(levels, n)
+        else:
+            starts = np.append(offsets, durations.sum())
+            levels = np.append(levels, self.tail)
+        keep = starts < duration
+        starts, levels = starts[keep], levels[keep]
+        ends = np.append(starts[1:], duration)
+        return np.column_stack([starts, ends]).ravel(), np.repeat(levels, 2)
+
+    def chunks(self, duration, sample_rate=10000, chunk_size=1_000_000):
+        """Yield ``(t, current)`` chunks of the same grid as ``sample`` for very long horizons."""
+        n = int(duration * sample_rate)
+        step = duration / (n - 1) if n > 1 else 0.0
+        for start in range(0, n, chunk_size):
+            t = np.arange(start, min(start + chunk_size, n), dtype=np.float64) * step
+            yield t, self.at(t)
+
+
+@lru_cache(maxsize=64)
+def _sample(profile, duration, sample_rate):
+    t = np.linspace(0, duration, int(duration * sample_rate))
+    current = profile.at(t)
+    t.flags.writeable = False
+    current.flags.writeable = False
+    return t, current
+
+
+def current_profile(periodic, time_period, spike_time, peak_current, static_current, duration=1.0, sample_rate=10000):
+    """Arrays behind ``plot_current_profile``: ``(t, current)``."""
+    profile = CurrentProfile.from_pulse(periodic, time_period, spike_time, peak_current, static_current)
+    return profile.sample(duration, sample_rate)
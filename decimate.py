@@ -0,0 +1,116 @@
+"""Screen-resolution decimation of long traces for plotting.
+
+A 100 s Vcap trace or a switching-converter run has far more samples than a
+figure has pixels. ``decimate`` cuts a trace down to the visible x-range and
+about ``width_px`` buckets while keeping what the eye would see:
+
+- ``"minmax"`` keeps the lowest and highest sample of every pixel bucket, so
+  switching ripple and spikes keep their full envelope;
+- ``"lttb"`` (largest-triangle-three-buckets) keeps one visually significant
+  sample per bucket, for smooth traces.
+
+Samples on either side of every crossing of ``levels`` (e.g. the 14.4 V / 12 V
+thresholds) are always kept, so threshold events survive any zoom level.
+"""
+import numpy as np
+
+METHODS = ("minmax", "lttb")
+
+
+def crossing_indices(y, levels):
+    """Indices of the samples on both sides of every crossing of each level (and of exact hits)."""
+    y = np.asarray(y)
+    found = []
+    for level in levels:
+        d = y - level
+        # Crossing between i and i+1: signs differ, or either sample sits on the level
+        between = np.flatnonzero((d[:-1] * d[1:]) <= 0)
+        found.append(between)
+        found.append(between + 1)
+    if not found:
+        return np.empty(0, dtype=np.intp)
+    return np.unique(np.concatenate(found))
+
+
+def _buckets(t, n_buckets):
+    # Bucket number of each sample by x position; t is sorted so buckets are contiguous runs
+    span = t[-1] - t[0]
+    if span <= 0:
+        return np.zeros(len(t), dtype=np.intp)
+    return np.minimum(((t - t[0]) / span * n_buckets).astype(np.intp), n_buckets - 1)
+
+
+def _segment_first(mask, seg_id):
+    # First index within each segment where ``mask`` holds
+    idx = np.flatnonzero(mask)
+    _, first = np.unique(seg_id[idx], return_index=True)
+    return idx[first]
+
+
+def minmax_indices(t, y, n_buckets):
+    """Index of the minimum and maximum sample in each of ``n_buckets`` x-buckets."""
+    bucket = _buckets(t, n_buckets)
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    lengths = np.diff(np.append(starts, len(y)))
+    seg_id = np.repeat(np.arange(len(starts)), lengths)
+    mins = np.repeat(np.minimum.reduceat(y, starts), lengths)
+    maxs = np.repeat(np.maximum.reduceat(y, starts), lengths)
+    return np.concatenate([_segment_first(y == mins, seg_id), _segment_first(y == maxs, seg_id)])
+
+
+def lttb_indices(t, y, n_out):
+    """Largest-triangle-three-buckets: ``n_out`` indices including the first and last sample."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Samples 1 .. n-2 are split into n_out - 2 buckets
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.intp) + 1
+    edges[-1] = n - 1
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        lo, hi = edges[k], edges[k + 1]
+        # Average of the next bucket (the last sample for the final bucket)
+        nlo, nhi = (edges[k + 1], edges[k + 2]) if k + 2 < len(edges) else (n - 1, n)
+        avg_t, avg_y = t[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((t[a] - avg_t) * (y[lo:hi] - y[a]) - (t[a] - t[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[k + 1] = a
+    return out
+
+
+def decimate(t, y, x_range=None, width_px=1200, method="minmax", levels=()):
+    """``(t, y)`` reduced to about ``width_px`` buckets over ``x_range``.
+
+    Traces already shorter than twice the bucket count are only cut to the
+    range. One sample beyond each end of ``x_range`` is kept so lines run to
+    the plot edges.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = min(len(t), len(y))
+    t, y = t[:n], y[:n]
+    if x_range is not None and n:
+        lo = max(int(np.searchsorted(t, x_range[0], side='left')) - 1, 0)
+        hi = min(int(np.searchsorted(t, x_range[1], side='right')) + 1, n)
+        t, y = t[lo:hi], y[lo:hi]
+    width_px = max(int(width_px), 2)
+    if len(t) <= 2 * width_px:
+        return t, y
+    if method == "minmax":
+        keep = minmax_indices(t, y, width_px)
+    elif method == "lttb":
+        keep = lttb_indices(t, y, width_px)
+    else:
+        raise ValueError(f"Unknown decimation method {method!r}; expected one of {METHODS}.")
+    keep = np.unique(np.concatenate([keep, crossing_indices(y, levels), [0, len(t) - 1]]))
+    return t[keep], y[keep]
+
+
+def page_bounds(n_rows, page, page_size):
+    """``(start, stop, n_pages)`` of 1-based ``page`` for a table of ``n_rows``."""
+    n_pages = max(1, -(-n_rows // page_size))
+    page = min(max(int(page), 1), n_pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows), n_pages
@@ -0,0 +1,363 @@
+"""Pool of warm MATLAB engines shared by all Streamlit sessions.
+
+Each simulation checks an engine out of the pool, runs with its own
+parameters, and hands the engine back, so concurrent sessions never share a
+MATLAB engine. Engines are health-checked on checkout and recycled after a
+configurable number of simulations.
+
+The pool can be backed by ``StubEngine`` (no MATLAB required) for load tests:
+
+    python engine_pool.py --stub --size 4 --requests 40 --concurrency 8
+"""
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentation import span
+from matlab_paths import MATLAB_PATHS
+from model_session import ModelSessions
+from parameter_set import ParameterSet
+
+
+def start_matlab_engine(paths=None):
+    import matlab.engine
+    eng = matlab.engine.start_matlab()
+    # addpath puts each folder first, so add in reverse to keep the list's precedence
+    for path in reversed(MATLAB_PATHS if paths is None else paths):
+        eng.addpath(path, nargout=0)
+    return eng
+
+
+class StubEngine:
+    """Pure-Python stand-in for ``matlab.engine.MatlabEngine``.
+
+    Implements the handful of engine calls the app makes (``workspace``,
+    ``addpath``, ``eval``, ``load_system``, ``set_param``, ``sim``,
+    ``SimSignals``, ``LogTimes``, ``LogTimesBatch``, ``quit``) on top of native_backend.py, and can sleep to emulate MATLAB latency.
+    ``compile_delay`` is paid by every run except fast-restart reruns.
+    """
+
+    def __init__(self, sim_delay=0.0, startup_delay=0.0, compile_delay=0.0):
+        time.sleep(startup_delay)
+        self.workspace = {}
+        self.sim_delay = sim_delay
+        self.compile_delay = compile_delay
+        self.paths = []
+        self.loaded = set()
+        self.fast_restart = set()
+        self.compiled = set()
+        self.closed = False
+
+    def _check(self):
+        if self.closed:
+            raise RuntimeError("MATLAB engine has been shut down")
+
+    def addpath(self, path, nargout=0):
+        self._check()
+        self.paths.append(path)
+
+    def eval(self, expr, nargout=0):
+        self._check()
+
+    def load_system(self, model_name, nargout=0):
+        self._check()
+        self.loaded.add(model_name)
+
+    def set_param(self, model_name, name, value, nargout=0):
+        self._check()
+        if name == 'FastRestart':
+            if value == 'on':
+                self.fast_restart.add(model_name)
+            else:
+                self.fast_restart.discard(model_name)
+                self.compiled.discard(model_name)
+
+    def _compile(self, model_name):
+        name = os.path.splitext(os.path.basename(model_name))[0]
+        if name not in self.compiled:
+            time.sleep(self.compile_delay)
+            if name in self.fast_restart:
+                self.compiled.add(name)
+
+    def sim(self, model_name, nargout=1):
+        self._check()
+        self._compile(model_name)
+        time.sleep(self.sim_delay)
+        n = 1001
+        tsim = float(self.workspace.get('Tsim', 1.0))
+        self.workspace['tout'] = [[tsim * i / (n - 1)] for i in range(n)]
+        return {}
+
+    def SimSignals(self, model_name, params, signal_names, stop_time, period=None, tol=1e-3, nargout=2):
+        # Settling waveforms with ripple at the model's main frequency, one per requested name
+        import numpy as np
+        from signal_metrics import cycle_change
+        self._check()
+        self._compile(model_name)
+        time.sleep(self.sim_delay)
+        t = np.linspace(0.0, float(stop_time), 20001)
+        f = next((params[k] for k in ('f', 'fout', 'fsw') if k in params), 50.0)
+        level = next((params[k] for k in ('Vin', 'Vdc') if k in params), 1.0)
+        tau = min(float(stop_time), 0.1) / 10
+        values = []
+        for k, _ in enumerate(signal_names):
+            amplitude = level / (k + 1)
+            values.append(amplitude * (1 - np.exp(-t / tau))
+                          + 0.02 * amplitude * np.sin(2 * np.pi * f * t + k)
+                          + 0.005 * amplitude * np.sin(6 * np.pi * f * t))
+        if period:
+            # Same chunk schedule and test as SimSignals.m
+            chunk, t_end = 20 * period, 0.0
+            while t_end < stop_time:
+                t_end, chunk = min(t_end + chunk, stop_time), 2 * chunk
+                window = (t >= t_end - 4 * period) & (t <= t_end)
+                if t_end >= 4 * period and all((cycle_change(t[window], y[window], period) < tol).all()
+                                               for y in values):
+                    break
+            keep = t <= t_end
+            t, values = t[keep], [y[keep] for y in values]
+        return t.reshape(-1, 1), [y.reshape(-1, 1) for y in values]
+
+    def LogTimes(self, C_val, model_name, stop_at_events, params, nargout=4):
+        import native_backend
+        self._check()
+        self._compile(model_name)
+        time.sleep(self.sim_delay)
+        t_rise, deltaT, t, Vcap = native_backend.log_times(C_val, model_name, params,
+                                                           events=bool(stop_at_events))
+        return (t_rise, deltaT, t.reshape(-1, 1), Vcap.reshape(-1, 1))[:nargout]
+
+    def LogTimesBatch(self, model_name, C_vals, low_current, high_current, TimePeriod, SpikeTime,
+                      CurrentSource, periodic, nargout=2):
+        import native_backend
+        self._check()
+        t_rise, deltaT = [], []
+        for k, C_val in enumerate(C_vals):
+            time.sleep(self.sim_delay)
+            ws = {'myFlag': periodic[k], 'low_current': low_current[k], 'high_current': high_current[k],
+                  'TimePeriod': TimePeriod[k], 'SpikeTime': SpikeTime[k], 'CurrentSource': CurrentSource[k]}
+            try:
+                tr, dt, _, _ = native_backend.log_times(C_val, model_name, ws)
+            except RuntimeError:
+                tr = dt = float('nan')
+            t_rise.append([tr])
+            deltaT.append([dt])
+        return t_rise, deltaT
+
+    def quit(self):
+        self.closed = True
+
+
+class _PooledEngine:
+    def __init__(self, eng):
+        self.eng = eng
+        self.uses = 0
+        self.sessions = ModelSessions(eng)
+
+
+class EnginePool:
+    """Fixed-size pool of engines with checkout/return semantics.
+
+    ``factory`` starts one engine; ``max_uses`` is the number of simulations
+    after which an engine is shut down and replaced.
+    """
+
+    def __init__(self, size=1, factory=start_matlab_engine, max_uses=50, checkout_timeout=None):
+        if size < 1:
+            raise ValueError("Engine pool size must be at least 1.")
+        self.size = size
+        self.factory = factory
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {"checkouts": 0, "recycled": 0, "failed_health": 0, "wait_time": 0.0}
+
+    def _spawn(self):
+        try:
+            return _PooledEngine(self.factory())
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _reserve_slot(self):
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return True
+            return False
+
+    def prewarm(self, count=None, block=True):
+        """Start up to ``count`` engines (default: fill the pool) in parallel."""
+        count = self.size if count is None else count
+
+        def _start():
+            self._idle.put(self._spawn())
+
+        threads = []
+        for _ in range(count):
+            if not self._reserve_slot():
+                break
+            th = threading.Thread(target=_start, daemon=True)
+            th.start()
+            threads.append(th)
+        if block:
+            for th in threads:
+                th.join()
+        return len(threads)
+
+    def _healthy(self, pooled):
+        try:
+            pooled.eng.eval("1;", nargout=0)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        try:
+            pooled.eng.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def checkout(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.perf_counter()
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve_slot():
+                    pooled = self._spawn()
+                else:
+                    try:
+                        pooled = self._idle.get(timeout=timeout)
+                    except queue.Empty:
+                        raise TimeoutError(f"No MATLAB engine became free within {timeout} s.")
+            if self._healthy(pooled):
+                break
+            with self._lock:
+                self._stats["failed_health"] += 1
+            self._discard(pooled)
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += time.perf_counter() - start
+        return pooled
+
+    def release(self, pooled):
+        pooled.uses += 1
+        if self.max_uses and pooled.uses >= self.max_uses:
+            with self._lock:
+                self._stats["recycled"] += 1
+            self._discard(pooled)
+            self.prewarm(1, block=False)  # keep the pool warm
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def engine(self, timeout=None):
+        """Check out an engine for the duration of a ``with`` block."""
+        with span("engine.checkout"):
+            pooled = self.checkout(timeout)
+        try:
+            yield pooled.eng
+        finally:
+            self.release(pooled)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Like ``engine`` but yields the engine's ``ModelSessions`` (its engine is ``.eng``)."""
+        with span("engine.checkout"):
+            pooled = self.checkout(timeout)
+        try:
+            yield pooled.sessions
+        finally:
+            self.release(pooled)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(size=self.size, created=self._created, idle=self._idle.qsize())
+        stats["in_use"] = stats["created"] - stats["idle"]
+        return stats
+
+    def close(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+
+def pool_from_env():
+    """Build a pool from ``ABS_ENGINE_*`` environment variables.
+
+    ``ABS_ENGINE_POOL_SIZE`` (default 1), ``ABS_ENGINE_MAX_USES`` (default 50),
+    ``ABS_ENGINE_PREWARM`` (default 1) and ``ABS_ENGINE_BACKEND`` (``matlab``
+    or ``stub``).
+    """
+    size = int(os.environ.get("ABS_ENGINE_POOL_SIZE", "1"))
+    max_uses = int(os.environ.get("ABS_ENGINE_MAX_USES", "50"))
+    prewarm = os.environ.get("ABS_ENGINE_PREWARM", "1") != "0"
+    if os.environ.get("ABS_ENGINE_BACKEND", "matlab") == "stub":
+        factory = StubEngine
+    else:
+        factory = start_matlab_engine
+    pool = EnginePool(size=size, factory=factory, max_uses=max_uses)
+    if prewarm:
+        pool.prewarm(block=False)
+    return pool
+
+
+def main():
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser(description="Load-test the MATLAB engine pool.")
+    parser.add_argument("--size", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-uses", type=int, default=50)
+    parser.add_argument("--stub", action="store_true", help="Use StubEngine instead of MATLAB.")
+    parser.add_argument("--sim-delay", type=float, default=0.2, help="StubEngine seconds per simulation.")
+    args = parser.parse_args()
+
+    if args.stub:
+        factory = lambda: StubEngine(sim_delay=args.sim_delay)
+    else:
+        factory = start_matlab_engine
+    pool = EnginePool(size=args.size, factory=factory, max_uses=args.max_uses)
+    t0 = time.perf_counter()
+    pool.prewarm()
+    print(f"Pre-warmed {args.size} engine(s) in {time.perf_counter() - t0:.2f} s")
+
+    workspace = {
+        'myFlag': True, 'low_current': 10.0, 'high_current': 25.0,
+        'TimePeriod': 0.1, 'SpikeTime': 0.02, 'CurrentSource': 4.0, 'OnTime': 20.0,
+    }
+
+    params = ParameterSet(workspace).to_matlab()
+
+    def one_run(i):
+        with pool.session() as sessions:
+            return sessions.run('Week_5_day_4_original', workspace,
+                                lambda: sessions.eng.LogTimes(1.0 + i, 'Week_5_day_4_original', False, params,
+                                                              nargout=4))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+        list(ex.map(one_run, range(args.requests)))
+    elapsed = time.perf_counter() - t0
+    print(f"{args.requests} simulations in {elapsed:.2f} s ({args.requests / elapsed:.1f} sim/s)")
+    print(pool.stats())
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Figures and PDF reports of the super-capacitor calculator, without Streamlit.
+
+Main_app.py renders these with ``st.pyplot``/``st.download_button``; keeping
+them here lets run_benchmarks.py time them headless.
+"""
+from lazy_imports import lazy_import
+# Imported on first use so the app's first page does not pay for them
+plt = lazy_import("matplotlib.pyplot")
+
+import reports
+from current_profile import current_profile
+from decimate import decimate
+from native_backend import V_HIGH, V_LOW
+
+
+def generate_pdf_report(mode, inputs, results, date="July 17, 2025", **plots):
+    """PDF of the inputs, results and plots (see reports.design_report); returns a BytesIO positioned at 0."""
+    return reports.design_report(mode, inputs, results, date=date, **plots)
+
+
+def plot_current_profile(periodic, time_period, spike_time, peak_current, static_current, duration=1.0, sample_rate=10000):
+    t, current = current_profile(periodic, time_period, spike_time, peak_current, static_current,
+                                 duration=duration, sample_rate=sample_rate)
+
+    fig, ax = plt.subplots(figsize=(10, 4))  # Wider for dashboard
+    ax.plot(t, current, linewidth=2, color='#4682B4')
+    ax.set_title("Current Profile (A)", fontsize=14, pad=10)
+    ax.set_xlabel("Time (s)", fontsize=12)
+    ax.set_ylabel("Current (A)", fontsize=12)
+    ax.set_xlim(0, duration)
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.set_facecolor('#f8f9fa')
+    fig.tight_layout()
+    return fig
+
+
+def plot_voltage_time(t_data, v_data, x_lim=(0, 100), figsize=(10, 4), title_size=16, label_size=14, tick_size=12):
+    fig, ax = plt.subplots(figsize=figsize)
+    # Only about one min/max pair per pixel column is drawn; threshold crossings are always kept
+    t_data, v_data = decimate(t_data, v_data, x_range=x_lim, width_px=figsize[0] * fig.dpi, levels=(V_HIGH, V_LOW))
+    ax.plot(t_data, v_data, linewidth=2, color='#4682B4')
+    ax.set_title("Capacitor Voltage vs. Time", fontsize=title_size, pad=10)
+    ax.set_xlabel("Time (s)", fontsize=label_size)
+    ax.set_ylabel("Vcap (V)", fontsize=label_size)
+    ax.set_xlim(x_lim)
+    ax.tick_params(labelsize=tick_size)
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.set_facecolor('#f8f9fa')
+    fig.tight_layout()
+    return fig
+
+
+def plot_model_signals(spec, t, signals, x_lim=None):
+    """One panel per declared signal of a ``model_registry.ModelSpec``, sharing the time axis."""
+    fig, axes = plt.subplots(len(spec.signals), 1, figsize=(10, 2.2 * len(spec.signals) + 0.6),
+                             sharex=True, squeeze=False)
+    for ax, signal in zip(axes[:, 0], spec.signals):
+        y = signals.get(signal.name)
+        if y is None:
+            ax.text(0.5, 0.5, f"{signal.name} is not logged by this model", ha='center', va='center',
+                    transform=ax.transAxes)
+        else:
+            td, yd = decimate(t, y, x_range=x_lim, width_px=10 * fig.dpi)
+            ax.plot(td, yd, linewidth=1.5, color='#FF6B6B')
+        ax.set_ylabel(f"{signal.name} ({signal.unit})" if signal.unit else signal.name)
+        ax.set_title(signal.label, fontsize=11, loc='left')
+        ax.grid(True, alpha=0.3)
+    if x_lim is not None:
+        axes[-1, 0].set_xlim(x_lim)
+    axes[-1, 0].set_xlabel("Time (s)")
+    fig.suptitle(f"Simulation Output for {spec.title}", fontsize=16)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,159 @@
+"""Timing spans for each phase of a simulation (checkout, load, sim, transfer, plots).
+
+    with activate(trace_id):            # group the spans of one user action
+        with span("engine.checkout"):
+            ...
+
+Spans nest per thread and record their parent, so one trace shows e.g. a
+``compute_times`` job split into ``cache.get``, ``engine.checkout``,
+``matlab.load_system``, ``matlab.LogTimes``, ``transfer`` and the plot rendering
+that followed. Recent spans are kept in memory (``spans``); per-name totals and
+histograms are exported as Prometheus text (``prometheus_text``).
+
+``ABS_TRACE_FILE`` appends every span as a JSON line, and ``ABS_METRICS_FILE``
+is rewritten in Prometheus text format after every top-level span. To convert
+a trace file:
+
+    python instrumentation.py trace.jsonl --prometheus metrics.prom
+"""
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, math.inf)
+TRACE_FILE = os.environ.get("ABS_TRACE_FILE")
+METRICS_FILE = os.environ.get("ABS_METRICS_FILE")
+
+_spans = deque(maxlen=int(os.environ.get("ABS_TRACE_HISTORY", "5000")))
+_totals = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:12]
+
+
+def current_trace():
+    return getattr(_local, "trace_id", None)
+
+
+@contextmanager
+def activate(trace_id):
+    """Attribute spans opened in this thread to ``trace_id`` (e.g. on a worker thread)."""
+    previous = current_trace()
+    _local.trace_id = trace_id
+    try:
+        yield trace_id
+    finally:
+        _local.trace_id = previous
+
+
+def _add_totals(name, seconds):
+    entry = _totals.setdefault(name, {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)})
+    entry["count"] += 1
+    entry["sum"] += seconds
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            entry["buckets"][i] += 1
+
+
+def _store(entry):
+    with _lock:
+        _spans.append(entry)
+        _add_totals(entry["name"], entry["seconds"])
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry, default=str) + "\n")
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the ``with`` block; ``attrs`` (and keys added to the yielded dict) are stored with it."""
+    stack = _local.__dict__.setdefault("stack", [])
+    span_id = uuid.uuid4().hex[:8]
+    parent = stack[-1] if stack else None
+    stack.append(span_id)
+    wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        _store({"trace": current_trace(), "id": span_id, "parent": parent, "name": name,
+                "start": wall, "seconds": seconds, "attrs": attrs})
+        if METRICS_FILE and not stack:
+            write_prometheus(METRICS_FILE)
+
+
+def spans(trace_id=None):
+    """Recorded spans in completion order, optionally only those of one trace."""
+    with _lock:
+        return [dict(s) for s in _spans if trace_id is None or s["trace"] == trace_id]
+
+
+def totals():
+    """``{name: {count, sum, buckets}}`` over every span since start-up."""
+    with _lock:
+        return {name: {"count": e["count"], "sum": e["sum"], "buckets": list(e["buckets"])}
+                for name, e in _totals.items()}
+
+
+def to_jsonl(records):
+    return "".join(json.dumps(r, default=str) + "\n" for r in records)
+
+
+def prometheus_text(span_totals=None):
+    """Per-phase duration histograms in the Prometheus text exposition format."""
+    span_totals = totals() if span_totals is None else span_totals
+    lines = [
+        "# HELP abs_phase_seconds Duration of each simulation phase.",
+        "# TYPE abs_phase_seconds histogram",
+    ]
+    for name in sorted(span_totals):
+        entry = span_totals[name]
+        for bound, count in zip(BUCKETS, entry["buckets"]):
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(f'abs_phase_seconds_bucket{{phase="{name}",le="{le}"}} {count}')
+        lines.append(f'abs_phase_seconds_sum{{phase="{name}"}} {entry["sum"]:.6f}')
+        lines.append(f'abs_phase_seconds_count{{phase="{name}"}} {entry["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    text = prometheus_text()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarise a JSON-lines span file.")
+    parser.add_argument("trace_file")
+    parser.add_argument("--prometheus", help="Also write Prometheus text to this file")
+    args = parser.parse_args()
+    with open(args.trace_file, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                entry = json.loads(line)
+                _add_totals(entry["name"], entry["seconds"])
+    print(f"{'phase':<28} {'count':>7} {'total (s)':>10} {'mean (ms)':>10}")
+    for name, entry in sorted(_totals.items(), key=lambda kv: kv[1]["sum"], reverse=True):
+        print(f"{name:<28} {entry['count']:>7} {entry['sum']:>10.3f} {1000 * entry['sum'] / entry['count']:>10.2f}")
+    if args.prometheus:
+        write_prometheus(args.prometheus)
+
+
+if __name__ == "__main__":
+    main()
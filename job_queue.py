@@ -0,0 +1,164 @@
+"""Background job queue for simulations, so long runs don't block the UI.
+
+    queue = queue_from_env()
+    job_id = queue.submit(simulate, C_val, label="Compute times", params={...})
+    queue.get(job_id).status      # queued / running / done / failed / cancelled
+
+A job function receives a ``progress(message=None, partial=None)`` keyword
+argument; ``message`` replaces the job's status line and ``partial`` is
+appended to ``Job.partial`` so callers can show results as they arrive.
+
+The queue is process-wide (the app keeps one in ``st.cache_resource``), so jobs
+keep running across Streamlit reruns and browser refreshes and are visible from
+every session. Workers are threads: the app's job functions are defined in
+the Streamlit script and share the in-process MATLAB engine pool and caches,
+so they could not run in worker processes.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    id: str
+    label: str
+    params: dict = field(default_factory=dict)  # caller's inputs, kept to redisplay the result
+    status: str = "queued"
+    message: str = ""
+    partial: list = field(default_factory=list)
+    result: object = None
+    error: str = None
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, history=100):
+        self.max_workers = max_workers
+        self.history = history
+        self._jobs = {}
+        self._futures = {}
+        self._finished = {}  # job id -> Event set once the job's status is final
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="abs-job")
+
+    def submit(self, fn, *args, label=None, params=None, **kwargs):
+        """Queue ``fn(*args, progress=..., **kwargs)``; returns the job id."""
+        job = Job(id=uuid.uuid4().hex[:12], label=label or getattr(fn, "__name__", "job"), params=params or {})
+        with self._lock:
+            self._jobs[job.id] = job
+            self._finished[job.id] = threading.Event()
+            self._prune()
+        future = self._executor.submit(self._run_in_thread, job, fn, args, kwargs)
+        future.add_done_callback(lambda f, job=job: self._finish(job, f))
+        with self._lock:
+            if not job.done:  # a quick job may already have finished
+                self._futures[job.id] = future
+        return job.id
+
+    def _run_in_thread(self, job, fn, args, kwargs):
+        self._mark_running(job)
+
+        def progress(message=None, partial=None):
+            self._update(job.id, message, partial)
+        return fn(*args, progress=progress, **kwargs)
+
+    def _mark_running(self, job):
+        with self._lock:
+            if job.status == "queued":
+                job.status = "running"
+                job.started = time.time()
+
+    def _update(self, job_id, message, partial):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if message is not None:
+                job.message = message
+            if partial is not None:
+                job.partial.append(partial)
+
+    def _finish(self, job, future):
+        with self._lock:
+            job.finished = time.time()
+            if job.started is None:
+                job.started = job.finished
+            if future.cancelled():
+                job.status = "cancelled"
+            elif future.exception() is not None:
+                job.status = "failed"
+                job.error = str(future.exception())
+            else:
+                job.status = "done"
+                job.result = future.result()
+            self._futures.pop(job.id, None)
+            finished = self._finished.pop(job.id, None)
+        if finished is not None:
+            finished.set()
+
+    def _prune(self):
+        # Keep every unfinished job and the most recent ``history`` finished ones
+        finished = [j for j in self._jobs.values() if j.done]
+        for job in sorted(finished, key=lambda j: j.finished)[:max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All known jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.submitted, reverse=True)
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet; returns True if it was cancelled."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        return future is not None and future.cancel()
+
+    def wait(self, job_id, timeout=None):
+        # The future completes before its done callback records the outcome, so wait for that
+        with self._lock:
+            finished = self._finished.get(job_id)
+        if finished is not None:
+            finished.wait(timeout)
+        return self.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = {s: 0 for s in STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts["workers"] = self.max_workers
+        return counts
+
+    def close(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def queue_from_env():
+    """Job queue configured from ABS_JOB_WORKERS and ABS_JOB_HISTORY."""
+    return JobQueue(
+        max_workers=int(os.environ.get("ABS_JOB_WORKERS", "2")),
+        history=int(os.environ.get("ABS_JOB_HISTORY", "100")),
+    )
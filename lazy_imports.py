@@ -0,0 +1,123 @@
+"""On-demand imports of heavy dependencies, with a record of what each one cost.
+
+``lazy_import("reportlab.pdfgen.canvas")`` returns a stand-in module that
+performs the real import on first attribute access, so e.g. reportlab is only
+paid for when the first report is downloaded. ``timed_import`` imports eagerly
+but still records the cost. Both feed ``import_report()``, which the app shows
+as its startup profile. A module the host process had already imported (under
+``streamlit run``, streamlit and numpy always are) costs nothing here and is
+recorded as ``"preloaded"``; ``measure_cold_imports`` gives its real cost.
+
+Cold-import cost of each dependency, measured in fresh interpreters:
+
+    python lazy_imports.py streamlit numpy matplotlib.pyplot pandas reportlab.pdfgen.canvas
+"""
+import importlib
+import sys
+import threading
+import time
+import types
+
+_PROCESS_START = time.perf_counter()
+_records = []
+_lock = threading.Lock()
+
+
+def _preloaded(name):
+    with _lock:
+        if not any(r["module"] == name for r in _records):
+            _records.append({"module": name, "seconds": 0.0, "mode": "preloaded", "at": 0.0})
+    return sys.modules[name]
+
+
+def _import(name, mode):
+    if name in sys.modules:
+        return _preloaded(name)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    end = time.perf_counter()
+    with _lock:
+        _records.append({
+            "module": name,
+            "seconds": end - start,
+            "mode": mode,
+            "at": start - _PROCESS_START,  # seconds after lazy_imports was first imported
+        })
+    return module
+
+
+def timed_import(name):
+    """Import ``name`` now, recording the cost if it was not loaded yet."""
+    return _import(name, "eager")
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            module = _import(self.__name__, "lazy")
+            self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Module proxy for ``name`` that imports it on first use."""
+    if name in sys.modules:
+        return _preloaded(name)
+    return LazyModule(name)
+
+
+def import_report():
+    """Recorded imports, most expensive first."""
+    with _lock:
+        return sorted(_records, key=lambda r: r["seconds"], reverse=True)
+
+
+def measure_cold_imports(names):
+    """Import each module in a fresh interpreter; returns ``{name: (seconds, peak RSS MB)}``."""
+    import json
+    import subprocess
+    code = (
+        "import time, json, resource, importlib, sys\n"
+        "t = time.perf_counter(); importlib.import_module(sys.argv[1]); t = time.perf_counter() - t\n"
+        "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024\n"
+        "print(json.dumps([t, rss]))\n"
+    )
+    results = {}
+    for name in names:
+        proc = subprocess.run([sys.executable, "-c", code, name], capture_output=True, text=True)
+        if proc.returncode != 0:
+            results[name] = None
+            continue
+        results[name] = tuple(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Measure cold-import cost of the app's dependencies.")
+    parser.add_argument("modules", nargs="*", default=[
+        "streamlit", "numpy", "matplotlib.pyplot", "pandas", "reportlab.pdfgen.canvas",
+        "matlab.engine", "langchain.llms",
+    ])
+    args = parser.parse_args()
+    print(f"{'module':<28} {'import (s)':>10} {'peak RSS (MB)':>14}")
+    for name, result in measure_cold_imports(args.modules).items():
+        if result is None:
+            print(f"{name:<28} {'not installed':>10}")
+        else:
+            print(f"{name:<28} {result[0]:>10.3f} {result[1]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
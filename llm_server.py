@@ -0,0 +1,376 @@
+"""Local inference worker that owns the chat model for every Streamlit replica.
+
+Loading TinyLlama with ``@st.cache_resource`` puts a copy of the weights in
+every Streamlit process, and concurrent chats queue behind its single
+llama.cpp context. This worker loads the model once and serves it over HTTP:
+
+    python llm_server.py --port 8765            # or --stub, no model needed
+    ABS_LLM_URL=http://127.0.0.1:8765 streamlit run Chatbot/chatbot_app.py
+
+The worker runs ``ABS_LLM_SLOTS`` contexts (default 2) that share one
+memory-mapped copy of the weights, each with ``ABS_LLM_THREADS`` threads
+(default: the CPU count divided between the slots). Requests wait in one
+queue of up to ``ABS_LLM_QUEUE`` entries (default 64; a full queue answers
+503). A request starts on the first slot that frees up, without waiting for
+a batch to fill, so a long reply does not hold back the other sessions.
+
+Endpoints:
+- ``POST /generate`` with ``{"prompt", "stop", "max_tokens", "temperature",
+  "prefix"}`` streams JSON lines ``{"text": ...}`` and ends with
+  ``{"done": true, ...}``. ``prefix`` is the static start of the prompt; its
+  evaluated state is kept in a shared prefix_cache.PrefixCache.
+- ``POST /tokenize`` with ``{"text"}`` returns ``{"tokens": n}``.
+- ``GET /health`` returns the model, slot usage, queue length and counters.
+
+``LLMClient`` is the chatbot's side: it has the ``stream``/``get_num_tokens``
+interface of LangChain's ``LlamaCpp`` that chat_session.py uses. ``StubLLM``
+stands in for the model in tests and load tests:
+
+    python llm_server.py --stub --load-test 32 --concurrency 8
+"""
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import span
+from prefix_cache import CAPACITY_MB, PrefixCache, prefix_key
+
+MODEL_PATH = os.environ.get("ABS_LLM_MODEL", "TinyLlama-1.1B-Chat-v1.0.GGUF")
+SLOTS = int(os.environ.get("ABS_LLM_SLOTS", "2"))
+THREADS = int(os.environ.get("ABS_LLM_THREADS", "0")) or max(1, (os.cpu_count() or 1) // SLOTS)
+CONTEXT = int(os.environ.get("ABS_LLM_CTX", "2048"))
+QUEUE_SIZE = int(os.environ.get("ABS_LLM_QUEUE", "64"))
+
+
+class LlamaBackend:
+    """One llama.cpp context; contexts in one process share the mmapped weights.
+
+    With a ``cache``, the state after ``prefix`` is saved once and restored
+    before later prompts with the same prefix; llama.cpp then evaluates only
+    the tokens after it.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, n_ctx=CONTEXT, threads=THREADS, cache=None):
+        from llama_cpp import Llama
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=threads, verbose=False)
+        self.cache = cache
+        self.prefix = None  # key of the prefix this context's KV cache starts with
+
+    def _load_prefix(self, prefix):
+        key = prefix_key(prefix)
+        if key == self.prefix:
+            return  # llama.cpp already skips the common prefix of consecutive prompts
+        state = self.cache.get(key)
+        if state is not None:
+            self.llm.load_state(state)
+        else:
+            tokens = self.llm.tokenize(prefix.encode("utf-8"))
+            with span("llm.prefix_eval", tokens=len(tokens)):
+                self.llm.reset()
+                self.llm.eval(tokens)
+            state = self.llm.save_state()
+            self.cache.put(key, state, state.llama_state_size)
+        self.prefix = key
+
+    def stream(self, prompt, stop=None, max_tokens=256, temperature=0.7, prefix=None):
+        if prefix and self.cache is not None and prompt.startswith(prefix):
+            self._load_prefix(prefix)
+        else:
+            self.prefix = None
+        for part in self.llm(prompt, max_tokens=max_tokens, temperature=temperature, stop=stop or [], stream=True):
+            yield part["choices"][0]["text"]
+
+    def count_tokens(self, text):
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False))
+
+
+class StubLLM:
+    """Stand-in model: echoes the last user line word by word.
+
+    Sleeps ``prompt_delay`` per evaluated prompt token (words not covered by a
+    cached prefix) and ``token_delay`` per generated one.
+    """
+
+    def __init__(self, token_delay=0.0, prompt_delay=0.0, cache=None):
+        self.token_delay = token_delay
+        self.prompt_delay = prompt_delay
+        self.cache = cache
+
+    def stream(self, prompt, stop=None, max_tokens=256, temperature=0.7, prefix=None):
+        evaluated = self.count_tokens(prompt)
+        if prefix and self.cache is not None and prompt.startswith(prefix):
+            key = prefix_key(prefix)
+            if self.cache.get(key) is None:
+                self.cache.put(key, True, len(prefix))
+            else:
+                evaluated -= self.count_tokens(prefix)
+        time.sleep(self.prompt_delay * evaluated)
+        question = next((line[len("User:"):].strip() for line in reversed(prompt.splitlines())
+                         if line.startswith("User:")), "")
+        words = f"Stub reply to: {question}".split()
+        for i, word in enumerate(words[:max_tokens]):
+            time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+
+class _Request:
+    def __init__(self, prompt, options):
+        self.prompt = prompt
+        self.options = options
+        self.out = queue.Queue()
+        self.queued = time.perf_counter()
+        self.started = None
+
+
+_DONE = object()
+
+
+class InferenceWorker:
+    """Request queue served by ``slots`` backends, each on its own thread."""
+
+    def __init__(self, factory=LlamaBackend, slots=SLOTS, queue_size=QUEUE_SIZE, name=MODEL_PATH, cache=None):
+        self.name = name
+        self.cache = cache  # shared by the backends, reported by health()
+        self.backends = [factory() for _ in range(slots)]
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = {"served": 0, "failed": 0, "rejected": 0, "busy": 0, "tokens": 0}
+        self.started = time.time()
+        self._threads = [threading.Thread(target=self._serve, args=(b,), daemon=True, name=f"llm-slot-{i}")
+                         for i, b in enumerate(self.backends)]
+        for thread in self._threads:
+            thread.start()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _serve(self, backend):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            request.started = time.perf_counter()
+            self._count("busy")
+            try:
+                with span("llm.generate", queue_seconds=request.started - request.queued) as attrs:
+                    n = 0
+                    for chunk in backend.stream(request.prompt, **request.options):
+                        n += 1
+                        request.out.put(chunk)
+                    attrs["chunks"] = n
+                self._count("tokens", n)
+                self._count("served")
+                request.out.put(_DONE)
+            except Exception as e:
+                self._count("failed")
+                request.out.put(e)
+            finally:
+                self._count("busy", -1)
+
+    def submit(self, prompt, stop=None, max_tokens=256, temperature=0.7, prefix=None):
+        """Queue a completion; raises ``queue.Full`` when the backlog is full.
+
+        ``prefix`` is the static start of ``prompt`` whose state may be cached.
+        """
+        request = _Request(prompt, {"stop": stop, "max_tokens": max_tokens, "temperature": temperature,
+                                    "prefix": prefix})
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self._count("rejected")
+            raise
+        return request
+
+    def stream(self, prompt, **options):
+        """Yield the completion of ``prompt`` as it is generated."""
+        request = self.submit(prompt, **options)
+        while True:
+            item = request.out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def count_tokens(self, text):
+        # Tokenizing only reads the vocabulary, so it does not need a free slot
+        return self.backends[0].count_tokens(text)
+
+    def health(self):
+        with self._lock:
+            stats = dict(self._stats)
+        health = {"status": "ok", "model": self.name, "slots": len(self.backends),
+                  "queued": self._queue.qsize(), "uptime": time.time() - self.started, **stats}
+        if self.cache is not None:
+            health["prefix_cache"] = self.cache.stats()
+        return health
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+
+
+def make_server(worker, host="127.0.0.1", port=8765):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._json(200, worker.health())
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            try:
+                body = self._body()
+            except ValueError:
+                return self._json(400, {"error": "invalid JSON"})
+            if self.path == "/tokenize":
+                return self._json(200, {"tokens": worker.count_tokens(body.get("text", ""))})
+            if self.path != "/generate":
+                return self._json(404, {"error": "not found"})
+            options = {k: body[k] for k in ("stop", "max_tokens", "temperature", "prefix") if k in body}
+            try:
+                request = worker.submit(body.get("prompt", ""), **options)
+            except queue.Full:
+                return self._json(503, {"error": "queue full"})
+            # One JSON object per line, flushed as tokens arrive; the connection closes at the end
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            while True:
+                item = request.out.get()
+                if item is _DONE:
+                    line = {"done": True, "queue_seconds": request.started - request.queued}
+                elif isinstance(item, Exception):
+                    line = {"error": f"{type(item).__name__}: {item}"}
+                else:
+                    line = {"text": item}
+                self.wfile.write((json.dumps(line) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                if "text" not in line:
+                    return
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class LLMClient:
+    """Talks to a running worker; usable wherever chat_session.py expects a LangChain LlamaCpp."""
+
+    supports_prefix = True  # chat_session.py passes the static start of its prompts
+
+    def __init__(self, url=None, max_tokens=256, temperature=0.7, timeout=300.0):
+        self.url = (url or os.environ.get("ABS_LLM_URL", "http://127.0.0.1:8765")).rstrip("/")
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout = timeout
+
+    def _post(self, path, body):
+        request = urllib.request.Request(self.url + path, data=json.dumps(body).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def stream(self, prompt, stop=None, prefix=None):
+        body = {"prompt": prompt, "stop": stop, "max_tokens": self.max_tokens, "temperature": self.temperature,
+                "prefix": prefix}
+        with self._post("/generate", body) as response:
+            for line in response:
+                item = json.loads(line)
+                if "error" in item:
+                    raise RuntimeError(f"LLM worker: {item['error']}")
+                if item.get("done"):
+                    return
+                yield item["text"]
+
+    def get_num_tokens(self, text):
+        with self._post("/tokenize", {"text": text}) as response:
+            return json.load(response)["tokens"]
+
+    def health(self):
+        with urllib.request.urlopen(self.url + "/health", timeout=self.timeout) as response:
+            return json.load(response)
+
+
+def main():
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+    from chat_session import SYSTEM_PROMPT
+
+    parser = argparse.ArgumentParser(description="Serve the chat model to every Streamlit replica.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--slots", type=int, default=SLOTS)
+    parser.add_argument("--threads", type=int, default=THREADS, help="llama.cpp threads per slot.")
+    parser.add_argument("--stub", action="store_true", help="Use StubLLM instead of the model.")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="StubLLM seconds per generated token.")
+    parser.add_argument("--prompt-delay", type=float, default=0.002, help="StubLLM seconds per prompt token.")
+    parser.add_argument("--no-prefix-cache", action="store_true", help="Evaluate every prompt in full.")
+    parser.add_argument("--load-test", type=int, default=0, metavar="N",
+                        help="Send N chat requests through HTTP, report throughput and exit.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    cache = None if args.no_prefix_cache or not CAPACITY_MB else PrefixCache()
+    if args.stub:
+        factory = lambda: StubLLM(token_delay=args.token_delay, prompt_delay=args.prompt_delay, cache=cache)
+    else:
+        factory = lambda: LlamaBackend(args.model, threads=args.threads, cache=cache)
+    worker = InferenceWorker(factory, slots=args.slots, name="stub" if args.stub else args.model, cache=cache)
+    server = make_server(worker, args.host, args.port)
+    if not args.load_test:
+        print(f"Serving {worker.name} on http://{args.host}:{args.port} with {args.slots} slot(s)")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = LLMClient(f"http://{args.host}:{server.server_address[1]}")
+
+    def one_chat(i):
+        start = time.perf_counter()
+        # Chat-like prompts: a few distinct simulation contexts, each shared by several sessions
+        context = "\n".join(["— Simulation Context —"] + [f"Input {k}: {(i % 4) * k:.4f}" for k in range(40)])
+        prefix = f"{SYSTEM_PROMPT}\n\n{context}\n\n"
+        chunks = client.stream(f"{prefix}User: question {i} about the ABS on time?\nAssistant:",
+                               stop=["\nUser:"], prefix=prefix)
+        next(chunks)
+        first = time.perf_counter() - start
+        for _ in chunks:
+            pass
+        return first
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as ex:
+        first_tokens = sorted(ex.map(one_chat, range(args.load_test)))
+    elapsed = time.perf_counter() - start
+    print(f"{args.load_test} chats in {elapsed:.2f} s ({args.load_test / elapsed:.1f} chats/s), "
+          f"median first token {first_tokens[len(first_tokens) // 2]:.3f} s")
+    print(client.health())
+    server.shutdown()
+    worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Where the app's MATLAB scripts and Simulink models live.
+
+The repository folder holds the .m files shipped with the app (LogTimes.m,
+LogTimesBatch.m, ...) and always comes first on an engine's MATLAB path, so
+they shadow older copies. ``ABS_MATLAB_PATHS`` (separated by ``os.pathsep``)
+adds folders with other scripts and models after it. Models are also looked
+up in ``ABS_MODEL_DIRS``, for folders Python can see but MATLAB does not need.
+"""
+import functools
+import os
+import re
+import zipfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MATLAB_PATHS = [REPO_DIR] + [d for d in os.environ.get("ABS_MATLAB_PATHS", "").split(os.pathsep) if d]
+
+
+def model_search_dirs():
+    extra = os.environ.get("ABS_MODEL_DIRS", "")
+    return [d for d in extra.split(os.pathsep) if d] + MATLAB_PATHS
+
+
+def find_model_file(model_name):
+    """Path of the model's .slx file in the model search folders, or None."""
+    filename = model_name if model_name.endswith(".slx") else f"{model_name}.slx"
+    for directory in model_search_dirs():
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=64)
+def _model_names(path, mtime):
+    try:
+        with zipfile.ZipFile(path) as slx:
+            if "simulink/blockdiagram.xml" not in slx.namelist():
+                return None
+            xml = "".join(slx.read(name).decode("utf-8", "replace") for name in slx.namelist()
+                          if name.startswith("simulink/") and name.endswith(".xml"))
+    except zipfile.BadZipFile:
+        return None
+    # To Workspace variables and named signal lines
+    names = set(re.findall(r'<P Name="VariableName">([^<]+)</P>', xml))
+    for line in re.findall(r"<Line>(.*?)</Line>", xml, re.S):
+        names.update(re.findall(r'<P Name="Name">([^<]+)</P>', line))
+    return frozenset(names)
+
+
+def logged_names(path):
+    """Names a .slx model can log signals under, or None if it is not a Simulink model.
+
+    A .slx is a zip with the block diagram in ``simulink/blockdiagram.xml``;
+    Simulink cache archives (.slxc) saved under a .slx name have none.
+    """
+    return _model_names(path, os.path.getmtime(path))
@@ -0,0 +1,247 @@
+"""What each power-electronics Simulink model takes, logs and reports.
+
+Every ``ModelSpec`` declares a model's tunable parameters (rendered as
+sliders), the logged signals to bring back from MATLAB, and the metrics
+computed from them (signal_metrics.py). ``simulate`` runs one model with the
+parameters scoped to that run (SimSignals.m). It transfers only the declared
+signals rather than everything in the workspace.
+
+Parameter names must match the workspace variables the model's blocks use.
+Signal names must match the model's To Workspace variables or logged signal
+names. A declared signal that the model does not log comes back empty, and
+the metrics that need it are NaN. ``model_status`` says why a model cannot
+run: its .slx is not in the model search folders (matlab_paths.py), is not a
+Simulink model, or logs none of the declared signals.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import simulation
+from instrumentation import span
+from matlab_paths import find_model_file, logged_names
+from signal_metrics import overshoot_percent, rms, ripple_percent, settling_time, steady_state_time, thd, time_mean
+
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    label: str
+    min: float
+    max: float
+    default: float
+    unit: str = ""
+    scale: float = 1.0  # slider value × scale = workspace value (e.g. µF → F)
+    help: str = ""
+
+
+@dataclass(frozen=True)
+class Signal:
+    name: str
+    label: str
+    unit: str = ""
+
+
+@dataclass(frozen=True)
+class Metric:
+    label: str
+    unit: str
+    compute: Callable  # (t, signals, params) -> float
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    title: str
+    file: str
+    tab: str
+    description: str
+    params: tuple
+    signals: tuple
+    metrics: tuple = ()
+    stop_time: str = "Tsim"  # parameter that sets the StopTime
+    nontunable: tuple = ()  # parameters whose change needs a recompile (see model_session.py)
+    period: Optional[Callable] = None  # (params) -> switching/line period in s, for steady-state detection
+
+    def workspace(self, values):
+        """Workspace values in SI units from slider values (defaults for missing ones)."""
+        return {p.name: float(values.get(p.name, p.default)) * p.scale for p in self.params}
+
+
+@dataclass
+class ModelRun:
+    title: str
+    t: object
+    signals: dict
+    metrics: dict = field(default_factory=dict)
+
+
+def _switching_period(params):
+    return 1.0 / params["fsw"]
+
+
+def _tsim(lo, hi, default):
+    return Param("Tsim", "Simulation Time", lo, hi, default, "s")
+
+
+MODELS = {spec.title: spec for spec in (
+    ModelSpec(
+        "3-Phase Diode Rectifier", "3-Phase Diode Rectifier.slx", "3-Phase Diode Rectifier",
+        "Six-pulse diode bridge feeding a resistive load from a three-phase source.",
+        params=(
+            Param("Vin", "Input Voltage (line-line RMS)", 0.0, 500.0, 220.0, "V"),
+            Param("f", "Frequency", 10.0, 1000.0, 50.0, "Hz"),
+            Param("Rload", "Load Resistance", 1.0, 1000.0, 10.0, "Ohm"),
+            _tsim(0.1, 10.0, 1.0),
+        ),
+        signals=(
+            Signal("Vdc", "DC output voltage", "V"),
+            Signal("Idc", "DC output current", "A"),
+            Signal("Ia", "Phase A current", "A"),
+        ),
+        metrics=(
+            Metric("Mean DC voltage", "V", lambda t, s, p: time_mean(t, s["Vdc"], 0.2)),
+            Metric("DC ripple", "%", lambda t, s, p: ripple_percent(t, s["Vdc"])),
+            Metric("Input current THD", "%", lambda t, s, p: thd(t, s["Ia"], p["f"])),
+            Metric("Settling time", "s", lambda t, s, p: settling_time(t, s["Vdc"])),
+        ),
+        period=lambda p: 1.0 / p["f"],
+    ),
+    ModelSpec(
+        "IGBTs with RC Snubbers", "IGBTs with RC snubbers for switching.slx", "IGBTs with RC Snubbers",
+        "Hard-switched IGBT leg with RC snubbers limiting the turn-off voltage overshoot.",
+        params=(
+            Param("Vdc", "DC Link Voltage", 10.0, 1000.0, 400.0, "V"),
+            Param("fsw", "Switching Frequency", 0.1, 50.0, 5.0, "kHz", scale=1e3),
+            Param("Rs", "Snubber Resistance", 1.0, 1000.0, 50.0, "Ohm"),
+            Param("Cs", "Snubber Capacitance", 0.01, 10.0, 0.1, "µF", scale=1e-6),
+            Param("Rload", "Load Resistance", 1.0, 1000.0, 10.0, "Ohm"),
+            _tsim(0.001, 1.0, 0.02),
+        ),
+        signals=(
+            Signal("Vce", "Collector-emitter voltage", "V"),
+            Signal("Ic", "Collector current", "A"),
+        ),
+        metrics=(
+            Metric("Peak Vce", "V", lambda t, s, p: float(s["Vce"].max())),
+            Metric("Vce overshoot", "%", lambda t, s, p: 100.0 * (s["Vce"].max() - p["Vdc"]) / p["Vdc"]),
+            Metric("Mean switch loss", "W", lambda t, s, p: time_mean(t, s["Vce"] * s["Ic"])),
+        ),
+        nontunable=("fsw",),
+        period=_switching_period,
+    ),
+    ModelSpec(
+        "Permanent Magnet Synchronous Machine", "Permanent Magnet Synchronous Machine Model.slx", "PMSM Model",
+        "Speed-controlled PMSM drive starting up against a constant load torque.",
+        params=(
+            Param("Vdc", "DC Link Voltage", 10.0, 1000.0, 300.0, "V"),
+            Param("speed_ref", "Speed Reference", 0.0, 6000.0, 1500.0, "rpm"),
+            Param("TL", "Load Torque", 0.0, 50.0, 5.0, "N·m"),
+            _tsim(0.1, 10.0, 1.0),
+        ),
+        signals=(
+            Signal("speed", "Rotor speed", "rpm"),
+            Signal("torque", "Electromagnetic torque", "N·m"),
+            Signal("Ia", "Phase A current", "A"),
+        ),
+        metrics=(
+            Metric("Speed settling time", "s", lambda t, s, p: settling_time(t, s["speed"])),
+            Metric("Speed overshoot", "%", lambda t, s, p: overshoot_percent(t, s["speed"])),
+            Metric("Torque ripple", "%", lambda t, s, p: ripple_percent(t, s["torque"])),
+            Metric("Phase current THD", "%", lambda t, s, p: thd(t, s["Ia"])),
+        ),
+    ),
+    ModelSpec(
+        "RLC Output Filter (Sine Wave)", "RLC output filter to obtain sine wave.slx", "RLC Sine Wave Filter",
+        "PWM inverter whose output is smoothed into a sine wave by an LC filter.",
+        params=(
+            Param("Vdc", "DC Link Voltage", 10.0, 1000.0, 400.0, "V"),
+            Param("fsw", "Switching Frequency", 1.0, 50.0, 10.0, "kHz", scale=1e3),
+            Param("fout", "Output Frequency", 10.0, 400.0, 50.0, "Hz"),
+            Param("L", "Filter Inductance", 0.1, 50.0, 5.0, "mH", scale=1e-3),
+            Param("C", "Filter Capacitance", 1.0, 500.0, 50.0, "µF", scale=1e-6),
+            Param("Rload", "Load Resistance", 1.0, 1000.0, 10.0, "Ohm"),
+            _tsim(0.02, 2.0, 0.2),
+        ),
+        signals=(
+            Signal("Vinv", "Inverter voltage", "V"),
+            Signal("Vout", "Filtered output voltage", "V"),
+            Signal("Iout", "Output current", "A"),
+        ),
+        metrics=(
+            Metric("Output THD", "%", lambda t, s, p: thd(t, s["Vout"], p["fout"])),
+            Metric("Inverter THD", "%", lambda t, s, p: thd(t, s["Vinv"], p["fout"])),
+            Metric("Output RMS", "V", lambda t, s, p: rms(t, s["Vout"], 0.5)),
+        ),
+        nontunable=("fsw",),
+        period=lambda p: 1.0 / p["fout"],
+    ),
+)}
+
+
+def model_status(spec):
+    """Why ``spec`` cannot run here, or None if its model file logs its signals."""
+    path = find_model_file(spec.file)
+    if path is None:
+        return (f"Model file not found: {spec.file}. Place it in the repository folder, "
+                "a folder in ABS_MODEL_DIRS or one in ABS_MATLAB_PATHS.")
+    names = logged_names(path)
+    if names is None:
+        return f"{spec.file} is not a Simulink model (it has no block diagram)."
+    if not any(s.name in names for s in spec.signals):
+        return (f"{spec.file} logs none of this model's signals ({', '.join(s.name for s in spec.signals)}); "
+                f"it logs {', '.join(sorted(names)) or 'nothing'}.")
+    return None
+
+
+def available(spec):
+    return model_status(spec) is None
+
+
+def models_in_tab(tab):
+    return [spec for spec in MODELS.values() if spec.tab == tab]
+
+
+TABS = list(dict.fromkeys(spec.tab for spec in MODELS.values()))
+
+
+STEADY_STATE = "Steady state reached"
+
+
+def compute_metrics(spec, t, signals, params, steady_tol=None):
+    """``{label: value}``; metrics whose signals are missing or too short are NaN.
+
+    Models with a ``period`` also get ``STEADY_STATE``: the time from which
+    every signal repeats cycle to cycle within ``steady_tol`` (NaN if never).
+    """
+    values = {}
+    for metric in spec.metrics:
+        try:
+            values[metric.label] = float(metric.compute(t, signals, params))
+        except (KeyError, ValueError, ZeroDivisionError):
+            values[metric.label] = math.nan
+    if spec.period is not None and signals:
+        # Reported even for runs that went to Tsim
+        tol = steady_tol or simulation.STEADY_TOL or 1e-3
+        try:
+            times = [steady_state_time(t, y, spec.period(params), tol) for y in signals.values()]
+            values[STEADY_STATE] = math.nan if any(math.isnan(x) for x in times) else max(times)
+        except (KeyError, ValueError, ZeroDivisionError):
+            values[STEADY_STATE] = math.nan
+    return values
+
+
+def simulate(spec, params, pool, steady_tol=None):
+    """Run ``spec`` with workspace ``params`` (SI units) and return a ``ModelRun``.
+
+    With ``steady_tol`` a model with a ``period`` stops at steady state rather
+    than running to its ``Tsim``.
+    """
+    period = spec.period(params) if steady_tol and spec.period is not None else None
+    t, signals = simulation.simulink_signals(
+        spec.file, params, [s.name for s in spec.signals], params[spec.stop_time], pool,
+        nontunable=spec.nontunable, period=period, steady_tol=steady_tol,
+    )
+    signals = {name: y for name, y in signals.items() if len(y)}
+    with span("metrics", model=spec.title):
+        metrics = compute_metrics(spec, t, signals, params, steady_tol)
+    return ModelRun(spec.title, t, signals, metrics)
@@ -0,0 +1,171 @@
+"""Keep Simulink models loaded and compiled on each engine between runs.
+
+Without fast restart every ``sim`` call compiles the model again, even when
+only the capacitance or a current changed. ``ModelSessions`` belongs to one
+engine. It loads each model once, turns on ``FastRestart``, and then only
+forces a recompile when a non-tunable workspace variable changes value.
+
+    sessions = ModelSessions(eng)
+    sessions.run("Week_5_day_4_original", workspace,
+                 lambda: eng.LogTimes(C_val, "Week_5_day_4_original", False, params, nargout=4))
+
+Tunable values (capacitance, currents) are picked up by the compiled model
+at the start of the next run. The variables listed in
+``ABS_NONTUNABLE_PARAMS`` (default: the pulse timing and profile flag) size
+blocks or sample times, so a change to any of them turns fast restart off and
+on again, which recompiles on the next run. If a reused model still fails to
+run, it is recompiled and the run is retried once, which covers non-tunable
+variables missing from the list. ``ABS_FAST_RESTART=0`` turns all of this off
+and loads the model on every run, as before.
+
+Sessions never write the base workspace: callers pass the values with the run
+itself (LogTimes' ``params`` struct, SimSignals' ``params``; see
+parameter_set.py).
+
+Loads, recompiles and reuses are counted in ``session_stats()``. To see the effect
+on a C sweep with the stand-in engine:
+
+    python model_session.py --compile-delay 0.5 --runs 20
+"""
+import os
+import threading
+
+from instrumentation import span
+from parameter_set import ParameterSet
+
+FAST_RESTART = os.environ.get("ABS_FAST_RESTART", "1") != "0"
+NONTUNABLE = frozenset(
+    name.strip()
+    for name in os.environ.get("ABS_NONTUNABLE_PARAMS", "myFlag,TimePeriod,SpikeTime,OnTime").split(",")
+    if name.strip()
+)
+
+_stats = {"loads": 0, "compiles": 0, "reuses": 0, "retries": 0}
+_lock = threading.Lock()
+
+
+def _count(name, n=1):
+    with _lock:
+        _stats[name] += n
+
+
+def session_stats():
+    """Totals over every engine: model loads, compiles, fast-restart reuses and retried runs."""
+    with _lock:
+        return dict(_stats)
+
+
+def system_name(model):
+    # load_system accepts a file name; set_param needs the block diagram name
+    return os.path.splitext(os.path.basename(model))[0]
+
+
+class _Model:
+    def __init__(self):
+        self.compiled = False
+        self.nontunable = {}
+
+
+class ModelSessions:
+    """Loaded models of one engine and the non-tunable values they were compiled with."""
+
+    def __init__(self, eng, nontunable=NONTUNABLE, fast_restart=FAST_RESTART):
+        self.eng = eng
+        self.nontunable = frozenset(nontunable)
+        self.fast_restart = fast_restart
+        self._models = {}
+
+    def _set_fast_restart(self, name, on):
+        self.eng.set_param(name, 'FastRestart', 'on' if on else 'off', nargout=0)
+
+    def _load(self, model):
+        with span("matlab.load_system", model=model):
+            self.eng.load_system(model, nargout=0)
+        _count("loads")
+        state = self._models[model] = _Model()
+        if self.fast_restart:
+            self._set_fast_restart(system_name(model), True)
+        return state
+
+    def prepare(self, model, workspace, nontunable=()):
+        """Load ``model`` if needed and check ``workspace`` for non-tunable changes.
+
+        Returns True when the next run compiles. ``nontunable`` adds
+        model-specific names to the engine-wide list.
+        """
+        params = ParameterSet(workspace)
+        if not self.fast_restart:
+            self._load(model)
+            return True
+        state = self._models.get(model) or self._load(model)
+        names = (self.nontunable | set(nontunable)) & set(params)
+        changed = ParameterSet({k: params[k] for k in names}).diff(state.nontunable)
+        if state.compiled and changed:
+            # Leaving fast restart releases the compiled model; the next run compiles again
+            name = system_name(model)
+            self._set_fast_restart(name, False)
+            self._set_fast_restart(name, True)
+            state.compiled = False
+        state.nontunable.update(changed)
+        return not state.compiled
+
+    def run(self, model, workspace, call, nontunable=()):
+        """``call()`` after ``prepare``; recompiles and retries once if a reused model fails."""
+        compiles = self.prepare(model, workspace, nontunable)
+        try:
+            result = call()
+        except Exception:
+            if compiles or not self.fast_restart:
+                self.invalidate(model)
+                raise
+            _count("retries")
+            self.invalidate(model)
+            self.prepare(model, workspace, nontunable)
+            result = call()
+            compiles = True
+        _count("compiles" if compiles else "reuses")
+        if self.fast_restart:
+            self._models[model].compiled = True
+        return result
+
+    def invalidate(self, model=None):
+        """Forget ``model`` (or every model), e.g. after its .slx file changed on disk."""
+        for name in ([model] if model is not None else list(self._models)):
+            if self._models.pop(name, None) is not None and self.fast_restart:
+                try:
+                    self._set_fast_restart(system_name(name), False)
+                except Exception:
+                    pass
+
+    def models(self):
+        return {name: {"compiled": s.compiled, "nontunable": dict(s.nontunable)} for name, s in self._models.items()}
+
+
+def main():
+    import argparse
+    import time
+    from engine_pool import StubEngine
+
+    parser = argparse.ArgumentParser(description="Time a C sweep with and without fast restart on StubEngine.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--compile-delay", type=float, default=0.5, help="StubEngine seconds per model compile.")
+    parser.add_argument("--sim-delay", type=float, default=0.05, help="StubEngine seconds per simulation.")
+    args = parser.parse_args()
+
+    model = "Week_5_day_4_original"
+    workspace = {'myFlag': True, 'low_current': 10.0, 'high_current': 25.0,
+                 'TimePeriod': 0.1, 'SpikeTime': 0.02, 'CurrentSource': 4.0, 'OnTime': 20.0}
+    params = ParameterSet(workspace).to_matlab()
+    for fast_restart in (False, True):
+        eng = StubEngine(sim_delay=args.sim_delay, compile_delay=args.compile_delay)
+        sessions = ModelSessions(eng, fast_restart=fast_restart)
+        start = time.perf_counter()
+        for i in range(args.runs):
+            sessions.run(model, workspace, lambda c=1.0 + i: eng.LogTimes(c, model, False, params, nargout=4))
+        elapsed = time.perf_counter() - start
+        print(f"fast restart {'on ' if fast_restart else 'off'}: {args.runs} runs in {elapsed:.2f} s")
+    print(session_stats())
+
+
+if __name__ == "__main__":
+    main()
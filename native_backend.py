@@ -0,0 +1,222 @@
+"""Pure NumPy super-capacitor simulation, a drop-in for ``eng.LogTimes``.
+
+The Simulink charging models boil down to an ideal capacitor that is charged
+by ``CurrentSource`` while ABS is off, and discharged by the pulsed
+``high_current``/``low_current`` load (minus ``CurrentSource``) while ABS is
+on; the load is current_profile.CurrentProfile, timed from ABS activation. The capacitor cycles between the 12 V and 14.4 V thresholds, and the
+threshold logic below mirrors LogTimes.m exactly.
+
+The 14 V (Week_5_day_4_original) and 48 V (Week_6_day_4_original) charging
+models are treated the same: both start from an empty capacitor and switch at
+the same thresholds, so ``model_name`` is accepted for symmetry with
+``eng.LogTimes`` but does not change the result.
+
+With ``events=True`` the run stops at the first 12 V crossing and both
+crossing times are interpolated between samples, like ``LogTimes(C, model, true, params)``.
+
+Validate against the recorded Simulink sweep with:
+
+    python native_backend.py sweep_log.txt
+"""
+import re
+import numpy as np
+
+from current_profile import CurrentProfile
+
+V_HIGH = 14.4
+V_LOW = 12.0
+THRESH_EPS = 1e-6
+V_INIT = 0.0  # every model starts from an empty capacitor
+
+# run_sweep.py / sweep_log.txt operating point
+SWEEP_LOG_WORKSPACE = {
+    'myFlag': True, 'low_current': 10.0, 'high_current': 25.0,
+    'TimePeriod': 0.1, 'SpikeTime': 0.02, 'CurrentSource': 4.0, 'OnTime': 20.0,
+}
+
+
+def simulate(C_val, workspace, model_name=None, t_stop=250.0, dt=1e-3, max_time=1e4, stop_at_events=False,
+             steady_tol=None):
+    """Simulate the capacitor voltage on a uniform ``dt`` grid.
+
+    Runs until ``t_stop``, or longer (up to ``max_time``) if the first 12 V
+    crossing has not been reached yet. With ``stop_at_events`` the run ends at
+    that first 12 V crossing instead. With ``steady_tol`` it stops simulating
+    once the charge/discharge cycle (12 V crossing to 12 V crossing) repeats
+    the one before within ``steady_tol`` (``cycles_settled``), and repeats that
+    cycle out to ``t_stop``, so the trace still covers the whole horizon.
+    Returns ``(t, Vcap)``.
+    """
+    if C_val <= 0:
+        raise ValueError("Capacitance must be positive.")
+    source = float(workspace['CurrentSource'])
+    load = CurrentProfile.from_workspace(workspace)
+
+    t_parts, v_parts = [np.zeros(1)], [np.array([V_INIT])]
+    t_now, v_now = 0.0, V_INIT
+    charging = v_now < V_HIGH
+    # Size discharge chunks from the mean net current so most phases take one chunk
+    net = load.mean() - source
+    expected = (V_HIGH - V_LOW) * C_val / net if net > 0 else 10.0
+    chunk = int(np.ceil((1.25 * expected + load.period) / dt))
+    fell = False
+    falls = []  # sample counts at each 12 V crossing, for the steady-state test
+    settled = None
+    n_samples = 1
+
+    while (t_now < t_stop and not stop_at_events) or not fell:
+        if t_now >= max_time:
+            break
+        if charging:
+            if source <= 0:
+                break
+            n = int(np.ceil((V_HIGH - v_now) * C_val / source / dt))
+            n = max(1, min(n, int(np.ceil((max_time - t_now) / dt))))
+            k = np.arange(1, n + 1)
+            t_seg = t_now + k * dt
+            v_seg = np.minimum(v_now + source / C_val * k * dt, V_HIGH)
+            charging = v_seg[-1] < V_HIGH - THRESH_EPS
+        else:
+            k = np.arange(1, chunk + 1)
+            dv = (source - load.grid(chunk, dt, offset=0.5)) / C_val * dt
+            v_seg = v_now + np.cumsum(dv)
+            t_seg = t_now + k * dt
+            below = np.flatnonzero(v_seg <= V_LOW + THRESH_EPS)
+            if below.size:
+                t_seg, v_seg = t_seg[:below[0] + 1], v_seg[:below[0] + 1]
+                charging = True
+                fell = True
+            elif v_seg[-1] >= v_seg[0] - THRESH_EPS:
+                # Source covers the load; the capacitor never discharges
+                t_parts.append(t_seg)
+                v_parts.append(v_seg)
+                break
+        t_parts.append(t_seg)
+        v_parts.append(v_seg)
+        t_now, v_now = float(t_seg[-1]), float(v_seg[-1])
+        n_samples += len(t_seg)
+        if steady_tol and charging and v_now <= V_LOW + THRESH_EPS:
+            falls.append(n_samples)
+            if len(falls) >= 3:
+                t_all, v_all = np.concatenate(t_parts), np.concatenate(v_parts)
+                t_parts, v_parts = [t_all], [v_all]
+                if cycles_settled(t_all, v_all, falls[-3:], steady_tol):
+                    settled = falls[-2:]
+                    break
+
+    t, Vcap = np.concatenate(t_parts), np.concatenate(v_parts)
+    if settled is not None and t[-1] < t_stop:
+        t, Vcap = repeat_cycle(t, Vcap, settled, t_stop)
+    return t, Vcap
+
+
+def repeat_cycle(t, Vcap, bounds, t_stop):
+    """Extend a trace ending at 12 V crossing ``bounds[1]`` by copies of the cycle ``bounds[0]..bounds[1]``."""
+    b, c = bounds
+    cycle_t = t[b:c] - t[b - 1]
+    period = cycle_t[-1]
+    reps = int(np.ceil((t_stop - t[-1]) / period))
+    ext_t = (t[c - 1] + period * np.arange(reps)[:, None] + cycle_t[None, :]).ravel()
+    ext_v = np.tile(Vcap[b:c], reps)
+    keep = ext_t <= t_stop
+    return np.concatenate([t, ext_t[keep]]), np.concatenate([Vcap, ext_v[keep]])
+
+
+def cycles_settled(t, Vcap, bounds, tol, points=200):
+    """True when the cycle ``bounds[1]..bounds[2]`` matches ``bounds[0]..bounds[1]`` within ``tol``.
+
+    ``bounds`` are sample counts at three successive 12 V crossings. Both the
+    cycle length and the waveform (on a common phase grid, relative to the
+    V_HIGH - V_LOW swing) must agree.
+    """
+    a, b, c = bounds
+    first, second = t[b - 1] - t[a - 1], t[c - 1] - t[b - 1]
+    if abs(second - first) > tol * second:
+        return False
+    phase = np.linspace(0.0, 1.0, points)
+    v1 = np.interp(t[a - 1] + phase * first, t[a - 1:b], Vcap[a - 1:b])
+    v2 = np.interp(t[b - 1] + phase * second, t[b - 1:c], Vcap[b - 1:c])
+    return float(np.abs(v2 - v1).max()) < tol * (V_HIGH - V_LOW)
+
+
+def crossing_time(t, Vcap, idx, level):
+    """Time at which the segment ending at sample ``idx`` reaches ``level`` (linear interpolation)."""
+    if idx == 0 or Vcap[idx] == Vcap[idx - 1]:
+        return float(t[idx])
+    frac = (level - Vcap[idx - 1]) / (Vcap[idx] - Vcap[idx - 1])
+    return float(t[idx - 1] + min(max(frac, 0.0), 1.0) * (t[idx] - t[idx - 1]))
+
+
+def threshold_times(t, Vcap, C_val=None, interpolate=False):
+    """``t_rise``/``deltaT`` from a Vcap trace using the LogTimes.m rules.
+
+    ``interpolate=True`` places both crossings between samples instead of on
+    the first sample past each threshold.
+    """
+    rise = np.flatnonzero(Vcap >= V_HIGH - THRESH_EPS)
+    if rise.size:
+        fall = np.flatnonzero((Vcap <= V_LOW + THRESH_EPS) & (t > t[rise[0]]))
+    if not rise.size or not fall.size:
+        raise RuntimeError(f"For C_val = {C_val:.2f} F, voltage never crossed thresholds.")
+    if interpolate:
+        t_rise = crossing_time(t, Vcap, rise[0], V_HIGH)
+        return t_rise, crossing_time(t, Vcap, fall[0], V_LOW) - t_rise
+    t_rise = float(t[rise[0]])
+    return t_rise, float(t[fall[0]]) - t_rise
+
+
+def log_times(C_val, model_name, workspace, t_stop=250.0, dt=1e-3, events=False, steady_tol=None):
+    """Native equivalent of ``eng.LogTimes(C_val, model_name, events, params, nargout=4)``."""
+    t, Vcap = simulate(C_val, workspace, model_name=model_name, t_stop=t_stop, dt=dt, stop_at_events=events,
+                       steady_tol=steady_tol)
+    t_rise, deltaT = threshold_times(t, Vcap, C_val, interpolate=events)
+    return t_rise, deltaT, t, Vcap
+
+
+def read_sweep_log(path):
+    """Parse ``Trying C = 1.00 → Δt = 0.2501`` lines into ``[(C, dt), ...]``."""
+    pattern = re.compile(r"C\s*=\s*([0-9.]+).*?=\s*([0-9.]+)")
+    points = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            m = pattern.search(line)
+            if m:
+                points.append((float(m.group(1)), float(m.group(2))))
+    return points
+
+
+def validate_against_sweep_log(path, model_name="Week_5_day_4_original", workspace=None, events=False):
+    """Compare native Δt with recorded Simulink Δt; returns rows of (C, simulink, native, error)."""
+    workspace = SWEEP_LOG_WORKSPACE if workspace is None else workspace
+    rows = []
+    for C_val, dt_ref in read_sweep_log(path):
+        _, dt_native, _, _ = log_times(C_val, model_name, workspace, events=events)
+        rows.append((C_val, dt_ref, dt_native, dt_native - dt_ref))
+    return rows
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Check the native backend against a recorded Simulink sweep.")
+    parser.add_argument("sweep_log", nargs="?", default="sweep_log.txt")
+    parser.add_argument("--model", default="Week_5_day_4_original")
+    parser.add_argument("--tol", type=float, default=0.06,
+                        help="Allowed |Δt error| in seconds (Simulink logs Vcap every ~0.05 s).")
+    parser.add_argument("--events", action="store_true", help="Stop each run at the 12 V crossing (interpolated).")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    rows = validate_against_sweep_log(args.sweep_log, args.model, events=args.events)
+    elapsed = time.perf_counter() - t0
+    print(f"{'C (F)':>8} {'Simulink Δt':>12} {'Native Δt':>10} {'Error':>8}")
+    for C_val, dt_ref, dt_native, err in rows:
+        print(f"{C_val:8.2f} {dt_ref:12.4f} {dt_native:10.4f} {err:+8.4f}")
+    worst = max(abs(r[3]) for r in rows)
+    print(f"\n{len(rows)} points in {elapsed:.3f} s, max |error| = {worst:.4f} s")
+    raise SystemExit(0 if worst <= args.tol else 1)
+
+
+if __name__ == "__main__":
+    main()
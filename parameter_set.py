@@ -0,0 +1,58 @@
+"""Simulation parameters as one value, sent to MATLAB in a single call.
+
+Setting ``eng.workspace[name]`` is one IPC round-trip per variable. A
+``ParameterSet`` holds all the parameters of one simulation; ``to_matlab()``
+is passed as one struct argument (the fourth argument of LogTimes.m, the
+second of SimSignals.m). MATLAB applies it with
+``Simulink.SimulationInput.setVariable``, so the run's values are scoped to
+that simulation and the base workspace is never touched. ``diff`` tells
+model_session.py which non-tunable values changed since the last compile.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def _plain(value):
+    # The engine converts Python scalars (and dicts to structs), not NumPy scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _same(a, b):
+    if type(a) is not type(b) and not (isinstance(a, (int, float)) and isinstance(b, (int, float))):
+        return False
+    try:
+        return bool(a == b)
+    except Exception:  # e.g. arrays with ambiguous truth values
+        return repr(a) == repr(b)
+
+
+class ParameterSet(Mapping):
+    """Read-only ``{name: value}`` of workspace variables for one simulation."""
+
+    def __init__(self, values=(), **more):
+        self._values = {str(k): _plain(v) for k, v in dict(values, **more).items()}
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"ParameterSet({self._values!r})"
+
+    def diff(self, held):
+        """The entries whose value differs from (or is missing in) ``held``."""
+        return ParameterSet({k: v for k, v in self._values.items() if k not in held or not _same(held[k], v)})
+
+    def to_matlab(self):
+        """Plain dict, converted to a MATLAB struct when passed to an engine call."""
+        return dict(self._values)
@@ -0,0 +1,59 @@
+"""Saved llama.cpp states of prompt prefixes, keyed by a hash of the prefix text.
+
+Every chat prompt starts with the system prompt and the simulation context
+(chat_session.py), and evaluating them is most of the prompt time of a short
+turn. The inference worker (llm_server.py) evaluates a prefix once, saves the
+resulting KV state here and restores it into whichever context serves the
+next request with the same prefix. Then only the conversation and the new
+user turn are evaluated.
+
+States are evicted least recently used first once they would exceed
+``ABS_LLM_PREFIX_CACHE_MB`` (default 512; ``0`` disables the cache).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+CAPACITY_MB = float(os.environ.get("ABS_LLM_PREFIX_CACHE_MB", "512"))
+
+
+def prefix_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class PrefixCache:
+    """LRU map of prefix key to saved state, bounded by total state size in bytes."""
+
+    def __init__(self, capacity_bytes=int(CAPACITY_MB * 2 ** 20)):
+        self.capacity_bytes = capacity_bytes
+        self._states = OrderedDict()  # key -> (state, nbytes)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._states.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._states.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, state, nbytes):
+        if nbytes > self.capacity_bytes:
+            return
+        with self._lock:
+            self._states.pop(key, None)
+            while self._states and self.size() + nbytes > self.capacity_bytes:
+                self._states.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._states[key] = (state, nbytes)
+
+    def size(self):
+        return sum(nbytes for _, nbytes in self._states.values())
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "states": len(self._states), "bytes": self.size()}
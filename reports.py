@@ -0,0 +1,329 @@
+"""Paginated PDF reports with vector plots, for one run or a whole design study.
+
+Reports are laid out with reportlab's platypus. The page furniture (title
+band, rules, footer) is drawn once per document as a PDF form and referenced
+from every page. Input and result lists are tables that continue on the next
+page with their header repeated. Vcap and current-profile plots are vector
+drawings of the decimated traces (decimate.py), built without matplotlib, so
+a page costs a few milliseconds:
+
+    design_report(mode, inputs, results, t=t, vcap=Vcap, profile=(...), profile_duration=deltaT)
+    batch_report(results_df, "study.pdf", traces=cached_trace)
+
+``batch_report`` writes a summary table and an on-time-versus-capacitance
+plot, then one page per design point. It is what ``run_batch.py --report``
+uses.
+"""
+import io
+import math
+import os
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from lazy_imports import lazy_import
+# Binary page streams: ASCII85 text encoding makes them bigger and is slow without
+# reportlab's C accelerator. rl_config reads RL_* settings once, when reportlab is
+# first imported (through the proxies below); an RL_useA85 already set wins.
+os.environ.setdefault("RL_useA85", "0")
+# Imported on first use so the app's first page does not pay for them
+platypus = lazy_import("reportlab.platypus")
+pagesizes = lazy_import("reportlab.lib.pagesizes")
+rl_styles = lazy_import("reportlab.lib.styles")
+rl_colors = lazy_import("reportlab.lib.colors")
+shapes = lazy_import("reportlab.graphics.shapes")
+
+from current_profile import CurrentProfile
+from decimate import decimate
+from native_backend import V_HIGH, V_LOW
+
+TITLE = "ABS Super-Capacitor Calculator Report"
+MARGIN = 54
+PLOT_WIDTH = 500
+PLOT_HEIGHT = 170
+SERIES_COLORS = ("#4682B4", "#FF6B6B", "#2E8B57", "#DAA520", "#8A2BE2")
+_PAGE_FORM = "abs_page"
+_styles = None
+_plot_class = None
+
+
+def _style(name):
+    global _styles
+    if _styles is None:
+        _styles = rl_styles.getSampleStyleSheet()
+    return _styles[name]
+
+
+def _draw_page(canvas, doc, title, date):
+    # Static parts go into a form once; every page then references it
+    width, height = doc.pagesize
+    if not canvas.hasForm(_PAGE_FORM):
+        canvas.beginForm(_PAGE_FORM)
+        canvas.setFillColor(rl_colors.HexColor("#6495ED"))
+        canvas.rect(0, height - 40, width, 40, stroke=0, fill=1)
+        canvas.setFillColor(rl_colors.white)
+        canvas.setFont("Helvetica-Bold", 13)
+        canvas.drawString(MARGIN, height - 26, title)
+        canvas.setStrokeColor(rl_colors.HexColor("#5A9BD4"))
+        canvas.setDash(3, 2)
+        canvas.line(MARGIN, 40, width - MARGIN, 40)
+        canvas.setFillColor(rl_colors.black)
+        canvas.setFont("Helvetica", 8)
+        canvas.drawString(MARGIN, 28, "Made by System Engineering Team")
+        canvas.endForm()
+    canvas.doForm(_PAGE_FORM)
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(width - MARGIN, 28, f"{date} · page {doc.page}")
+
+
+def _document(target, title, date):
+    doc = platypus.BaseDocTemplate(target, pagesize=pagesizes.letter, title=title,
+                                   leftMargin=MARGIN, rightMargin=MARGIN, topMargin=60, bottomMargin=54)
+    frame = platypus.Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id="body")
+    doc.addPageTemplates([platypus.PageTemplate(
+        id="page", frames=[frame], onPage=lambda canvas, d: _draw_page(canvas, d, title, date))])
+    return doc
+
+
+def _table(header, rows, col_widths=None):
+    style = platypus.TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), rl_colors.HexColor("#f0f4ff")),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.75, rl_colors.HexColor("#6495ED")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [rl_colors.white, rl_colors.HexColor("#f8f9fa")]),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ])
+    return platypus.Table([header] + [list(r) for r in rows], colWidths=col_widths, repeatRows=1,
+                          hAlign="LEFT", style=style)
+
+
+def _ticks(lo, hi, n=5):
+    # Round tick values (1, 2 or 5 times a power of ten) covering [lo, hi]
+    span = hi - lo
+    if not span > 0:
+        return [lo]
+    raw = span / n
+    step = 10 ** math.floor(math.log10(raw))
+    step *= next(m for m in (1, 2, 5, 10) if m * step >= raw)
+    first = math.ceil(lo / step) * step
+    return [v for v in np.arange(first, hi + 0.5 * step, step) if v <= hi + 1e-9 * step]
+
+
+def _plot_flowable(drawing, paths):
+    # Axes and labels are a Drawing; the traces are appended as ready-made PDF path operators,
+    # since reportlab formats shape coordinates one number at a time
+    global _plot_class
+    if _plot_class is None:
+        class _Plot(platypus.Flowable):
+            def __init__(self, drawing, paths):
+                super().__init__()
+                self.drawing = drawing
+                self.paths = paths
+                self.width, self.height = drawing.width, drawing.height
+
+            def wrap(self, avail_width, avail_height):
+                return self.width, self.height
+
+            def draw(self):
+                self.drawing.drawOn(self.canv, 0, 0)
+                for ops in self.paths:
+                    self.canv.addLiteral(ops)
+
+        _plot_class = _Plot
+    return _plot_class(drawing, paths)
+
+
+def _path_ops(points, color):
+    xy = points.ravel()
+    body = ("%.2f %.2f l\n" * (len(points) - 1)) % tuple(xy[2:])
+    return (f"q {color.red:.3f} {color.green:.3f} {color.blue:.3f} RG 1 w 1 j\n"
+            f"{xy[0]:.2f} {xy[1]:.2f} m\n{body}S Q")
+
+
+def line_plot(series, title, x_label, y_label, x_lim=None, width=PLOT_WIDTH, height=PLOT_HEIGHT, levels=(),
+              markers=False):
+    """Vector plot of ``series`` (``[(x, y, label), ...]``) as a flowable; ``markers`` draws points.
+
+    Traces are decimated to one min/max pair per point of plot width.
+    """
+    left, bottom, right, top = 46, 28, 8, 18
+    pw, ph = width - left - right, height - bottom - top
+    drawing = shapes.Drawing(width, height)
+    drawing.add(shapes.String(left, height - 12, title, fontName="Helvetica-Bold", fontSize=9))
+
+    cut = []
+    for x, y, label in series:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if not markers:
+            x, y = decimate(x, y, x_range=x_lim, width_px=pw, levels=levels)
+        keep = np.isfinite(x) & np.isfinite(y)
+        cut.append((x[keep], y[keep], label))
+    xs = [x for x, _, _ in cut if x.size]
+    if not xs:
+        drawing.add(shapes.String(left + pw / 2, bottom + ph / 2, "No data", textAnchor="middle", fontSize=9))
+        return _plot_flowable(drawing, [])
+    if x_lim is not None:
+        x0, x1 = x_lim
+    else:
+        x0, x1 = min(x.min() for x in xs), max(x.max() for x in xs)
+        if markers:
+            x0, x1 = x0 - 0.03 * (x1 - x0), x1 + 0.03 * (x1 - x0)
+    y0 = min(y.min() for _, y, _ in cut if y.size)
+    y1 = max(y.max() for _, y, _ in cut if y.size)
+    pad = 0.05 * (y1 - y0) if y1 > y0 else max(abs(y0), 1.0) * 0.05
+    y0, y1 = y0 - pad, y1 + pad
+    x1 = x1 if x1 > x0 else x0 + 1.0
+
+    def px(v):
+        return left + (v - x0) / (x1 - x0) * pw
+
+    def py(v):
+        return bottom + (v - y0) / (y1 - y0) * ph
+
+    grid = rl_colors.HexColor("#cccccc")
+    for tx in _ticks(x0, x1):
+        drawing.add(shapes.Line(px(tx), bottom, px(tx), bottom + ph, strokeColor=grid, strokeWidth=0.3,
+                                strokeDashArray=[2, 2]))
+        drawing.add(shapes.String(px(tx), bottom - 9, f"{tx:g}", textAnchor="middle", fontSize=6.5))
+    for ty in _ticks(y0, y1):
+        drawing.add(shapes.Line(left, py(ty), left + pw, py(ty), strokeColor=grid, strokeWidth=0.3,
+                                strokeDashArray=[2, 2]))
+        drawing.add(shapes.String(left - 3, py(ty) - 2, f"{ty:g}", textAnchor="end", fontSize=6.5))
+    drawing.add(shapes.Rect(left, bottom, pw, ph, fillColor=None, strokeColor=rl_colors.black, strokeWidth=0.5))
+    drawing.add(shapes.String(left + pw / 2, 4, x_label, textAnchor="middle", fontSize=7.5))
+    y_text = shapes.Group(shapes.String(0, 0, y_label, textAnchor="middle", fontSize=7.5))
+    y_text.transform = (0, 1, -1, 0, 10, bottom + ph / 2)
+    drawing.add(y_text)
+
+    paths = []
+    for k, (x, y, label) in enumerate(cut):
+        color = rl_colors.HexColor(SERIES_COLORS[k % len(SERIES_COLORS)])
+        inside = (x >= x0) & (x <= x1)
+        points = np.column_stack([px(x[inside]), py(y[inside])])
+        if markers:
+            for cx, cy in points.tolist():
+                drawing.add(shapes.Circle(cx, cy, 1.6, fillColor=color, strokeColor=None))
+        elif len(points) >= 2:
+            paths.append(_path_ops(points, color))
+        if label:
+            lx = left + pw - 4
+            ly = bottom + ph - 9 - 9 * k
+            drawing.add(shapes.String(lx, ly, label, textAnchor="end", fontSize=7, fillColor=color))
+    return _plot_flowable(drawing, paths)
+
+
+def _kv_rows(values):
+    # Paragraphs wrap but cost far more to lay out than plain cells, so only long values get one
+    return [(str(k), platypus.Paragraph(escape(str(v)), _style("BodyText")) if len(str(v)) > 60 else str(v))
+            for k, v in values.items()]
+
+
+def _run_section(inputs, results, t=None, vcap=None, x_lim=None, profile=None, profile_duration=1.0):
+    """Flowables for one run: inputs, results, notes and plots."""
+    notes = results.get("Notes")
+    story = [
+        _table(["Input", "Value"], _kv_rows(inputs), col_widths=[200, 300]),
+        platypus.Spacer(1, 8),
+        _table(["Result", "Value"], _kv_rows({k: v for k, v in results.items() if k != "Notes"}),
+               col_widths=[200, 300]),
+    ]
+    if notes:
+        story += [platypus.Spacer(1, 8), platypus.Paragraph("Notes", _style("Heading4")),
+                  platypus.Paragraph(escape(notes).replace("\n", "<br/>"), _style("BodyText"))]
+    if profile is not None:
+        tc, current = CurrentProfile.from_pulse(*profile).steps(profile_duration)
+        story += [platypus.Spacer(1, 8),
+                  line_plot([(tc, current, None)], "Current Profile (A)", "Time (s)", "Current (A)",
+                            x_lim=(0, profile_duration))]
+    if t is not None and vcap is not None and len(t):
+        story += [platypus.Spacer(1, 8),
+                  line_plot([(t, vcap, None)], "Capacitor Voltage vs. Time", "Time (s)", "Vcap (V)",
+                            x_lim=x_lim, levels=(V_HIGH, V_LOW))]
+    return story
+
+
+def design_report(mode, inputs, results, date="July 17, 2025", t=None, vcap=None, x_lim=None, profile=None,
+                  profile_duration=1.0, target=None):
+    """Report of one run; written to ``target`` (a path or file), or returned as a BytesIO at 0.
+
+    ``profile`` holds the ``current_profile`` pulse arguments
+    ``(periodic, time_period, spike_time, peak_current, static_current)``.
+    """
+    buffer = io.BytesIO() if target is None else target
+    doc = _document(buffer, TITLE, date)
+    story = [platypus.Paragraph(f"Mode: {escape(mode)}", _style("Heading3"))]
+    story += _run_section(inputs, results, t, vcap, x_lim, profile, profile_duration)
+    doc.build(story)
+    if target is None:
+        buffer.seek(0)
+        return buffer
+    return target
+
+
+def _point_profile(row):
+    return ("Periodic" if bool(row["periodic"]) else "Non-Periodic", float(row["TimePeriod"]),
+            float(row["SpikeTime"]), float(row["peak_current"]), float(row["static_current"]))
+
+
+def _fmt(value, spec=".4f"):
+    try:
+        return "n/a" if value is None or np.isnan(value) else format(value, spec)
+    except TypeError:
+        return str(value)
+
+
+def batch_report(results, target, traces=None, date=None, title="ABS Design Study Report", point_pages=True):
+    """Report of a whole design study (a ``batch.evaluate_design_points`` DataFrame).
+
+    ``traces(row)`` may return the run's ``(t, Vcap)``, full (e.g. from the
+    result cache) or already decimated (``batch.plot_trace``), or None. Each
+    trace is decimated as its point is added, so only one full trace is in
+    memory at a time. Returns ``target``.
+    """
+    date = date or time.strftime("%B %d, %Y")
+    doc = _document(target, title, date)
+    rows = list(results.iterrows())
+    failed = int(results["error"].notna().sum()) if "error" in results else 0
+    story = [
+        platypus.Paragraph(f"{len(rows)} design points, {failed} failed", _style("Heading3")),
+    ]
+    series = []
+    for model, group in results.sort_values("C_val").groupby("model", sort=False):
+        series.append((group["C_val"].to_numpy(), group["deltaT"].to_numpy(dtype=np.float64), str(model)))
+    story += [line_plot(series, "ABS On Time vs. Capacitance", "Capacitance (F)", "On time (s)", markers=True),
+              platypus.Spacer(1, 10)]
+    header = ["#", "Model", "C (F)", "Profile", "Peak (A)", "Static (A)", "Period (ms)", "Spike (ms)",
+              "Source (A)", "Off (s)", "On (s)"]
+    table = [
+        (str(k + 1), str(row["model"]), _fmt(row["C_val"], ".3f"),
+         "Periodic" if bool(row["periodic"]) else "Non-Periodic", _fmt(row["peak_current"], "g"),
+         _fmt(row["static_current"], "g"), _fmt(1000 * row["TimePeriod"], "g"), _fmt(1000 * row["SpikeTime"], "g"),
+         _fmt(row["CurrentSource"], "g"), _fmt(row["t_rise"]), _fmt(row["deltaT"]))
+        for k, (_, row) in enumerate(rows)
+    ]
+    story.append(_table(header, table, col_widths=[22, 104, 40, 50, 34, 34, 42, 38, 38, 46, 46]))
+
+    if point_pages:
+        for k, (_, row) in enumerate(rows):
+            story += [platypus.PageBreak(),
+                      platypus.Paragraph(f"Design point {k + 1} of {len(rows)}", _style("Heading3"))]
+            inputs = {"Model": row["model"], "Capacitance (F)": _fmt(row["C_val"]),
+                      "Profile": _point_profile(row)[0], "Time Period (ms)": _fmt(1000 * row["TimePeriod"], ".3f"),
+                      "Spike Time (ms)": _fmt(1000 * row["SpikeTime"], ".3f"),
+                      "Peak Current (A)": _fmt(row["peak_current"], ".2f"),
+                      "Static Current (A)": _fmt(row["static_current"], ".2f"),
+                      "Current Source (A)": _fmt(row["CurrentSource"])}
+            outputs = {"ABS Off Time (s)": _fmt(row["t_rise"]), "ABS On Time (s)": _fmt(row["deltaT"])}
+            if isinstance(row.get("error"), str):
+                outputs["Error"] = row["error"]
+            trace = traces(row) if traces is not None else None
+            t, vcap = trace if trace is not None else (None, None)
+            on, off = row["deltaT"], row["t_rise"]
+            x_lim = (0, 5 * (on + off)) if np.isfinite(on) and np.isfinite(off) else None
+            duration = on if np.isfinite(on) and on > 0 else 1.0
+            story += _run_section(inputs, outputs, t, vcap, x_lim, _point_profile(row), duration)
+    doc.build(story)
+    return target
@@ -0,0 +1,272 @@
+"""Persistent, content-addressed cache of LogTimes results.
+
+Entries are keyed on a SHA-256 of (``model_hash``, backend, C_val, every
+workspace input), so a result is reused only when nothing that could change it
+has changed. The cache is a SQLite file in WAL mode: it survives restarts and
+can be shared by several Streamlit/worker processes on the same host. Least
+recently used entries are evicted once the size or entry limit is exceeded.
+Traces are stored losslessly compressed (``_pack``), about 25x smaller than
+raw float64.
+"""
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+
+from matlab_paths import REPO_DIR, find_model_file
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "abs_calculator")
+# Scripts that compute MATLAB results; editing one invalidates every MATLAB entry
+MATLAB_SCRIPTS = [os.path.join(REPO_DIR, name) for name in ("LogTimes.m", "LogTimesBatch.m")]
+
+# Bumped when the stored format changes; older results tables are dropped
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    model_name TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    c_val REAL NOT NULL,
+    workspace TEXT NOT NULL,
+    t_rise REAL NOT NULL,
+    delta_t REAL NOT NULL,
+    t BLOB NOT NULL,
+    vcap BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+CREATE INDEX IF NOT EXISTS results_points ON results (model_name, backend, kind, workspace);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+_file_hashes = {}
+
+
+def _pack(values):
+    # XOR with the previous sample zeroes the sign/exponent/high mantissa bytes of
+    # slowly varying data, and grouping the bytes by significance lets zlib see
+    # those runs; both steps are exact
+    u = np.ascontiguousarray(np.ravel(values), dtype=np.float64).view(np.uint64).copy()
+    u[1:] ^= u[:-1].copy()
+    return zlib.compress(np.ascontiguousarray(u.view(np.uint8).reshape(-1, 8).T).tobytes(), 1)
+
+
+def _unpack(blob):
+    planes = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(8, -1)
+    return np.bitwise_xor.accumulate(np.ascontiguousarray(planes.T).view(np.uint64).ravel()).view(np.float64)
+
+
+def _file_hash(path):
+    st = os.stat(path)
+    memo_key = (path, st.st_mtime_ns, st.st_size)
+    if memo_key not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        _file_hashes[memo_key] = h.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def _repo_sources(module_name, found=None):
+    """Source files of ``module_name`` and of every repository module it imports, recursively."""
+    found = {} if found is None else found
+    module = importlib.import_module(module_name)
+    found[module_name] = os.path.abspath(module.__file__)
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+        path = getattr(sys.modules.get(name), "__file__", None) if isinstance(name, str) else None
+        if name not in found and path and os.path.dirname(os.path.abspath(path)) == REPO_DIR:
+            _repo_sources(name, found)
+    return found
+
+
+def _combined_hash(paths):
+    return hashlib.sha256("".join(_file_hash(path) for path in paths).encode()).hexdigest()
+
+
+def model_hash(model_name, backend="matlab"):
+    """Hash of whatever computes the result.
+
+    Native: native_backend.py and the modules it uses. MATLAB: the .slx file
+    and the scripts that simulate it and measure t_rise/deltaT.
+    """
+    if backend == "native":
+        sources = _repo_sources("native_backend")
+        return _combined_hash(sources[name] for name in sorted(sources))
+    scripts = _combined_hash(path for path in MATLAB_SCRIPTS if os.path.isfile(path))
+    path = find_model_file(model_name)
+    if path is not None:
+        return _combined_hash([path]) + ":" + scripts
+    # Model file not visible from Python (e.g. only on the MATLAB path)
+    return "name:" + model_name + ":" + scripts
+
+
+def _normalise(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return repr(float(value))
+    return value
+
+
+def workspace_key(workspace):
+    """Canonical JSON of a workspace: 4, 4.0 and np.float64(4) are the same input."""
+    return json.dumps({k: _normalise(v) for k, v in workspace.items()}, sort_keys=True)
+
+
+def run_kind(events=False, steady_tol=None, scalars=False):
+    """How a cached run was made; only runs of one kind have comparable crossing times."""
+    if scalars:
+        return "scalars"
+    if events:
+        return "events"
+    return "steady" if steady_tol else "full"
+
+
+class ResultCache:
+    def __init__(self, path=None, max_bytes=512 * 1024 * 1024, max_entries=20000):
+        if path is None:
+            cache_dir = os.environ.get("ABS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            os.makedirs(cache_dir, exist_ok=True)
+            path = os.path.join(cache_dir, "log_times.sqlite")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._conn() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        # sqlite3 connections are per thread; WAL lets processes share the file
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, C_val, model_name, workspace, backend="matlab", events=False, steady_tol=None, scalars=False):
+        payload = {
+            "model": model_name,
+            "model_hash": model_hash(model_name, backend),
+            "backend": backend,
+            "C_val": _normalise(C_val),
+            "workspace": {k: _normalise(v) for k, v in workspace.items()},
+        }
+        if events:
+            # Event-terminated runs differ in trace length and crossing times
+            payload["events"] = True
+        if steady_tol:
+            # Runs stopped at steady state are shorter
+            payload["steady_tol"] = _normalise(steady_tol)
+        if scalars:
+            # LogTimesBatch results: t_rise/deltaT only, empty trace
+            payload["scalars"] = True
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _count(self, conn, name, n=1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key):
+        """Return ``(t_rise, deltaT, t, Vcap)`` or ``None`` on a miss."""
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT t_rise, delta_t, t, vcap FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._count(conn, "hits")
+        t_rise, delta_t, t, vcap = row
+        return t_rise, delta_t, _unpack(t), _unpack(vcap)
+
+    def get_scalars(self, C_val, model_name, workspace, backend="matlab"):
+        """``(t_rise, deltaT)`` from a full-horizon entry or a LogTimesBatch entry, or ``None``."""
+        keys = [self.key(C_val, model_name, workspace, backend, scalars=s) for s in (False, True)]
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT key, t_rise, delta_t FROM results WHERE key IN (?, ?) ORDER BY key = ? DESC",
+                (*keys, keys[0]),
+            ).fetchone()
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), row[0]))
+            self._count(conn, "hits")
+        return row[1], row[2]
+
+    def put(self, key, result, C_val, model_name, workspace, backend="matlab", kind="full"):
+        t_rise, delta_t, t, vcap = result
+        t, vcap = _pack(t), _pack(vcap)
+        now = time.time()
+        ws = workspace_key(workspace)
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, backend, kind, float(C_val), ws, float(t_rise), float(delta_t),
+                 t, vcap, len(t) + len(vcap), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        if evicted:
+            self._count(conn, "evictions", evicted)
+
+    def points(self, model_name, workspace, backend="matlab", kind="full"):
+        """``[(C_val, t_rise, deltaT), ...]`` of every cached run of one ``run_kind`` with these inputs, any capacitance."""
+        ws = workspace_key(workspace)
+        return self._conn().execute(
+            "SELECT c_val, t_rise, delta_t FROM results "
+            "WHERE model_name = ? AND backend = ? AND kind = ? AND workspace = ?",
+            (model_name, backend, kind, ws),
+        ).fetchall()
+
+    def stats(self):
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM counters")
@@ -0,0 +1,269 @@
+"""Searchable history of super-capacitor design points for the ABS Helper Chat.
+
+Every run the chatbot app completes is recorded with its inputs, results and
+notes in a SQLite file next to the result cache (``ABS_CACHE_DIR``). Runs
+already in the LogTimes result cache, including every step of past sweeps,
+can be imported:
+
+    python results_store.py --import-cache
+    python results_store.py "what capacitance gave 5 s on-time at 14 V last week?"
+
+``search`` filters on the charging model and the run date, then ranks by
+relative distance to the numeric targets (on time, capacitance, currents, ...).
+Without targets it ranks by SQLite FTS5 full-text match on the notes. Plain
+``LIKE`` is used where FTS5 is not compiled in. ``search_question`` pulls
+these filters out of a chat question, so the chat can answer from past runs
+without simulating again. Everything runs offline.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from result_cache import DEFAULT_CACHE_DIR
+
+NUMERIC = ("capacitance", "on_time", "off_time", "peak_current", "static_current",
+           "current_source", "time_period_ms", "spike_time_ms")
+MODEL_LABELS = {"Week_5_day_4_original": "14V Charging", "Week_6_day_4_original": "48V Charging"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    created REAL NOT NULL,
+    source TEXT NOT NULL,
+    model TEXT,
+    profile TEXT,
+    capacitance REAL,
+    on_time REAL,
+    off_time REAL,
+    peak_current REAL,
+    static_current REAL,
+    current_source REAL,
+    time_period_ms REAL,
+    spike_time_ms REAL,
+    notes TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_model_created ON runs (model, created);
+"""
+
+_WINDOWS = [  # (phrase, days back)
+    ("today", 1), ("yesterday", 2), ("this week", 7), ("last week", 14),
+    ("this month", 31), ("last month", 62), ("this year", 366),
+]
+_QUANTITY = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|s|secs?|seconds?|v|volts?|f|farads?|a|amps?)\b", re.IGNORECASE)
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9]{3,}")
+_STOPWORDS = {"what", "which", "with", "gave", "give", "gives", "last", "week", "month", "year", "that",
+              "this", "today", "yesterday", "does", "from", "have"}
+
+
+def parse_question(text):
+    """Filters and numeric targets mentioned in a chat question.
+
+    ``"capacitance for 5 s on-time at 14 V last week"`` gives
+    ``{"model": "14V Charging", "since": <14 days ago>, "on_time": 5.0}``.
+    """
+    query = {}
+    lower = text.lower()
+    for match in _QUANTITY.finditer(text):
+        value = float(match.group(1))
+        unit = match.group(2).lower()
+        around = lower[max(0, match.start() - 25):match.end() + 25]
+        if unit == "ms":
+            query["time_period_ms" if "period" in around else "spike_time_ms"] = value
+        elif unit.startswith("s"):
+            query["off_time" if ("off" in around or "charg" in around) else "on_time"] = value
+        elif unit.startswith("v"):
+            # The 14 V model swings between 12 V and 14.4 V
+            query["model"] = "48V Charging" if value > 30 else "14V Charging"
+        elif unit.startswith("f"):
+            query["capacitance"] = value
+        elif "static" in around or "base" in around:
+            query["static_current"] = value
+        elif "source" in around:
+            query["current_source"] = value
+        else:
+            query["peak_current"] = value
+    for phrase, days in _WINDOWS:
+        if phrase in lower:
+            query["since"] = time.time() - days * 86400.0
+            break
+    words = [w for w in _WORD.findall(_QUANTITY.sub(" ", text)) if w.lower() not in _STOPWORDS]
+    if words:
+        query["text"] = " ".join(words)
+    return query
+
+
+class ResultsStore:
+    def __init__(self, path=None):
+        if path is None:
+            cache_dir = os.environ.get("ABS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            os.makedirs(cache_dir, exist_ok=True)
+            path = os.path.join(cache_dir, "results.sqlite")
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(notes)")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite built without FTS5
+
+    def _conn(self):
+        # Same arrangement as result_cache.py: one connection per thread, WAL across processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, inputs, results, model=None, profile=None, source="app", created=None, **numbers):
+        """Record one run; ``numbers`` are values for the ``NUMERIC`` columns.
+
+        A run with the same model, profile and numbers replaces the earlier one.
+        """
+        unknown = set(numbers) - set(NUMERIC)
+        if unknown:
+            raise ValueError(f"Unknown numeric fields: {sorted(unknown)}")
+        values = [None if numbers.get(name) is None else float(numbers[name]) for name in NUMERIC]
+        key = hashlib.sha256(json.dumps([model, profile, values]).encode()).hexdigest()
+        notes = " ".join([model or "", profile or ""] + [f"{k}: {v}" for k, v in {**inputs, **results}.items()])
+        with self._conn() as conn:
+            old = conn.execute("SELECT id FROM runs WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                conn.execute("DELETE FROM runs WHERE id = ?", (old[0],))
+                if self.fts:
+                    conn.execute("DELETE FROM runs_fts WHERE rowid = ?", (old[0],))
+            cur = conn.execute(
+                f"INSERT INTO runs (key, created, source, model, profile, {', '.join(NUMERIC)}, notes, inputs, results) "
+                f"VALUES ({', '.join('?' * (len(NUMERIC) + 8))})",
+                [key, time.time() if created is None else created, source, model, profile, *values,
+                 notes, json.dumps(inputs), json.dumps(results)],
+            )
+            if self.fts:
+                conn.execute("INSERT INTO runs_fts (rowid, notes) VALUES (?, ?)", (cur.lastrowid, notes))
+        return cur.lastrowid
+
+    def _text_ids(self, conn, text, limit):
+        words = _WORD.findall(text)
+        if not words:
+            return None
+        if self.fts:
+            match = " OR ".join(f'"{w}"' for w in words)
+            rows = conn.execute("SELECT rowid FROM runs_fts WHERE runs_fts MATCH ? ORDER BY bm25(runs_fts) LIMIT ?",
+                                (match, limit)).fetchall()
+        else:
+            clause = " OR ".join("notes LIKE ?" for _ in words)
+            rows = conn.execute(f"SELECT id FROM runs WHERE {clause} ORDER BY created DESC LIMIT ?",
+                                [f"%{w}%" for w in words] + [limit]).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, model=None, since=None, text=None, limit=5, candidates=5000, **targets):
+        """Nearest past runs as dicts (with ``distance`` when targets are given)."""
+        unknown = set(targets) - set(NUMERIC)
+        if unknown:
+            raise ValueError(f"Unknown numeric fields: {sorted(unknown)}")
+        where, args = [], []
+        if model:
+            where.append("model = ?")
+            args.append(model)
+        if since:
+            where.append("created >= ?")
+            args.append(since)
+        where += [f"{name} IS NOT NULL" for name in targets]
+        conn = self._conn()
+        order = "created DESC"
+        if not targets and text:
+            ids = self._text_ids(conn, text, candidates)
+            if ids:
+                where.append(f"id IN ({', '.join('?' * len(ids))})")
+                args += ids
+                order = "CASE id " + " ".join(f"WHEN {i} THEN {rank}" for rank, i in enumerate(ids)) + " END"
+        sql = f"SELECT * FROM runs {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {order} LIMIT ?"
+        rows = [dict(row) for row in conn.execute(sql, args + [candidates if targets else limit])]
+        if not targets:
+            return rows
+        names = sorted(targets)
+        goal = np.array([targets[n] for n in names], dtype=np.float64)
+        found = np.array([[row[n] for n in names] for row in rows], dtype=np.float64).reshape(len(rows), len(names))
+        # Relative distance, so seconds, farads and amperes weigh alike
+        distance = np.sqrt((((found - goal) / np.maximum(np.abs(goal), 1e-9)) ** 2).sum(axis=1))
+        best = np.argsort(distance, kind="stable")[:limit]
+        return [{**rows[i], "distance": float(distance[i])} for i in best]
+
+    def search_question(self, question, limit=3):
+        return self.search(limit=limit, **parse_question(question))
+
+    def import_result_cache(self, cache):
+        """Record every run in a result_cache.ResultCache; returns how many were added."""
+        rows = cache._conn().execute(
+            "SELECT model_name, backend, c_val, workspace, t_rise, delta_t, created FROM results").fetchall()
+        for model_name, backend, c_val, workspace, t_rise, delta_t, created in rows:
+            ws = json.loads(workspace)
+            periodic = bool(ws.get("myFlag", True))
+            numbers = {
+                "capacitance": c_val, "on_time": delta_t, "off_time": t_rise,
+                "peak_current": ws.get("high_current"), "static_current": ws.get("low_current"),
+                "current_source": ws.get("CurrentSource"),
+                "time_period_ms": 1000.0 * float(ws["TimePeriod"]) if periodic and "TimePeriod" in ws else None,
+                "spike_time_ms": 1000.0 * float(ws["SpikeTime"]) if "SpikeTime" in ws else None,
+            }
+            results = {"ABS Off Time (s)": f"{t_rise:.4f}", "ABS On Time (s)": f"{delta_t:.4f}"}
+            self.add({"Capacitance (F)": f"{c_val:.4f}", "Backend": backend}, results,
+                     model=MODEL_LABELS.get(model_name, model_name),
+                     profile="Periodic" if periodic else "Non-Periodic",
+                     source="cache", created=created, **numbers)
+        return len(rows)
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def describe(run):
+    """One line per run for the chat prompt."""
+    when = time.strftime("%Y-%m-%d", time.localtime(run["created"]))
+    parts = [f"{when}, {run['model'] or 'unknown model'}, {run['profile'] or ''}".rstrip(", ")]
+    labels = [("capacitance", "C = {:.4f} F"), ("on_time", "on time {:.4f} s"), ("off_time", "off time {:.4f} s"),
+              ("peak_current", "peak {:g} A"), ("static_current", "static {:g} A"),
+              ("current_source", "source {:g} A"), ("time_period_ms", "period {:g} ms"),
+              ("spike_time_ms", "spike {:g} ms")]
+    parts += [fmt.format(run[name]) for name, fmt in labels
+              if run.get(name) is not None and not math.isnan(run[name])]
+    return "; ".join(parts)
+
+
+def main():
+    import argparse
+    from result_cache import ResultCache
+
+    parser = argparse.ArgumentParser(description="Search past design points, or import the result cache.")
+    parser.add_argument("question", nargs="?", help="Chat-style question, e.g. '5 s on-time at 14 V'.")
+    parser.add_argument("--import-cache", action="store_true", help="Import every run of the LogTimes result cache.")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--verbose", action="store_true", help="Also print the filters parsed from the question.")
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    if args.import_cache:
+        print(f"Imported {store.import_result_cache(ResultCache())} cached runs ({store.count()} in the store)")
+    if args.question:
+        if args.verbose:
+            print(parse_question(args.question))
+        for run in store.search_question(args.question, limit=args.limit):
+            print(describe(run))
+
+
+if __name__ == "__main__":
+    main()
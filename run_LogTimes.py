@@ -1,3 +1,5 @@
+# Superseded by run_batch.py, which reads design points from a job file and
+# resumes interrupted runs; kept for reference.
 # import matlab.engine
 # def main():
 #     eng = matlab.engine.start_matlab()
@@ -16,12 +18,11 @@
 
 # if __name__ == "__main__":
 #     main()
-import matlab.engine
+from engine_pool import start_matlab_engine
 
 def main():
-    # Start MATLAB engine and set model path
-    eng = matlab.engine.start_matlab()
-    eng.addpath(r'C:\Users\adars\OneDrive\Desktop\Matlab', nargout=0)
+    # Start MATLAB engine with the app's paths (LogTimes.m ships with the repository)
+    eng = start_matlab_engine()
 
     # Parameters to send to MATLAB workspace
     model = 'Week_5_day_4_original'
@@ -38,19 +39,19 @@ def main():
     # Compute OnTime in Python (optional, can let MATLAB compute as well)
     OnTime = (SpikeTime / TimePeriod) * 100 if periodic else 100.0
 
-    # Push variables into MATLAB base workspace
-    eng.workspace['modelName']      = model
-    eng.workspace['C_val']          = C_val
-    eng.workspace['TimePeriod']     = TimePeriod
-    eng.workspace['SpikeTime']      = SpikeTime
-    eng.workspace['myFlag']         = float(periodic)  # MATLAB expects 1.0 or 0.0
-    eng.workspace['low_current']    = low_current
-    eng.workspace['high_current']   = high_current
-    eng.workspace['CurrentSource']  = CurrentSource
-    eng.workspace['OnTime']         = OnTime
+    # Workspace variables for this run, passed to LogTimes as a struct
+    params = {
+        'TimePeriod':    TimePeriod,
+        'SpikeTime':     SpikeTime,
+        'myFlag':        float(periodic),  # MATLAB expects 1.0 or 0.0
+        'low_current':   low_current,
+        'high_current':  high_current,
+        'CurrentSource': CurrentSource,
+        'OnTime':        OnTime,
+    }
 
     # Run LogTimes which internally uses Simulink
-    t_rise, deltaT = eng.LogTimes(C_val, model, nargout=2)
+    t_rise, deltaT = eng.LogTimes(float(C_val), model, False, params, nargout=2)
     
     # Print results
     print(f"\nResults for C_val = {C_val} F")
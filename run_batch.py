@@ -0,0 +1,197 @@
+"""Headless batch runner for super-capacitor design studies.
+
+    python run_batch.py job.yaml
+    python run_batch.py points.csv --backend matlab --output results.parquet
+
+A CSV job file holds one design point per row (columns as in batch.py). A YAML
+job file may also set run options:
+
+    backend: native            # or matlab
+    workers: 8
+    output: results.csv        # .csv or .parquet
+    report: study.pdf          # optional PDF report of every point (reports.py)
+    defaults: {model: Week_5_day_4_original, CurrentSource: 4.0}
+    grid:                      # cartesian product ...
+      C_val: {start: 1, stop: 100, step: 1}
+      peak_current: [25, 30]
+    points:                    # ... and/or explicit points
+      - {C_val: 22.5, SpikeTime: 0.05}
+
+Finished points are appended to a checkpoint file after every chunk, so
+re-running the same command after an interruption resumes where it stopped.
+With a report, each point's Vcap trace is kept at plot resolution (about 16 kB)
+in ``<checkpoint>.traces/`` alongside it. Command-line options override the
+job file.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import batch
+import reports
+
+DESIGN_COLUMNS = ["C_val"] + list(batch.DEFAULT_DESIGN)
+
+
+def _axis(values):
+    if isinstance(values, dict):
+        return list(np.arange(values["start"], values["stop"] + 0.5 * values.get("step", 1), values.get("step", 1)))
+    return values if isinstance(values, list) else [values]
+
+
+def load_job(path):
+    """Return ``(points DataFrame, options dict)`` from a YAML or CSV job file."""
+    if path.lower().endswith((".yaml", ".yml")):
+        import yaml
+        with open(path, encoding="utf-8") as fh:
+            job = yaml.safe_load(fh) or {}
+        frames = []
+        if job.get("grid"):
+            frames.append(batch.design_grid(**{k: _axis(v) for k, v in job["grid"].items()}))
+        if job.get("points"):
+            frames.append(pd.DataFrame(job["points"]))
+        if not frames:
+            raise ValueError(f"{path}: a job needs 'grid' and/or 'points'.")
+        points = pd.concat(frames, ignore_index=True)
+        for column, value in (job.get("defaults") or {}).items():
+            points[column] = points[column].fillna(value) if column in points else value
+        options = {k: v for k, v in job.items() if k not in ("grid", "points", "defaults")}
+        return points, options
+    return pd.read_csv(path), {}
+
+
+def point_ids(df):
+    """Stable id per design point, used to match rows against the checkpoint."""
+    def one(row):
+        payload = {c: (repr(float(row[c])) if c not in ("model", "periodic") else str(row[c])) for c in DESIGN_COLUMNS}
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+    return df.apply(one, axis=1)
+
+
+def write_results(df, path):
+    if path.lower().endswith(".parquet"):
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow or fastparquet (pip install pyarrow).")
+    else:
+        df.to_csv(path, index=False)
+
+
+def save_traces(results, trace_dir):
+    os.makedirs(trace_dir, exist_ok=True)
+    for point_id, trace in zip(results["point_id"], results.pop("trace")):
+        if trace is not None:
+            np.save(os.path.join(trace_dir, f"{point_id}.npy"), trace)
+
+
+def write_report(results, path, backend, cache, trace_dir):
+    """PDF of the study. Vcap plots come from the traces kept during the run, else from
+    the result cache; points with neither (parsim runs) get the current profile only."""
+    def trace(row):
+        saved = os.path.join(trace_dir, f"{row['point_id']}.npy")
+        if os.path.exists(saved):
+            return np.load(saved)
+        if cache is None:
+            return None
+        hit = cache.get(cache.key(float(row["C_val"]), row["model"], batch.design_workspace(row), backend))
+        return (hit[2], hit[3]) if hit is not None else None
+
+    start = time.perf_counter()
+    reports.batch_report(results, path, traces=trace)
+    print(f"Wrote report of {len(results)} points to {path} in {time.perf_counter() - start:.1f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of super-capacitor design points headless.")
+    parser.add_argument("job", help="YAML or CSV job file")
+    parser.add_argument("--backend", choices=["native", "matlab"])
+    parser.add_argument("--workers", type=int, help="Concurrent simulations (default: CPU count / engine pool size)")
+    parser.add_argument("--output", help="Results file, .csv or .parquet (default: <job>.results.csv)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.csv)")
+    parser.add_argument("--chunk-size", type=int, help="Points per checkpoint (default 50)")
+    parser.add_argument("--parsim", action="store_true", default=None, help="MATLAB: one parsim call per model and chunk")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the on-disk result cache")
+    parser.add_argument("--report", help="Also write a PDF report of every point (reports.py)")
+    args = parser.parse_args(argv)
+
+    points, options = load_job(args.job)
+    for key in ("backend", "workers", "output", "checkpoint", "chunk_size", "parsim", "report"):
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+    backend = options.get("backend", "native")
+    output = options.get("output") or os.path.splitext(args.job)[0] + ".results.csv"
+    checkpoint = options.get("checkpoint") or output + ".checkpoint.csv"
+    chunk_size = int(options.get("chunk_size", 50))
+    trace_dir = checkpoint + ".traces"
+    trace_points = reports.PLOT_WIDTH if options.get("report") else 0
+
+    points = batch.normalise_points(points)
+    points.insert(0, "point_id", point_ids(points))
+    points = points.drop_duplicates("point_id").reset_index(drop=True)
+
+    done = pd.DataFrame()
+    if os.path.exists(checkpoint) and not args.no_resume:
+        done = pd.read_csv(checkpoint)
+    elif os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    if args.no_resume and os.path.isdir(trace_dir):
+        shutil.rmtree(trace_dir)
+    todo = points[~points["point_id"].isin(done.get("point_id", []))]
+    if len(todo) < len(points):
+        print(f"Resuming: {len(points) - len(todo)} of {len(points)} points already in {checkpoint}")
+
+    cache = None
+    if not args.no_cache:
+        from result_cache import ResultCache
+        cache = ResultCache()
+    pool = executor = None
+    if backend == "matlab":
+        # One warm pool for the whole run instead of an engine cold start per point
+        from engine_pool import pool_from_env
+        pool = pool_from_env()
+    elif options.get("workers") != 1:
+        executor = ProcessPoolExecutor(max_workers=options.get("workers"))
+
+    start = time.perf_counter()
+    for first in range(0, len(todo), chunk_size):
+        chunk = todo.iloc[first:first + chunk_size]
+        results = batch.evaluate_design_points(
+            chunk.drop(columns="point_id"), backend=backend, pool=pool, cache=cache,
+            max_workers=options.get("workers"), parsim=bool(options.get("parsim")), executor=executor,
+            trace_points=trace_points,
+        )
+        results.insert(0, "point_id", chunk["point_id"].values)
+        if trace_points:
+            save_traces(results, trace_dir)
+        results.to_csv(checkpoint, mode="a", header=not os.path.exists(checkpoint), index=False)
+        finished = len(points) - len(todo) + first + len(chunk)
+        failed = results["error"].notna().sum()
+        print(f"{finished}/{len(points)} points ({time.perf_counter() - start:.1f} s, {failed} failed in this chunk)")
+        sys.stdout.flush()
+
+    all_results = pd.read_csv(checkpoint) if os.path.exists(checkpoint) else pd.DataFrame()
+    all_results = all_results.drop_duplicates("point_id", keep="last")
+    # Keep the job file's point order in the output
+    all_results = points[["point_id"]].merge(all_results, on="point_id", how="left")
+    write_results(all_results, output)
+    print(f"Wrote {len(all_results)} results to {output}")
+    if options.get("report"):
+        write_report(all_results, options["report"], backend, cache, trace_dir)
+    if pool is not None:
+        pool.close()
+    if executor is not None:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Headless benchmarks of the calculator's hot paths (no MATLAB or Streamlit needed).
+
+    python run_benchmarks.py --output bench.json
+    python run_benchmarks.py --output new.json --compare bench.json --threshold 0.25
+
+Simulations use the native backend. Each benchmark is run ``--repeat`` times
+and its median, best time and spread (median absolute deviation) are
+recorded. ``--compare`` prints the ratio of median times to a previous
+results file. It exits with status 1 if any benchmark got slower by more than
+``--threshold`` (a fraction, default 0.25) and by more than its run-to-run
+noise: ``--noise`` times the larger of the two spreads (default 3). Benchmarks
+faster than ``--min-time`` are never flagged, as their timings are mostly
+noise.
+"""
+import argparse
+import array
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import batch
+import cap_search
+import native_backend
+import reports
+from current_profile import _sample, current_profile
+from decimate import decimate
+from figures import generate_pdf_report, plot_current_profile, plot_voltage_time
+from matlab_transfer import to_numpy
+
+MODEL = "Week_5_day_4_original"
+WORKSPACE = native_backend.SWEEP_LOG_WORKSPACE
+
+
+def _timed(fn, repeat, setup=None):
+    # One untimed warm-up run (imports, caches of code that is not under test)
+    fn(setup()) if setup else fn()
+    times, extra = [], {}
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        out = fn(state) if setup else fn()
+        times.append(time.perf_counter() - start)
+        if isinstance(out, dict):
+            extra = out
+    median = float(np.median(times))
+    return {"median": median, "min": float(min(times)), "mad": float(np.median(np.abs(np.subtract(times, median)))),
+            "runs": repeat, **extra}
+
+
+def bench_profiles(repeat):
+    results = {}
+    for rate in (1_000, 10_000, 100_000):
+        def run(_, rate=rate):
+            current_profile(True, 0.1, 0.02, 25.0, 10.0, duration=1.0, sample_rate=rate)
+        # Clear the sample cache so every run generates the waveform
+        results[f"profile.generate[{rate}Hz]"] = _timed(run, repeat, setup=_sample.cache_clear)
+    return results
+
+
+def bench_searches(repeat):
+    results = {}
+
+    def evaluate(c):
+        return native_backend.log_times(c, MODEL, WORKSPACE, events=True)
+
+    for strategy in ("bisection", "illinois", "secant", "brent"):
+        for cap_tol in (0.5, 0.1, 0.01):
+            def run(strategy=strategy, cap_tol=cap_tol):
+                result = cap_search.run_search(strategy, evaluate, 6.0, 1.0, 90.0, 1e-3, cap_tol)
+                return {"simulations": result.n_sims}
+            results[f"search.{strategy}[cap_tol={cap_tol}]"] = _timed(run, repeat)
+    return results
+
+
+def bench_transfer(repeat, samples=2_000_000):
+    values = np.linspace(0.0, 250.0, samples)
+    nested = values.reshape(-1, 1).tolist()
+    buffer = array.array("d", values)  # exposes the buffer protocol like matlab.double (R2022a+)
+    results = {
+        "transfer.np_array_flatten": _timed(lambda: np.array(nested).flatten(), repeat),
+        "transfer.to_numpy[list]": _timed(lambda: to_numpy(nested), repeat),
+        "transfer.to_numpy[buffer]": _timed(lambda: to_numpy(buffer), repeat),
+    }
+    for result in results.values():
+        result["samples"] = samples
+    return results
+
+
+def bench_rendering(repeat):
+    import matplotlib.pyplot as plt
+    _, _, t, v = native_backend.log_times(22.5, MODEL, WORKSPACE)
+
+    def render(fig):
+        fig.savefig(io.BytesIO(), format="png")
+        plt.close(fig)
+
+    def run_voltage():
+        render(plot_voltage_time(t, v, x_lim=(0, 250)))
+
+    def run_profile():
+        render(plot_current_profile("Periodic", 0.1, 0.02, 25.0, 10.0, duration=6.0, sample_rate=10000))
+
+    inputs = {"Profile": "Periodic", "Time Period (ms)": "100.000", "Spike Time (ms)": "20.000",
+              "Capacitance (F)": "22.5000", "Charging Model": "14V Charging"}
+    results_dict = {"ABS Off Time (s)": "81.0000", "ABS On Time (s)": "6.0000",
+                    "Notes": "The super-capacitor voltage will vary between 12 V and 14.4 V. " * 6}
+    plots = {"t": t, "vcap": v, "x_lim": (0, 5 * (81.0 + 6.0)), "profile": ("Periodic", 0.1, 0.02, 25.0, 10.0),
+             "profile_duration": 6.0}
+    return {
+        "decimate.minmax": _timed(lambda: decimate(t, v, (0, 250), 1000, levels=(14.4, 12.0)), repeat),
+        "plot.voltage_time": _timed(run_voltage, repeat),
+        "plot.current_profile": _timed(run_profile, repeat),
+        "report.pdf": _timed(lambda: generate_pdf_report("Find ABS On/Off Time", inputs, results_dict, **plots),
+                             repeat),
+    }
+
+
+def bench_reports(repeat, points=50):
+    # A study as run_batch.py --report writes it: summary, then a page per point with its kept trace
+    study = batch.evaluate_design_points(batch.design_grid(C_val=np.linspace(1.0, 100.0, points)), max_workers=1,
+                                         trace_points=reports.PLOT_WIDTH)
+    traces = dict(zip(study.index, study.pop("trace")))
+    return {
+        f"report.batch[{points} points]": _timed(
+            lambda: reports.batch_report(study, io.BytesIO(), traces=lambda row: traces[row.name]), repeat),
+    }
+
+
+def bench_native(repeat):
+    return {
+        "native.log_times[C=22.5]": _timed(lambda: native_backend.log_times(22.5, MODEL, WORKSPACE), repeat),
+        "native.log_times_events[C=22.5]": _timed(
+            lambda: native_backend.log_times(22.5, MODEL, WORKSPACE, events=True), repeat),
+        "native.log_times_steady[C=22.5]": _timed(
+            lambda: native_backend.log_times(22.5, MODEL, WORKSPACE, steady_tol=1e-3), repeat),
+    }
+
+
+SUITES = {
+    "profiles": bench_profiles,
+    "searches": bench_searches,
+    "transfer": bench_transfer,
+    "rendering": bench_rendering,
+    "reports": bench_reports,
+    "native": bench_native,
+}
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline, threshold, min_time, noise=3.0):
+    """Rows of (name, baseline median, current median, ratio, status) and whether any regressed.
+
+    A change counts only when it exceeds both ``threshold`` and ``noise``
+    times the larger median absolute deviation of the two runs.
+    """
+    rows, regressed = [], False
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, result["median"], None, "new"))
+            continue
+        ratio = result["median"] / base["median"] if base["median"] > 0 else float("inf")
+        change = abs(result["median"] - base["median"])
+        significant = change > noise * max(result.get("mad", 0.0), base.get("mad", 0.0))
+        status = "ok"
+        if ratio > 1 + threshold and significant and result["median"] >= min_time:
+            status = "REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold and significant:
+            status = "faster"
+        rows.append((name, base["median"], result["median"], ratio, status))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite.")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown as a fraction (default 0.25)")
+    parser.add_argument("--min-time", type=float, default=5e-3, help="Ignore slowdowns of benchmarks faster than this (s)")
+    parser.add_argument("--noise", type=float, default=3.0,
+                        help="Changes within this many median absolute deviations count as noise (default 3)")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="Run only these suites")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.suite or SUITES:
+        start = time.perf_counter()
+        results.update(SUITES[name](args.repeat))
+        print(f"{name}: {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    print(f"{'benchmark':<42} {'median (ms)':>12} {'min (ms)':>10}")
+    for name, result in results.items():
+        print(f"{name:<42} {1000 * result['median']:>12.2f} {1000 * result['min']:>10.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        rows, regressed = compare(results, baseline["results"], args.threshold, args.min_time, args.noise)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}), threshold +{args.threshold:.0%}:")
+        print(f"{'benchmark':<42} {'before (ms)':>12} {'after (ms)':>11} {'ratio':>7}  status")
+        for name, before, after, ratio, status in rows:
+            before_text = f"{1000 * before:12.2f}" if before is not None else f"{'-':>12}"
+            ratio_text = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+            print(f"{name:<42} {before_text} {1000 * after:11.2f} {ratio_text}  {status}")
+        if regressed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
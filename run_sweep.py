@@ -1,3 +1,5 @@
+# Superseded by run_batch.py, which reads design points from a job file and
+# resumes interrupted runs; kept for reference.
 import matlab.engine
 
 def main():
@@ -0,0 +1,142 @@
+"""Figures of merit of simulated power-electronics waveforms, vectorised in NumPy.
+
+Simulink's variable-step solvers log unevenly spaced samples, so averages are
+time-weighted (trapezoidal) and THD resamples onto a uniform grid first.
+Steady-state metrics use the last ``fraction`` of the run.
+"""
+import math
+
+import numpy as np
+
+
+def _arrays(t, *ys):
+    t = np.asarray(t, dtype=np.float64)
+    ys = [np.asarray(y, dtype=np.float64) for y in ys]
+    n = min([len(t)] + [len(y) for y in ys])
+    if n < 2:
+        raise ValueError("A metric needs at least two samples.")
+    return (t[:n],) + tuple(y[:n] for y in ys)
+
+
+def _window(t, *ys, fraction=0.2):
+    # Samples of the last ``fraction`` of the run (at least two)
+    start = min(int(np.searchsorted(t, t[-1] - fraction * (t[-1] - t[0]), side="left")), len(t) - 2)
+    return (t[start:],) + tuple(y[start:] for y in ys)
+
+
+def time_mean(t, y, fraction=1.0):
+    t, y = _window(*_arrays(t, y), fraction=fraction)
+    span = t[-1] - t[0]
+    if span <= 0:
+        return float(np.mean(y))
+    return float(np.sum(np.diff(t) * (y[1:] + y[:-1])) / (2 * span))
+
+
+def rms(t, y, fraction=1.0):
+    t, y = _arrays(t, y)
+    return math.sqrt(max(time_mean(t, y * y, fraction), 0.0))
+
+
+def ripple(t, y, fraction=0.2):
+    """Peak-to-peak variation over the steady-state window."""
+    _, y = _window(*_arrays(t, y), fraction=fraction)
+    return float(np.ptp(y))
+
+
+def ripple_percent(t, y, fraction=0.2):
+    """Peak-to-peak ripple as a percentage of the steady-state mean."""
+    mean = time_mean(t, y, fraction)
+    return 100.0 * ripple(t, y, fraction) / abs(mean) if mean else math.nan
+
+
+def efficiency(t, v_in, i_in, v_out, i_out, fraction=0.2):
+    """Mean output power over mean input power, in percent."""
+    t, v_in, i_in, v_out, i_out = _arrays(t, v_in, i_in, v_out, i_out)
+    p_in = time_mean(t, v_in * i_in, fraction)
+    return 100.0 * time_mean(t, v_out * i_out, fraction) / p_in if p_in else math.nan
+
+
+def settling_time(t, y, tol=0.02, fraction=0.2):
+    """Time after which ``y`` stays within ``tol`` of its final (steady-state mean) value.
+
+    The band is relative to the final value, or to the signal's range when the
+    final value is close to zero.
+    """
+    t, y = _arrays(t, y)
+    final = time_mean(t, y, fraction)
+    band = tol * (abs(final) if abs(final) > 1e-9 * max(np.ptp(y), 1e-300) else np.ptp(y))
+    outside = np.flatnonzero(np.abs(y - final) > band)
+    if outside.size == 0:
+        return 0.0
+    last = outside[-1]
+    return float(t[min(last + 1, len(t) - 1)] - t[0])
+
+
+def overshoot_percent(t, y, fraction=0.2):
+    """Peak above the final value as a percentage of the final value."""
+    t, y = _arrays(t, y)
+    final = time_mean(t, y, fraction)
+    if not final:
+        return math.nan
+    peak = y.max() if final > 0 else y.min()
+    return max(100.0 * (peak - final) / final, 0.0)
+
+
+def _spectrum(t, y, duration):
+    # Uniformly resampled amplitude spectrum of the last ``duration`` seconds
+    t, y = _window(t, y, fraction=min(duration / (t[-1] - t[0]), 1.0))
+    n = 1 << max(10, int(math.ceil(math.log2(len(t)))))
+    grid = np.linspace(t[-1] - duration, t[-1], n, endpoint=False)
+    return np.abs(np.fft.rfft(np.interp(grid, t, y)))
+
+
+def thd(t, y, f0=None, harmonics=50, fraction=0.5):
+    """Total harmonic distortion in percent, over whole fundamental cycles of the steady state.
+
+    ``f0`` is the fundamental frequency; without it the strongest non-DC
+    component of the steady-state window is taken as the fundamental.
+    """
+    t, y = _arrays(t, y)
+    length = fraction * (t[-1] - t[0])
+    if f0 is None:
+        spectrum = _spectrum(t, y, length)
+        k = int(np.argmax(spectrum[1:])) + 1
+        f0 = k / length
+    if not f0 or f0 <= 0:
+        return math.nan
+    cycles = max(int(length * f0), 1)
+    spectrum = _spectrum(t, y, min(cycles / f0, t[-1] - t[0]))
+    # With whole cycles in the window the fundamental falls on bin ``cycles``
+    bins = cycles * np.arange(1, harmonics + 1)
+    bins = bins[bins < len(spectrum)]
+    fundamental = spectrum[bins[0]] if bins.size else 0.0
+    if not fundamental:
+        return math.nan
+    return 100.0 * float(np.sqrt(np.sum(spectrum[bins[1:]] ** 2)) / fundamental)
+
+
+def cycle_change(t, y, period, points=200):
+    """Largest sample-wise change of each full ``period`` from the one before.
+
+    Returns one value per cycle after the first, relative to the signal's
+    range (or its magnitude, for a flat signal) over the last cycle.
+    """
+    t, y = _arrays(t, y)
+    n_cycles = int((t[-1] - t[0]) / period + 1e-9)
+    if n_cycles < 2:
+        return np.empty(0)
+    grid = t[0] + np.arange(n_cycles * points) * (period / points)
+    cycles = np.interp(grid, t, y).reshape(n_cycles, points)
+    scale = max(np.ptp(cycles[-1]), np.abs(cycles[-1]).max(), 1e-300)
+    return np.abs(np.diff(cycles, axis=0)).max(axis=1) / scale
+
+
+def steady_state_time(t, y, period, tol=1e-3, cycles=3):
+    """Start of the first run of ``cycles`` cycles that each change less than ``tol``; NaN if none."""
+    change = cycle_change(t, y, period)
+    if change.size < cycles:
+        return math.nan
+    # settled[k]: cycles k+1 .. k+cycles all within tol of their predecessor
+    settled = np.convolve(change < tol, np.ones(cycles, dtype=int), mode="valid") == cycles
+    hits = np.flatnonzero(settled)
+    return float(np.asarray(t, dtype=np.float64)[0] + hits[0] * period) if hits.size else math.nan
@@ -0,0 +1,94 @@
+"""Backend-independent entry point for the super-capacitor LogTimes simulation."""
+import os
+
+import native_backend
+from instrumentation import span
+from matlab_transfer import to_numpy
+from model_session import system_name
+from parameter_set import ParameterSet
+from result_cache import run_kind
+
+BACKENDS = ("matlab", "native")
+# Cycle-to-cycle tolerance for stopping runs at steady state; 0 runs to the full horizon
+STEADY_TOL = float(os.environ.get("ABS_STEADY_TOL", "1e-3"))
+
+
+def log_times(C_val, model_name, workspace, backend="matlab", pool=None, cache=None, events=False,
+              steady_tol=None):
+    """Return ``(t_rise, deltaT, t, Vcap)`` for one capacitance.
+
+    ``backend="matlab"`` runs LogTimes.m on an engine checked out of ``pool``;
+    ``backend="native"`` uses the NumPy model in native_backend.py. With a
+    ``result_cache.ResultCache`` the simulation only runs on a cache miss.
+    ``events=True`` stops the run at the first 12 V crossing and interpolates
+    both crossing times; the returned trace then covers one cycle only.
+    ``steady_tol`` ends a native run once the charge/discharge cycle repeats
+    (LogTimes.m always runs to the model's StopTime).
+    """
+    steady_tol = steady_tol if backend == "native" and not events else None
+    if cache is None:
+        return _run(C_val, model_name, workspace, backend, pool, events, steady_tol)
+    with span("cache.get") as attrs:
+        key = cache.key(C_val, model_name, workspace, backend, events=events, steady_tol=steady_tol)
+        result = cache.get(key)
+        attrs["hit"] = result is not None
+    if result is None:
+        result = _run(C_val, model_name, workspace, backend, pool, events, steady_tol)
+        with span("cache.put"):
+            cache.put(key, result, C_val, model_name, workspace, backend, kind=run_kind(events, steady_tol))
+    return result
+
+
+def _run(C_val, model_name, workspace, backend, pool, events=False, steady_tol=None):
+    if backend == "native":
+        with span("native.simulate", C_val=C_val):
+            return native_backend.log_times(C_val, model_name, workspace, events=events, steady_tol=steady_tol)
+    if backend != "matlab":
+        raise ValueError(f"Unknown simulation backend {backend!r}; expected one of {BACKENDS}.")
+    if pool is None:
+        raise ValueError("The MATLAB backend needs an engine pool.")
+    params = ParameterSet(workspace).to_matlab()
+    with pool.session() as sessions:
+        eng = sessions.eng
+
+        def call():
+            # Parameters travel with the call, scoped to this run; the model stays
+            # compiled between calls unless a non-tunable value changed
+            with span("matlab.LogTimes", C_val=C_val, events=events):
+                return eng.LogTimes(C_val, model_name, bool(events), params, nargout=4)
+
+        t_rise, deltaT, t, Vcap = sessions.run(model_name, workspace, call)
+    with span("transfer") as attrs:
+        t, Vcap = to_numpy(t), to_numpy(Vcap)
+        attrs["bytes"] = t.nbytes + Vcap.nbytes
+    return float(t_rise), float(deltaT), t, Vcap
+
+
+def simulink_signals(model_file, params, signals, stop_time, pool, nontunable=(), period=None, steady_tol=None):
+    """Run a Simulink model and return ``(t, {name: y})`` for the named logged signals only.
+
+    ``params`` are scoped to this run (SimSignals.m); every signal is
+    resampled onto ``t``, and signals the model does not log are empty.
+    With ``period`` and ``steady_tol`` the run stops before ``stop_time`` once
+    every signal repeats from one period to the next within ``steady_tol``.
+    """
+    if pool is None:
+        raise ValueError("Simulink models need an engine pool.")
+    signals = list(signals)
+    matlab_params = ParameterSet(params).to_matlab()
+    with pool.session() as sessions:
+        eng = sessions.eng
+
+        def call():
+            with span("matlab.sim", model=model_file, signals=len(signals)):
+                if period and steady_tol:
+                    return eng.SimSignals(system_name(model_file), matlab_params, signals, float(stop_time),
+                                          float(period), float(steady_tol), nargout=2)
+                return eng.SimSignals(system_name(model_file), matlab_params, signals, float(stop_time), nargout=2)
+
+        t, values = sessions.run(model_file, params, call, nontunable=nontunable)
+    with span("transfer") as attrs:
+        t = to_numpy(t)
+        out = {name: to_numpy(y) for name, y in zip(signals, values)}
+        attrs["bytes"] = t.nbytes + sum(y.nbytes for y in out.values())
+    return t, out
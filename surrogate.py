@@ -0,0 +1,175 @@
+"""Surrogate model of Δt(C) and t_rise(C) fitted from earlier simulations.
+
+For a fixed model and current profile Δt and t_rise are smooth and nearly
+linear in C (sweep_log.txt), so a least-squares polynomial through the origin
+(linear below four points, quadratic from four) predicts them closely. The
+fit's error estimate is the RMS leave-one-out error of the predicted C.
+
+``SurrogateStore`` keeps one surrogate per (model, backend, workspace), seeds it
+from the result cache on first use and refits as new results are added. It
+only uses one run kind (``result_cache.run_kind``), by default the
+event-terminated runs the capacitor search makes. The
+"surrogate" search strategy in cap_search.py uses ``invert`` as its starting
+point and verifies it by simulating the predicted grid point and, if needed,
+its neighbour towards the target.
+
+Leave-one-out accuracy on the recorded Simulink sweep:
+
+    python surrogate.py sweep_log.txt
+"""
+import math
+import threading
+
+import numpy as np
+
+from result_cache import workspace_key
+
+
+def _fit(c, y, degree):
+    # Least squares for y = a*C (+ b*C^2): no constant term, Δt and t_rise vanish at C = 0
+    basis = np.column_stack([c ** (k + 1) for k in range(degree)])
+    coef, *_ = np.linalg.lstsq(basis, y, rcond=None)
+    return coef
+
+
+def _evaluate(coef, c):
+    c = np.asarray(c, dtype=np.float64)
+    return sum(a * c ** (k + 1) for k, a in enumerate(coef))
+
+
+def _invert(coef, target):
+    a = coef[0]
+    b = coef[1] if len(coef) > 1 else 0.0
+    if abs(b) < 1e-12 * max(abs(a), 1e-300):
+        return target / a if a > 0 else math.nan
+    disc = a * a + 4 * b * target
+    if disc < 0:
+        return math.nan
+    # Root of b*C^2 + a*C - target = 0 on the increasing branch
+    return 2 * target / (a + math.sqrt(disc))
+
+
+class Surrogate:
+    """Δt(C) / t_rise(C) fit over the points added so far."""
+
+    def __init__(self, points=()):
+        self._points = {}
+        self._fit = None
+        self._lock = threading.Lock()
+        for c, t_rise, delta_t in points:
+            self.add(c, t_rise, delta_t)
+
+    def add(self, c, t_rise, delta_t):
+        if not (c > 0 and math.isfinite(t_rise) and math.isfinite(delta_t)):
+            return
+        with self._lock:
+            self._points[round(float(c), 9)] = (float(t_rise), float(delta_t))
+            self._fit = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def _ensure_fit(self):
+        with self._lock:
+            if self._fit is None and self._points:
+                c = np.array(sorted(self._points))
+                t_rise = np.array([self._points[k][0] for k in c])
+                delta_t = np.array([self._points[k][1] for k in c])
+                degree = 2 if len(c) >= 4 else 1
+                dt_coef = _fit(c, delta_t, degree)
+                self._fit = {
+                    "dt": dt_coef,
+                    "t_rise": _fit(c, t_rise, degree),
+                    "c_err": self._loo_error(c, delta_t, degree),
+                    "range": (float(delta_t.min()), float(delta_t.max())),
+                }
+            return self._fit
+
+    @staticmethod
+    def _loo_error(c, delta_t, degree):
+        if len(c) <= degree:
+            return math.nan
+        errors = []
+        for i in range(len(c)):
+            mask = np.arange(len(c)) != i
+            errors.append(_invert(_fit(c[mask], delta_t[mask], degree), delta_t[i]) - c[i])
+        errors = np.array(errors)
+        errors = errors[np.isfinite(errors)]
+        return float(np.sqrt(np.mean(errors ** 2))) if errors.size else math.nan
+
+    def predict(self, c):
+        """``(t_rise, deltaT)`` at capacitance ``c``, or ``None`` without data."""
+        fit = self._ensure_fit()
+        if fit is None:
+            return None
+        return float(_evaluate(fit["t_rise"], c)), float(_evaluate(fit["dt"], c))
+
+    def invert(self, target_dt):
+        """``(C, C_err)`` for a target Δt, or ``None`` without data.
+
+        ``C_err`` is NaN until there are enough points to estimate it, and is
+        doubled when ``target_dt`` lies outside the Δt range seen so far.
+        """
+        fit = self._ensure_fit()
+        if fit is None:
+            return None
+        c = _invert(fit["dt"], target_dt)
+        if not math.isfinite(c) or c <= 0:
+            return None
+        c_err = fit["c_err"]
+        lo, hi = fit["range"]
+        if not lo <= target_dt <= hi:
+            c_err *= 2
+        return c, c_err
+
+
+def profile_key(model_name, workspace, backend):
+    # Same normalisation as the result cache, which seeds the surrogates
+    return model_name, backend, workspace_key(workspace)
+
+
+class SurrogateStore:
+    """One ``Surrogate`` per (model, backend, workspace), seeded from a ResultCache."""
+
+    def __init__(self, cache=None, kind="events"):
+        self.cache = cache
+        self.kind = kind
+        self._surrogates = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name, workspace, backend):
+        key = profile_key(model_name, workspace, backend)
+        with self._lock:
+            surrogate = self._surrogates.get(key)
+            if surrogate is None:
+                points = self.cache.points(model_name, workspace, backend, self.kind) if self.cache is not None else ()
+                surrogate = self._surrogates[key] = Surrogate(points)
+        return surrogate
+
+    def add(self, model_name, workspace, backend, c, t_rise, delta_t):
+        self.get(model_name, workspace, backend).add(c, t_rise, delta_t)
+
+
+def main():
+    import argparse
+    from native_backend import read_sweep_log
+
+    parser = argparse.ArgumentParser(description="Leave-one-out accuracy of the Δt(C) surrogate on a recorded sweep.")
+    parser.add_argument("sweep_log", nargs="?", default="sweep_log.txt")
+    args = parser.parse_args()
+    points = read_sweep_log(args.sweep_log)
+    print(f"{'C (F)':>8} {'Δt (s)':>8} {'predicted C':>12} {'error (F)':>10}")
+    worst = 0.0
+    for i, (c, dt) in enumerate(points):
+        others = Surrogate((ci, 0.0, dti) for j, (ci, dti) in enumerate(points) if j != i)
+        prediction = others.invert(dt)
+        c_pred = prediction[0] if prediction else math.nan
+        worst = max(worst, abs(c_pred - c))
+        print(f"{c:8.2f} {dt:8.4f} {c_pred:12.4f} {c_pred - c:+10.4f}")
+    full = Surrogate((c, 0.0, dt) for c, dt in points)
+    print(f"\n{len(points)} points; max |C error| = {worst:.4f} F; "
+          f"surrogate error estimate = ±{full.invert(points[0][1])[1]:.4f} F")
+
+
+if __name__ == "__main__":
+    main()
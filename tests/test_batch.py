@@ -0,0 +1,110 @@
+"""Design-point batches on the native backend and on StubEngine, per point and through parsim."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import native_backend as nb
+from batch import DEFAULT_DESIGN, design_grid, design_workspace, evaluate_design_points, normalise_points
+from engine_pool import EnginePool, StubEngine
+from result_cache import ResultCache
+
+MODELS = ["Week_5_day_4_original", "Week_6_day_4_original"]
+
+
+class CountingEngine(StubEngine):
+    """StubEngine that records its LogTimesBatch calls and fails for ``broken`` models."""
+
+    calls = []
+    broken = ()
+
+    def LogTimesBatch(self, model_name, C_vals, *args, nargout=2):
+        CountingEngine.calls.append((model_name, list(C_vals)))
+        if model_name in self.broken:
+            raise RuntimeError(f"parsim failed for {model_name}")
+        return super().LogTimesBatch(model_name, C_vals, *args, nargout=nargout)
+
+
+@pytest.fixture
+def engine():
+    CountingEngine.calls, CountingEngine.broken = [], ()
+    return CountingEngine
+
+
+def native(row):
+    return nb.log_times(float(row["C_val"]), row["model"], design_workspace(row))[:2]
+
+
+def test_design_grid_and_defaults():
+    points = normalise_points(design_grid(C_val=[10, 20], CurrentSource=[2.5, 4.0]))
+    assert len(points) == 4
+    assert list(points["CurrentSource"]) == [2.5, 4.0, 2.5, 4.0]
+    assert (points["model"] == DEFAULT_DESIGN["model"]).all()
+    # Missing values in a given column are filled too
+    assert normalise_points({"C_val": [1.0, 2.0], "SpikeTime": [0.05, None]})["SpikeTime"].tolist() == [0.05, 0.02]
+    with pytest.raises(ValueError):
+        normalise_points({"peak_current": [25.0]})
+
+
+def test_design_workspace():
+    row = normalise_points({"C_val": [10.0]}).iloc[0]
+    assert design_workspace(row)["OnTime"] == pytest.approx(20.0)
+    assert design_workspace({**row, "periodic": False})["OnTime"] == 1000.0
+
+
+def test_native_results_and_errors(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    points = pd.DataFrame({"C_val": [10.0, -1.0, 20.0], "model": [MODELS[0], MODELS[0], MODELS[1]]})
+    results = evaluate_design_points(points, max_workers=1, cache=cache)
+    assert list(results.index) == [0, 1, 2]
+    for index in (0, 2):
+        assert (results.loc[index, "t_rise"], results.loc[index, "deltaT"]) == native(results.loc[index])
+    assert "positive" in results.loc[1, "error"] and np.isnan(results.loc[1, "deltaT"])
+    assert cache.stats()["entries"] == 2
+
+
+def test_native_process_pool_keeps_row_order():
+    points = design_grid(C_val=[5.0, 10.0, 15.0, 20.0], model=MODELS)
+    results = evaluate_design_points(points, max_workers=2)
+    assert list(results["C_val"]) == list(points["C_val"])
+    assert [tuple(r) for r in results[["t_rise", "deltaT"]].to_numpy()] == [native(r) for _, r in results.iterrows()]
+
+
+def test_matlab_per_point_matches_native(engine):
+    pool = EnginePool(size=2, factory=engine)
+    results = evaluate_design_points(design_grid(C_val=[10.0, 20.0]), backend="matlab", pool=pool)
+    assert [tuple(r) for r in results[["t_rise", "deltaT"]].to_numpy()] == [native(r) for _, r in results.iterrows()]
+    assert engine.calls == []
+
+
+def test_parsim_one_call_per_model(engine, tmp_path):
+    pool = EnginePool(size=1, factory=engine)
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    points = design_grid(model=MODELS, C_val=[10.0, 20.0, 30.0])
+    results = evaluate_design_points(points, backend="matlab", pool=pool, cache=cache, parsim=True)
+    assert sorted(engine.calls) == [(model, [10.0, 20.0, 30.0]) for model in MODELS]
+    for _, row in results.iterrows():
+        assert (row["t_rise"], row["deltaT"]) == pytest.approx(native(row))
+    # Cached as scalars: a rerun with one new point only sends that point
+    engine.calls.clear()
+    points = pd.concat([points, pd.DataFrame({"model": [MODELS[0]], "C_val": [40.0]})], ignore_index=True)
+    results = evaluate_design_points(points, backend="matlab", pool=pool, cache=cache, parsim=True)
+    assert engine.calls == [(MODELS[0], [40.0])]
+    assert results["error"].isna().all()
+
+
+def test_parsim_failure_stays_with_its_model(engine):
+    engine.broken = (MODELS[1],)
+    pool = EnginePool(size=1, factory=engine)
+    results = evaluate_design_points(design_grid(model=MODELS, C_val=[10.0, 20.0]), backend="matlab", pool=pool,
+                                     parsim=True)
+    failed = results["model"] == MODELS[1]
+    assert results.loc[failed, "error"].str.contains("parsim failed").all()
+    assert results.loc[~failed, "error"].isna().all()
+    assert results.loc[~failed, "deltaT"].notna().all()
+
+
+def test_backend_errors():
+    with pytest.raises(ValueError):
+        evaluate_design_points({"C_val": [10.0]}, backend="matlab")
+    with pytest.raises(ValueError):
+        evaluate_design_points({"C_val": [10.0]}, backend="spice")
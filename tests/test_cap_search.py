@@ -0,0 +1,111 @@
+"""Every capacitance search strategy on the native backend."""
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import cap_search
+import native_backend as nb
+from surrogate import Surrogate
+
+MODEL = "Week_5_day_4_original"
+C_MIN, C_MAX = 0.1, 60.0
+TOL_DT = 0.01
+
+
+@functools.lru_cache(maxsize=None)
+def evaluate(C_val):
+    # Search runs stop at the first 12 V crossing, as in the app
+    return nb.log_times(C_val, MODEL, nb.SWEEP_LOG_WORKSPACE, events=True)
+
+
+def reference_surrogate():
+    return Surrogate([(c, *evaluate(c)[:2]) for c in (5.0, 10.0, 20.0, 30.0, 40.0)])
+
+
+@pytest.mark.parametrize("strategy", sorted(cap_search.STRATEGIES))
+@pytest.mark.parametrize("target_dt, cap_tol", [(5.3, 0.01), (11.7, 0.05), (2.0, 0.001)])
+def test_strategy_converges(strategy, target_dt, cap_tol):
+    options = {"predict": reference_surrogate().invert} if strategy == "surrogate" else {}
+    result = cap_search.run_search(strategy, evaluate, target_dt, C_MIN, C_MAX, TOL_DT, cap_tol, **options)
+    assert result.error is None
+    assert result.converged
+    assert abs(result.best_dt - target_dt) <= TOL_DT
+    assert result.n_sims == len(result.probes)
+    for c, _ in result.probes:
+        assert C_MIN < c < C_MAX
+        # Snapped to the grid exactly, so repeated probes share cache keys
+        assert c == round(c, cap_search.grid_digits(cap_tol))
+
+
+def test_strategies_agree():
+    found = {name: cap_search.run_search(name, evaluate, 5.3, C_MIN, C_MAX, TOL_DT, 0.01,
+                                         **({"predict": reference_surrogate().invert} if name == "surrogate" else {}))
+             for name in cap_search.STRATEGIES}
+    cs = [r.best_c for r in found.values()]
+    # Δt rises about 0.27 s per farad, so TOL_DT allows a few grid steps either way
+    assert max(cs) - min(cs) <= 0.1
+
+
+def test_surrogate_verifies_in_two_simulations():
+    surrogate = reference_surrogate()
+    for target_dt in (2.0, 5.3, 11.7):
+        result = cap_search.surrogate_search(evaluate, target_dt, C_MIN, C_MAX, TOL_DT, 0.01,
+                                             predict=surrogate.invert)
+        assert result.converged
+        assert result.n_sims <= 2
+        if result.n_sims == 2:
+            (c0, _), (c1, _) = result.probes
+            assert abs(c1 - c0) == pytest.approx(0.01)
+
+
+def test_surrogate_without_prediction_is_brent():
+    brent = cap_search.brent_search(evaluate, 5.3, C_MIN, C_MAX, TOL_DT, 0.01)
+    plain = cap_search.surrogate_search(evaluate, 5.3, C_MIN, C_MAX, TOL_DT, 0.01)
+    assert plain.probes == brent.probes
+
+
+def test_kary_waits_for_running_probes():
+    cs = cap_search.kary_probes(C_MIN, C_MAX, 4, 0.01)
+    running, finished, lock = set(), [], threading.Lock()
+
+    def linear(c):
+        with lock:
+            running.add(c)
+        if c != cs[0]:
+            time.sleep(0.2)
+        with lock:
+            running.discard(c)
+            finished.append(c)
+        return 0.0, c, np.zeros(2), np.zeros(2)
+
+    # The first probe hits the target at once; the other three are still running
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        result = cap_search.kary_search(linear, cs[0], C_MIN, C_MAX, TOL_DT, 0.01, executor=executor, probes=4)
+        assert not running
+    assert result.converged and result.best_c == cs[0]
+    assert sorted(finished) == sorted(cs)
+    assert result.n_sims == 1
+
+
+def test_unreachable_target_reports_best_end():
+    result = cap_search.brent_search(evaluate, 1000.0, C_MIN, C_MAX, TOL_DT, 0.01)
+    assert not result.converged
+    assert result.best_c == pytest.approx(C_MAX - 0.01)
+
+
+@pytest.mark.parametrize("cap_tol, digits", [(0.05, 2), (0.001, 3), (2, 0), (0.1, 1), (1e-4, 4)])
+def test_grid_digits(cap_tol, digits):
+    assert cap_search.grid_digits(cap_tol) == digits
+
+
+def test_snap_has_no_float_noise():
+    assert cap_search.snap(33.6612, 0.01, 0.0, 60.0) == 33.66
+    assert cap_search.snap(33.6612, 0.01, 0.0, 60.0, mode="nearest") == 33.66
+    assert repr(cap_search.snap(0.3, 0.1, 0.0, 1.0, mode="nearest")) == "0.3"
+    # Kept strictly inside the bracket
+    assert cap_search.snap(10.0, 0.5, 10.0, 20.0) == 10.5
+    assert cap_search.snap(20.0, 0.5, 10.0, 20.0, mode="nearest") == 19.5
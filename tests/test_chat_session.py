@@ -0,0 +1,106 @@
+"""Chat prompts: the token budget, a stable prefix and streamed replies."""
+import os
+import subprocess
+import sys
+
+from chat_session import NO_CONTEXT, STOP, ChatSession
+from instrumentation import activate, new_trace_id, spans
+from llm_server import StubLLM
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def words(text):
+    return len(text.split())
+
+
+def session(budget=100):
+    return ChatSession(count_tokens=words, history_tokens=budget, system="System prompt.")
+
+
+class RecordingLLM(StubLLM):
+    """StubLLM that keeps the prompts and options it was given."""
+
+    def __init__(self, supports_prefix=False):
+        super().__init__()
+        self.supports_prefix = supports_prefix
+        self.calls = []
+
+    def stream(self, prompt, **options):
+        self.calls.append((prompt, options))
+        yield from super().stream(prompt, **options)
+
+
+def test_history_is_trimmed_to_half_the_budget_at_once():
+    chat = session(budget=100)
+    turn = ("q " * 9, "a " * 9)  # 20 words with the "User:"/"Assistant:" labels
+    for _ in range(5):
+        chat.add_turn(*turn)
+    assert chat.history_size() == 100 and chat.dropped == 0
+    chat.add_turn(*turn)
+    # 120 > 100: down to at most 50, not just back under 100
+    assert chat.history_size() == 40 and len(chat.turns) == 2
+    assert chat.dropped == 4
+    # Then several turns go by before the next drop
+    for _ in range(3):
+        chat.add_turn(*turn)
+    assert chat.dropped == 4
+
+
+def test_a_turn_over_the_budget_is_dropped_too():
+    chat = session(budget=10)
+    chat.add_turn("long " * 20, "reply")
+    assert chat.turns == [] and chat.dropped == 1
+    assert "(1 earlier exchanges omitted)" in chat.prompt("next")
+
+
+def test_budget_from_the_environment():
+    env = {**os.environ, "ABS_CHAT_HISTORY_TOKENS": "256", "ABS_CHAT_PAST_RESULTS": "5"}
+    code = "import chat_session as c; print(c.ChatSession().history_tokens, c.PAST_RESULTS)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["256", "5"]
+
+
+def test_prompt_layout():
+    chat = session()
+    assert chat.prompt("hi") == f"System prompt.\n\n{NO_CONTEXT}\n\nUser: hi\nAssistant:"
+    chat.add_turn("hi", "hello")
+    prompt = chat.prompt("on time?", reference="Past result: 22.5 F")
+    assert prompt.startswith(chat.prefix())
+    assert prompt.endswith("User: hi\nAssistant: hello\nPast result: 22.5 F\nUser: on time?\nAssistant:")
+
+
+def test_context_changes_only_the_prefix():
+    chat = session()
+    assert not chat.set_context(None)
+    assert chat.set_context("C_val = 22.5 F")
+    assert not chat.set_context("C_val = 22.5 F")
+    assert chat.context_version == 1
+    assert chat.prefix() == "System prompt.\n\nC_val = 22.5 F\n\n"
+
+
+def test_stream_yields_chunks_and_stores_the_turn():
+    chat, llm = session(), RecordingLLM()
+    chat.add_turn("hi", "hello")
+    trace = new_trace_id()
+    with activate(trace):
+        chunks = list(chat.stream(llm, "what is the on time?", reference="Past result: 22.5 F"))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "Stub reply to: what is the on time?"
+    assert chat.turns[-1][:2] == ("what is the on time?", "Stub reply to: what is the on time?")
+    # The reference was in the prompt but is not kept in the history
+    prompt, options = llm.calls[0]
+    assert "Past result" in prompt and "Past result" not in chat.prompt("next")
+    assert options == {"stop": STOP}
+    first, turn = spans(trace)
+    assert (first["name"], turn["name"]) == ("chat.first_token", "chat.turn")
+    assert turn["attrs"]["history_turns"] == 1 and turn["attrs"]["reply_chars"] == len("".join(chunks))
+    assert 0 <= chat.last["first_token"] <= chat.last["turn"]
+
+
+def test_prefix_is_passed_to_servers_that_cache_it():
+    chat, llm = session(), RecordingLLM(supports_prefix=True)
+    chat.set_context("C_val = 22.5 F")
+    list(chat.stream(llm, "hi"))
+    prompt, options = llm.calls[0]
+    assert options["prefix"] == chat.prefix() and prompt.startswith(options["prefix"])
@@ -0,0 +1,78 @@
+"""CurrentProfile against the per-sample loop it replaced in the apps' plot_current_profile."""
+import numpy as np
+import pytest
+
+from current_profile import CurrentProfile, current_profile
+
+
+def loop_profile(periodic, time_period, spike_time, peak_current, static_current, duration=1.0, sample_rate=10000):
+    t = np.linspace(0, duration, int(duration * sample_rate))
+    current = np.zeros_like(t)
+    if periodic == "Periodic":
+        for i in range(len(t)):
+            t_mod = t[i] % time_period
+            current[i] = peak_current if t_mod <= spike_time else static_current
+    else:
+        current[:] = static_current
+        current[t <= spike_time] = peak_current
+    return t, current
+
+
+PULSES = [
+    ("Periodic", 0.1, 0.02, 25.0, 10.0),
+    ("Periodic", 0.1, 0.05, 30.0, 2.5),
+    ("Periodic", 0.03, 0.01, 40.0, 0.0),
+    ("Periodic", 0.1, 0.1, 25.0, 10.0),    # spike fills the period
+    ("Periodic", 0.1, 0.25, 25.0, 10.0),   # spike longer than the period
+    ("Non-Periodic", 0.1, 0.02, 25.0, 10.0),
+    ("Non-Periodic", 0.1, 0.6, 25.0, 10.0),
+]
+
+
+@pytest.mark.parametrize("pulse", PULSES)
+@pytest.mark.parametrize("duration, sample_rate", [(1.0, 10000), (2.5, 1000)])
+def test_matches_loop(pulse, duration, sample_rate):
+    t_old, i_old = loop_profile(*pulse, duration=duration, sample_rate=sample_rate)
+    t_new, i_new = current_profile(*pulse, duration=duration, sample_rate=sample_rate)
+    np.testing.assert_array_equal(t_new, t_old)
+    np.testing.assert_array_equal(i_new, i_old)
+
+
+def test_sample_is_cached_and_read_only():
+    profile = CurrentProfile.from_pulse(True, 0.1, 0.02, 25.0, 10.0)
+    t, current = profile.sample()
+    assert profile.sample()[1] is current
+    with pytest.raises(ValueError):
+        current[0] = 0.0
+
+
+def test_mean():
+    assert CurrentProfile.from_pulse(True, 0.1, 0.02, 25.0, 10.0).mean() == pytest.approx(13.0)
+    assert CurrentProfile.from_pulse(False, 0.1, 0.02, 25.0, 10.0).mean() == 10.0
+
+
+# 1 ms tiles one period, sampled at midpoints as native_backend does; 7e-4 s does not divide it
+@pytest.mark.parametrize("dt, offset", [(1e-3, 0.5), (7e-4, 0.5), (7e-4, 0.0)])
+def test_grid_matches_at(dt, offset):
+    profile = CurrentProfile.from_pulse(True, 0.1, 0.02, 25.0, 10.0)
+    n = 5000
+    np.testing.assert_array_equal(profile.grid(n, dt, offset), profile.at((np.arange(n) + offset) * dt))
+
+
+def test_chunks_cover_the_sample_grid():
+    profile = CurrentProfile.from_pulse(True, 0.1, 0.02, 25.0, 10.0)
+    t, current = profile.sample(3.0, 1000)
+    pieces = list(profile.chunks(3.0, 1000, chunk_size=700))
+    assert len(pieces) == 5
+    np.testing.assert_allclose(np.concatenate([p[0] for p in pieces]), t, rtol=1e-12)
+    np.testing.assert_array_equal(np.concatenate([p[1] for p in pieces]), current)
+
+
+def test_steps_draw_the_same_square_wave():
+    profile = CurrentProfile.from_pulse(True, 0.1, 0.02, 25.0, 10.0)
+    corners_t, corners_i = profile.steps(1.0)
+    t, current = profile.sample(1.0, 10000)
+    # Away from the edges, the corner polyline has the sampled level
+    inside = np.abs(((t + 1e-9) % 0.1) - 0.02) > 1e-3
+    inside &= np.abs(((t + 1e-9) % 0.1)) > 1e-3
+    np.testing.assert_array_equal(np.interp(t[inside], corners_t, corners_i), current[inside])
@@ -0,0 +1,65 @@
+"""Plot decimation keeps the envelope and every threshold crossing."""
+import numpy as np
+import pytest
+
+import native_backend as nb
+from decimate import crossing_indices, decimate, page_bounds
+
+
+@pytest.fixture(scope="module")
+def trace():
+    _, _, t, v = nb.log_times(10.0, "Week_5_day_4_original", nb.SWEEP_LOG_WORKSPACE)
+    return t, v
+
+
+def test_short_traces_are_only_cut():
+    t = np.linspace(0, 10, 101)
+    out_t, out_y = decimate(t, t ** 2, x_range=(2.0, 4.0), width_px=100)
+    # One sample beyond each end of the range
+    assert out_t[0] == pytest.approx(1.9) and out_t[-1] == pytest.approx(4.1)
+    np.testing.assert_array_equal(out_y, out_t ** 2)
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_size_and_endpoints(trace, method):
+    t, v = trace
+    out_t, out_y = decimate(t, v, width_px=600, method=method)
+    assert len(out_t) <= 2 * 600 + 2 + len(crossing_indices(v, ()))
+    assert out_t[0] == t[0] and out_t[-1] == t[-1]
+    assert np.all(np.diff(out_t) > 0)
+    # Every kept point is an original sample
+    idx = np.searchsorted(t, out_t)
+    np.testing.assert_array_equal(v[idx], out_y)
+
+
+def test_minmax_keeps_the_envelope(trace):
+    t, v = trace
+    window = (30.0, 60.0)
+    out_t, out_y = decimate(t, v, x_range=window, width_px=300)
+    inside = (t >= out_t[0]) & (t <= out_t[-1])  # the range plus one sample either side
+    assert out_y.max() == v[inside].max()
+    assert out_y.min() == v[inside].min()
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_threshold_crossings_survive(trace, method):
+    t, v = trace
+    levels = (nb.V_HIGH, nb.V_LOW)
+    out_t, out_y = decimate(t, v, width_px=200, method=method, levels=levels)
+    kept = set(np.searchsorted(t, out_t).tolist())
+    assert set(crossing_indices(v, levels).tolist()) <= kept
+    # threshold_times on the decimated trace gives the full-resolution answer
+    assert nb.threshold_times(out_t, out_y) == nb.threshold_times(t, v)
+
+
+def test_unknown_method():
+    t = np.arange(10000.0)
+    with pytest.raises(ValueError):
+        decimate(t, t, width_px=100, method="every-nth")
+
+
+def test_page_bounds():
+    assert page_bounds(0, 1, 50) == (0, 0, 1)
+    assert page_bounds(120, 3, 50) == (100, 120, 3)
+    assert page_bounds(120, 9, 50) == (100, 120, 3)
+    assert page_bounds(120, 0, 50) == (0, 50, 3)
@@ -0,0 +1,131 @@
+"""The warm engine pool on StubEngine."""
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine_pool
+import native_backend as nb
+import simulation
+from engine_pool import EnginePool, StubEngine, pool_from_env
+
+MODEL = "Week_5_day_4_original"
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_engines_are_reused():
+    pool = EnginePool(size=2, factory=StubEngine)
+    with pool.engine() as first:
+        pass
+    with pool.engine() as second:
+        assert second is first
+    stats = pool.stats()
+    assert (stats["created"], stats["checkouts"], stats["in_use"]) == (1, 2, 0)
+
+
+def test_size_limits_concurrent_checkouts():
+    pool = EnginePool(size=1, factory=StubEngine)
+    held = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+    pool.release(held)
+    assert pool.checkout(timeout=0.05) is held
+
+
+def test_concurrent_sessions_never_share_an_engine():
+    pool = EnginePool(size=3, factory=StubEngine)
+    in_use, overlaps, lock = set(), [], threading.Lock()
+
+    def run(_):
+        with pool.engine() as eng:
+            with lock:
+                overlaps.append(id(eng) in in_use)
+                in_use.add(id(eng))
+            threading.Event().wait(0.01)
+            with lock:
+                in_use.discard(id(eng))
+
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        list(ex.map(run, range(30)))
+    assert not any(overlaps)
+    assert pool.stats()["created"] <= 3
+
+
+def test_recycles_after_max_uses():
+    pool = EnginePool(size=1, factory=StubEngine, max_uses=2)
+    engines = []
+    for _ in range(3):
+        with pool.engine() as eng:
+            engines.append(eng)
+    assert engines[0] is engines[1]
+    assert engines[2] is not engines[0]
+    assert engines[0].closed
+    assert pool.stats()["recycled"] == 1
+
+
+def test_dead_engine_is_replaced_on_checkout():
+    pool = EnginePool(size=1, factory=StubEngine)
+    with pool.engine() as eng:
+        pass
+    eng.quit()
+    with pool.engine() as replacement:
+        assert replacement is not eng
+    assert pool.stats()["failed_health"] == 1
+
+
+def test_factory_failure_frees_the_slot():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("licence checkout failed")
+        return StubEngine()
+
+    pool = EnginePool(size=1, factory=flaky)
+    with pytest.raises(RuntimeError):
+        pool.checkout()
+    assert pool.stats()["created"] == 0
+    with pool.engine() as eng:
+        assert isinstance(eng, StubEngine)
+
+
+def test_prewarm_fills_the_pool():
+    pool = EnginePool(size=3, factory=StubEngine)
+    assert pool.prewarm() == 3
+    assert pool.stats()["idle"] == 3
+    assert pool.prewarm() == 0
+    pool.close()
+    assert pool.stats()["created"] == 0
+
+
+def test_log_times_through_the_pool_matches_native():
+    pool = EnginePool(size=2, factory=StubEngine)
+    ws = nb.SWEEP_LOG_WORKSPACE
+    t_rise, deltaT, t, vcap = simulation.log_times(10.0, MODEL, ws, backend="matlab", pool=pool)
+    native = nb.log_times(10.0, MODEL, ws)
+    assert (t_rise, deltaT) == native[:2]
+    assert t.ndim == 1 and len(t) == len(native[2])
+
+
+def test_pool_from_env(monkeypatch):
+    monkeypatch.setenv("ABS_ENGINE_BACKEND", "stub")
+    monkeypatch.setenv("ABS_ENGINE_POOL_SIZE", "2")
+    monkeypatch.setenv("ABS_ENGINE_MAX_USES", "7")
+    monkeypatch.setenv("ABS_ENGINE_PREWARM", "0")
+    pool = pool_from_env()
+    assert (pool.size, pool.max_uses, pool.factory) == (2, 7, StubEngine)
+    assert pool.stats()["created"] == 0
+
+
+def test_matlab_paths_from_env():
+    code = "import engine_pool, json; print(json.dumps(engine_pool.MATLAB_PATHS))"
+    env = {**os.environ, "ABS_MATLAB_PATHS": os.pathsep.join(["/models", "", "/scripts"])}
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == [REPO, "/models", "/scripts"]
+    # The repository folder always comes first
+    assert engine_pool.MATLAB_PATHS[0] == REPO
@@ -0,0 +1,92 @@
+"""Timing spans, their histograms and the Prometheus export."""
+import os
+import re
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import instrumentation
+from instrumentation import BUCKETS, activate, new_trace_id, prometheus_text, span, spans, to_jsonl, totals
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_spans_nest_and_carry_the_trace():
+    trace = new_trace_id()
+    with activate(trace):
+        with span("test.job", C_val=10.0) as attrs:
+            with span("test.sim"):
+                pass
+            attrs["hit"] = False
+    outer, inner = spans(trace)[::-1]
+    assert (outer["name"], inner["name"]) == ("test.job", "test.sim")
+    assert inner["parent"] == outer["id"] and outer["parent"] is None
+    assert outer["attrs"] == {"C_val": 10.0, "hit": False}
+    assert outer["seconds"] >= inner["seconds"] >= 0
+
+
+def test_worker_threads_reactivate_the_trace():
+    trace = new_trace_id()
+
+    def probe():
+        with activate(trace), span("test.probe"):
+            pass
+
+    threads = [threading.Thread(target=probe) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(spans(trace)) == 4
+    # The trace is only active inside activate()
+    with span("test.untraced"):
+        pass
+    assert spans()[-1]["trace"] is None
+
+
+def test_errors_are_recorded_and_raised():
+    with pytest.raises(KeyError):
+        with span("test.failing"):
+            raise KeyError("Vout")
+    assert spans()[-1]["attrs"] == {"error": "KeyError"}
+
+
+def test_histogram_buckets_are_cumulative():
+    name = f"test.buckets.{new_trace_id()}"
+    for seconds in (0.0005, 0.003, 0.2, 100.0):
+        instrumentation._store({"trace": None, "id": "x", "parent": None, "name": name, "start": 0.0,
+                                "seconds": seconds, "attrs": {}})
+    entry = totals()[name]
+    assert entry["count"] == 4 and entry["sum"] == pytest.approx(100.2035)
+    expected = [sum(s <= bound for s in (0.0005, 0.003, 0.2, 100.0)) for bound in BUCKETS]
+    assert entry["buckets"] == expected
+    assert entry["buckets"][-1] == entry["count"]
+
+
+def test_prometheus_text():
+    text = prometheus_text({"matlab.sim": {"count": 2, "sum": 1.5, "buckets": [0] * 6 + [1, 2, 2, 2, 2]}})
+    lines = text.splitlines()
+    assert lines[:2] == ["# HELP abs_phase_seconds Duration of each simulation phase.",
+                         "# TYPE abs_phase_seconds histogram"]
+    assert 'abs_phase_seconds_bucket{phase="matlab.sim",le="0.5"} 0' in lines
+    assert 'abs_phase_seconds_bucket{phase="matlab.sim",le="1.0"} 1' in lines
+    assert lines[-3] == 'abs_phase_seconds_bucket{phase="matlab.sim",le="+Inf"} 2'
+    assert lines[-2:] == ['abs_phase_seconds_sum{phase="matlab.sim"} 1.500000',
+                          'abs_phase_seconds_count{phase="matlab.sim"} 2']
+    sample = re.compile(r'^abs_phase_seconds_(bucket|sum|count)\{phase="[^"]+"(,le="[^"]+")?\} [0-9.e+-]+$')
+    assert all(sample.match(line) for line in lines[2:])
+
+
+def test_trace_file_to_prometheus(tmp_path):
+    trace_file, prom = tmp_path / "trace.jsonl", tmp_path / "metrics.prom"
+    records = [{"name": "cache.get", "seconds": 0.002}, {"name": "cache.get", "seconds": 0.02},
+               {"name": "matlab.LogTimes", "seconds": 3.0}]
+    trace_file.write_text(to_jsonl(records) + "\n")
+    out = subprocess.run([sys.executable, "instrumentation.py", str(trace_file), "--prometheus", str(prom)],
+                         cwd=REPO, capture_output=True, text=True, check=True)
+    assert out.stdout.splitlines()[1].split()[:3] == ["matlab.LogTimes", "1", "3.000"]
+    text = prom.read_text()
+    assert 'abs_phase_seconds_bucket{phase="cache.get",le="0.005"} 1' in text
+    assert 'abs_phase_seconds_count{phase="cache.get"} 2' in text
@@ -0,0 +1,88 @@
+"""Background jobs: status, progress, failures, cancelling and history."""
+import threading
+
+import pytest
+
+from job_queue import JobQueue, queue_from_env
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=1, history=3)
+    yield queue
+    queue.close()
+
+
+def test_result_and_progress(queue):
+    def simulate(C_val, progress, scale=1.0):
+        progress("Simulating…")
+        for c in (C_val, 2 * C_val):
+            progress(partial=(c, c * scale))
+        return C_val * scale
+
+    job_id = queue.submit(simulate, 10.0, scale=0.5, label="Compute times", params={"mode": "times"})
+    job = queue.wait(job_id, timeout=5)
+    assert (job.status, job.result, job.error) == ("done", 5.0, None)
+    assert job.message == "Simulating…"
+    assert job.partial == [(10.0, 5.0), (20.0, 10.0)]
+    assert job.label == "Compute times" and job.params == {"mode": "times"}
+    assert job.finished >= job.started >= job.submitted
+
+
+def test_failure_is_recorded(queue):
+    def broken(progress):
+        raise RuntimeError("MATLAB computation failed")
+
+    job = queue.wait(queue.submit(broken), timeout=5)
+    assert job.status == "failed"
+    assert job.error == "MATLAB computation failed"
+    assert job.label == "broken"
+
+
+def test_running_then_queued_job_cancelled(queue):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(progress):
+        started.set()
+        release.wait(5)
+        return "first"
+
+    first = queue.submit(blocking)
+    second = queue.submit(lambda progress: "second")
+    assert started.wait(5)
+    assert queue.get(first).status == "running"
+    assert queue.get(second).status == "queued"
+    assert queue.stats()["queued"] == 1
+    # Only a job that has not started can be cancelled
+    assert not queue.cancel(first)
+    assert queue.cancel(second)
+    release.set()
+    assert queue.wait(first, timeout=5).result == "first"
+    assert queue.wait(second, timeout=5).status == "cancelled"
+
+
+def test_history_keeps_recent_finished_jobs(queue):
+    ids = [queue.submit(lambda progress, i=i: i) for i in range(5)]
+    for job_id in ids:
+        queue.wait(job_id, timeout=5)
+    queue.submit(lambda progress: None)
+    kept = [job.id for job in queue.jobs()]
+    # The three most recent finished jobs plus the new one, newest first
+    assert kept[1:] == ids[:1:-1][:3]
+    assert queue.get(ids[0]) is None
+
+
+def test_many_quick_jobs_all_finish():
+    queue = JobQueue(max_workers=4, history=200)
+    ids = [queue.submit(lambda progress, i=i: i * i) for i in range(100)]
+    assert [queue.wait(job_id, timeout=5).result for job_id in ids] == [i * i for i in range(100)]
+    assert queue.stats()["done"] == 100
+    queue.close()
+
+
+def test_queue_from_env(monkeypatch):
+    monkeypatch.setenv("ABS_JOB_WORKERS", "3")
+    monkeypatch.setenv("ABS_JOB_HISTORY", "7")
+    queue = queue_from_env()
+    assert (queue.max_workers, queue.history, queue.stats()["workers"]) == (3, 7, 3)
+    queue.close()
@@ -0,0 +1,106 @@
+"""The inference worker over HTTP, with StubLLM in place of the model."""
+import threading
+import time
+import urllib.error
+
+import pytest
+
+from llm_server import InferenceWorker, LLMClient, StubLLM, make_server
+
+
+class GatedLLM(StubLLM):
+    """StubLLM that holds its slot until ``release`` is set."""
+
+    def __init__(self, release):
+        super().__init__()
+        self.release = release
+
+    def stream(self, prompt, **options):
+        self.release.wait(10)
+        yield from super().stream(prompt, **options)
+
+
+class FailingLLM(StubLLM):
+    def stream(self, prompt, **options):
+        yield "partial"
+        raise ValueError("context overflow")
+
+
+def serve(worker):
+    server = make_server(worker, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, LLMClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=10)
+
+
+@pytest.fixture
+def stub_worker():
+    worker = InferenceWorker(StubLLM, slots=2, queue_size=4, name="stub")
+    server, client = serve(worker)
+    yield worker, client
+    server.shutdown()
+    worker.close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_streamed_reply(stub_worker):
+    _, client = stub_worker
+    chunks = list(client.stream("System\nUser: what is the on time?\nAssistant:"))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "Stub reply to: what is the on time?"
+
+
+def test_tokenize(stub_worker):
+    _, client = stub_worker
+    assert client.get_num_tokens("one two three") == 3
+
+
+def test_health_counters(stub_worker):
+    _, client = stub_worker
+    for i in range(3):
+        list(client.stream(f"User: question {i}"))
+    health = client.health()
+    assert health["status"] == "ok"
+    assert health["model"] == "stub"
+    assert health["slots"] == 2
+    assert health["served"] == 3
+    assert health["failed"] == health["rejected"] == health["busy"] == 0
+    assert health["tokens"] == 3 * len("Stub reply to: question 0".split())
+
+
+def test_queue_full_answers_503():
+    release = threading.Event()
+    worker = InferenceWorker(lambda: GatedLLM(release), slots=1, queue_size=1, name="stub")
+    server, client = serve(worker)
+    try:
+        running = worker.submit("User: first")
+        wait_for(lambda: worker.health()["busy"] == 1)
+        queued = worker.submit("User: second")
+        with pytest.raises(urllib.error.HTTPError) as info:
+            list(client.stream("User: third"))
+        assert info.value.code == 503
+        assert client.health()["rejected"] == 1
+        release.set()
+        wait_for(lambda: worker.health()["served"] == 2)
+        assert running.started is not None and queued.started is not None
+    finally:
+        release.set()
+        server.shutdown()
+        worker.close()
+
+
+def test_worker_error_raises_runtime_error():
+    worker = InferenceWorker(FailingLLM, slots=1, name="stub")
+    server, client = serve(worker)
+    try:
+        with pytest.raises(RuntimeError, match="context overflow"):
+            list(client.stream("User: hello"))
+        assert client.health()["failed"] == 1
+    finally:
+        server.shutdown()
+        worker.close()
@@ -0,0 +1,60 @@
+"""Which registered Simulink models can run with the .slx files at hand."""
+import zipfile
+
+import pytest
+
+import model_registry
+from matlab_paths import logged_names
+from model_registry import MODELS, TABS, model_status
+
+RLC = MODELS["RLC Output Filter (Sine Wave)"]
+
+
+def write_slx(path, to_workspace=(), lines=(), diagram=True):
+    blocks = "".join(f'<Block BlockType="ToWorkspace"><P Name="VariableName">{v}</P></Block>' for v in to_workspace)
+    wires = "".join(f'<Line><P Name="Name">{n}</P><P Name="Src">1#out:1</P></Line>' for n in lines)
+    with zipfile.ZipFile(path, "w") as slx:
+        if diagram:
+            slx.writestr("simulink/blockdiagram.xml", '<ModelInformation><Model Name="m"/></ModelInformation>')
+            slx.writestr("simulink/systems/system_root.xml", f"<System>{blocks}{wires}</System>")
+        else:
+            # What a Simulink cache archive holds instead
+            slx.writestr("info/masterInformation.xml", "<info/>")
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ABS_MODEL_DIRS", str(tmp_path))
+    return tmp_path
+
+
+def test_baseline_tabs_are_always_offered():
+    assert TABS == ["3-Phase Diode Rectifier", "IGBTs with RC Snubbers", "PMSM Model", "RLC Sine Wave Filter"]
+
+
+def test_missing_file(model_dir):
+    assert model_status(RLC).startswith("Model file not found")
+
+
+def test_cache_archive_is_not_a_model(model_dir):
+    write_slx(model_dir / RLC.file, diagram=False)
+    assert logged_names(str(model_dir / RLC.file)) is None
+    assert "not a Simulink model" in model_status(RLC)
+
+
+def test_model_must_log_a_declared_signal(model_dir):
+    write_slx(model_dir / RLC.file, to_workspace=["VcapLog", "cross12"])
+    assert "logs none of this model's signals" in model_status(RLC)
+    assert not model_registry.available(RLC)
+
+
+def test_to_workspace_and_signal_lines_count(model_dir):
+    path = model_dir / RLC.file
+    write_slx(path, to_workspace=["Vout"], lines=["Iout"])
+    assert logged_names(str(path)) == {"Vout", "Iout"}
+    assert model_status(RLC) is None
+
+
+def test_checked_in_rectifier_is_the_supercap_model():
+    spec = MODELS["3-Phase Diode Rectifier"]
+    assert "VcapLog" in model_status(spec)
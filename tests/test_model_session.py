@@ -0,0 +1,94 @@
+"""Fast-restart model sessions on StubEngine."""
+import pytest
+
+import native_backend as nb
+from engine_pool import StubEngine
+from model_session import ModelSessions, session_stats
+
+MODEL = "Week_5_day_4_original"
+WS = dict(nb.SWEEP_LOG_WORKSPACE)
+
+
+def run(sessions, workspace, C_val=10.0, **kwargs):
+    eng = sessions.eng
+    return sessions.run(MODEL, workspace, lambda: eng.LogTimes(C_val, MODEL, True, workspace, nargout=4), **kwargs)
+
+
+def counts(before):
+    after = session_stats()
+    return {k: after[k] - before[k] for k in after}
+
+
+def test_tunable_changes_reuse_the_compiled_model():
+    sessions, before = ModelSessions(StubEngine()), session_stats()
+    run(sessions, WS, 10.0)
+    run(sessions, WS, 20.0)
+    run(sessions, {**WS, "high_current": 30.0}, 20.0)
+    assert counts(before) == {"loads": 1, "compiles": 1, "reuses": 2, "retries": 0}
+    assert MODEL in sessions.eng.compiled
+
+
+def test_nontunable_change_recompiles():
+    sessions, before = ModelSessions(StubEngine()), session_stats()
+    run(sessions, WS)
+    run(sessions, {**WS, "SpikeTime": 0.03})
+    run(sessions, {**WS, "SpikeTime": 0.03})
+    assert counts(before)["compiles"] == 2 and counts(before)["reuses"] == 1
+    assert sessions.models()[MODEL]["nontunable"]["SpikeTime"] == 0.03
+
+
+def test_model_specific_nontunable():
+    sessions, before = ModelSessions(StubEngine()), session_stats()
+    run(sessions, WS)
+    run(sessions, {**WS, "CurrentSource": 2.5})
+    assert counts(before)["reuses"] == 1
+    run(sessions, {**WS, "CurrentSource": 4.5}, nontunable=("CurrentSource",))
+    assert counts(before)["compiles"] == 2
+
+
+def test_failed_reuse_recompiles_and_retries_once():
+    sessions = ModelSessions(StubEngine())
+    run(sessions, WS)
+    calls, before = [], session_stats()
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("stale compiled model")
+        return "ok"
+
+    assert sessions.run(MODEL, WS, flaky) == "ok"
+    assert len(calls) == 2
+    assert counts(before) == {"loads": 1, "compiles": 1, "reuses": 0, "retries": 1}
+
+
+def test_failure_on_a_fresh_compile_is_not_retried():
+    sessions, calls = ModelSessions(StubEngine()), []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError("model error")
+
+    with pytest.raises(RuntimeError):
+        sessions.run(MODEL, WS, broken)
+    assert len(calls) == 1
+    assert sessions.models() == {}
+
+
+def test_without_fast_restart_every_run_loads():
+    sessions, before = ModelSessions(StubEngine(), fast_restart=False), session_stats()
+    for _ in range(3):
+        run(sessions, WS)
+    assert counts(before) == {"loads": 3, "compiles": 3, "reuses": 0, "retries": 0}
+    assert not sessions.eng.fast_restart
+
+
+def test_invalidate_forgets_the_model():
+    sessions = ModelSessions(StubEngine())
+    run(sessions, WS)
+    sessions.invalidate(MODEL)
+    assert sessions.models() == {}
+    assert MODEL not in sessions.eng.fast_restart
+    before = session_stats()
+    run(sessions, WS)
+    assert counts(before)["loads"] == 1 and counts(before)["compiles"] == 1
@@ -0,0 +1,65 @@
+"""The native backend against the recorded Simulink sweep."""
+import os
+
+import numpy as np
+import pytest
+
+import native_backend as nb
+
+SWEEP_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sweep_log.txt")
+MODEL = "Week_5_day_4_original"
+
+
+def test_read_sweep_log():
+    points = nb.read_sweep_log(SWEEP_LOG)
+    assert len(points) == 23
+    assert points[0] == (1.0, 0.2501)
+
+
+@pytest.mark.parametrize("events", [False, True])
+def test_matches_simulink_sweep(events):
+    rows = nb.validate_against_sweep_log(SWEEP_LOG, events=events)
+    assert len(rows) == 23
+    errors = np.array([error for _, _, _, error in rows])
+    # One 1 ms sample either side of each crossing, plus Simulink's variable step
+    assert np.abs(errors).max() < 0.05
+
+
+def test_models_are_treated_alike():
+    ws = nb.SWEEP_LOG_WORKSPACE
+    assert nb.log_times(10.0, "Week_5_day_4_original", ws)[:2] == nb.log_times(10.0, "Week_6_day_4_original", ws)[:2]
+
+
+def test_events_stop_at_first_fall():
+    t_rise, deltaT, t, Vcap = nb.log_times(10.0, MODEL, nb.SWEEP_LOG_WORKSPACE, events=True)
+    assert t[-1] == pytest.approx(t_rise + deltaT, abs=2e-3)
+    assert Vcap[-1] <= nb.V_LOW + nb.THRESH_EPS
+
+
+def test_rejects_non_positive_capacitance():
+    with pytest.raises(ValueError):
+        nb.simulate(0.0, nb.SWEEP_LOG_WORKSPACE)
+
+
+@pytest.mark.parametrize("C_val", [5.0, 22.5, 60.0])
+def test_steady_state_repeats_the_full_run(C_val):
+    t_full, v_full = nb.simulate(C_val, nb.SWEEP_LOG_WORKSPACE)
+    t, v = nb.simulate(C_val, nb.SWEEP_LOG_WORKSPACE, steady_tol=1e-3)
+    # The full run may go a few samples past t_stop to finish a phase
+    n = len(t)
+    assert t[-1] >= 250.0 - 1e-3
+    assert n <= len(t_full)
+    np.testing.assert_allclose(t, t_full[:n], rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(v, v_full[:n])
+    assert nb.threshold_times(t, v) == nb.threshold_times(t_full, v_full)
+
+
+def test_cycles_settled():
+    t, v = nb.simulate(10.0, nb.SWEEP_LOG_WORKSPACE)
+    low = v <= nb.V_LOW + nb.THRESH_EPS
+    falls = np.flatnonzero(low[1:] & ~low[:-1]) + 2  # sample counts at each 12 V crossing
+    assert len(falls) >= 3
+    assert nb.cycles_settled(t, v, falls[-3:], 1e-3)
+    distorted = v.copy()
+    distorted[falls[-2]:falls[-1]] += 0.1 * (nb.V_HIGH - nb.V_LOW)
+    assert not nb.cycles_settled(t, distorted, falls[-3:], 1e-3)
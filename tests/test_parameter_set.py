@@ -0,0 +1,46 @@
+"""ParameterSet conversion and diffs, and runs that leave the base workspace alone."""
+import numpy as np
+import pytest
+
+import native_backend as nb
+import simulation
+from engine_pool import EnginePool, StubEngine
+from parameter_set import ParameterSet
+
+MODEL = "Week_5_day_4_original"
+
+
+def test_values_become_plain_python():
+    params = ParameterSet({"C_val": np.float64(22.5), "myFlag": np.bool_(True)}, n=np.int32(3),
+                          grid=np.arange(3.0))
+    out = params.to_matlab()
+    assert out == {"C_val": 22.5, "myFlag": True, "n": 3, "grid": [0.0, 1.0, 2.0]}
+    assert [type(out[k]) for k in ("C_val", "myFlag", "n", "grid")] == [float, bool, int, list]
+    # A copy: changing it does not change the set
+    out["C_val"] = 1.0
+    assert params["C_val"] == 22.5
+
+
+def test_read_only_mapping():
+    params = ParameterSet(a=1.0)
+    assert dict(params) == {"a": 1.0} and len(params) == 1
+    with pytest.raises(TypeError):
+        params["a"] = 2.0
+
+
+def test_diff():
+    params = ParameterSet({"TimePeriod": 0.1, "SpikeTime": 0.02, "OnTime": 20, "grid": np.arange(3.0)})
+    held = {"TimePeriod": 0.1, "SpikeTime": 0.03, "OnTime": 20.0, "grid": [0.0, 1.0, 2.0]}
+    # 20 and 20.0 are the same value; SpikeTime changed
+    assert dict(params.diff(held)) == {"SpikeTime": 0.02}
+    assert dict(params.diff({})) == dict(params)
+    assert len(params.diff(dict(params))) == 0
+    assert dict(ParameterSet(grid=[1.0, 2.0]).diff({"grid": [1.0, 3.0]})) == {"grid": [1.0, 2.0]}
+
+
+def test_runs_do_not_write_the_base_workspace():
+    pool = EnginePool(size=1, factory=StubEngine)
+    simulation.log_times(10.0, MODEL, nb.SWEEP_LOG_WORKSPACE, backend="matlab", pool=pool)
+    simulation.log_times(12.0, MODEL, {**nb.SWEEP_LOG_WORKSPACE, "SpikeTime": 0.03}, backend="matlab", pool=pool)
+    with pool.engine() as eng:
+        assert eng.workspace == {}
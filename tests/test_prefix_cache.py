@@ -0,0 +1,55 @@
+"""The LRU cache of evaluated prompt prefixes, alone and behind the inference worker."""
+import threading
+
+from chat_session import ChatSession
+from llm_server import InferenceWorker, LLMClient, StubLLM, make_server
+from prefix_cache import PrefixCache, prefix_key
+
+
+def test_key_is_a_stable_hash_of_the_text():
+    assert prefix_key("System\n\nC_val = 22.5\n\n") == prefix_key("System\n\nC_val = 22.5\n\n")
+    assert prefix_key("System\n\nC_val = 22.5\n\n") != prefix_key("System\n\nC_val = 30.0\n\n")
+    assert len(prefix_key("")) == 16
+
+
+def test_least_recently_used_state_is_evicted():
+    cache = PrefixCache(capacity_bytes=100)
+    cache.put("a", "state a", 40)
+    cache.put("b", "state b", 40)
+    assert cache.get("a") == "state a"  # b is now the oldest
+    cache.put("c", "state c", 40)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("state a", "state c")
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "states": 2, "bytes": 80}
+
+
+def test_replacing_a_state_and_oversized_states():
+    cache = PrefixCache(capacity_bytes=100)
+    cache.put("a", "old", 60)
+    cache.put("a", "new", 70)
+    assert cache.get("a") == "new" and cache.size() == 70
+    # Larger than the whole cache: not stored, and nothing is evicted for it
+    cache.put("huge", "state", 101)
+    assert cache.get("huge") is None
+    assert cache.stats()["states"] == 1 and cache.stats()["evictions"] == 0
+
+
+def test_sessions_with_the_same_context_share_the_prefix():
+    cache = PrefixCache(capacity_bytes=2 ** 20)
+    worker = InferenceWorker(lambda: StubLLM(cache=cache), slots=2, queue_size=4, name="stub", cache=cache)
+    server = make_server(worker, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = LLMClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=10)
+        first, second = ChatSession(), ChatSession()
+        for chat in (first, second):
+            chat.set_context("C_val = 22.5 F, ABS on time 1.2 s")
+            assert "".join(chat.stream(client, "on time?")) == "Stub reply to: on time?"
+        assert cache.stats()["states"] == 1 and cache.stats()["hits"] == 1
+        # A new context is a new prefix
+        second.set_context("C_val = 30.0 F, ABS on time 1.6 s")
+        list(second.stream(client, "and now?"))
+        assert client.health()["prefix_cache"]["states"] == 2
+    finally:
+        server.shutdown()
+        worker.close()
@@ -0,0 +1,66 @@
+"""PDF reports for one run and for a design study."""
+import re
+
+import numpy as np
+import pytest
+
+import native_backend as nb
+import reports
+from batch import design_grid, evaluate_design_points
+
+MODEL = "Week_5_day_4_original"
+
+
+def pages(pdf):
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+
+
+@pytest.fixture(scope="module")
+def study():
+    results = evaluate_design_points(design_grid(C_val=[10.0, 20.0, 30.0]), max_workers=1, trace_points=200)
+    # A failed point: no times, an error message
+    results.loc[2, ["t_rise", "deltaT", "error"]] = [np.nan, np.nan, "Voltage never crossed thresholds."]
+    return results
+
+
+def test_batch_report(study, tmp_path):
+    target = str(tmp_path / "study.pdf")
+    assert reports.batch_report(study, target, traces=lambda row: row["trace"]) == target
+    pdf = open(target, "rb").read()
+    assert pdf.startswith(b"%PDF")
+    # Summary page, then one page per point
+    assert pages(pdf) == 1 + len(study)
+
+
+def test_summary_only(study, tmp_path):
+    target = str(tmp_path / "summary.pdf")
+    reports.batch_report(study, target, point_pages=False)
+    assert pages(open(target, "rb").read()) == 1
+
+
+def test_streams_are_binary_and_global_config_is_left_alone(study, tmp_path):
+    # Imported after reports, as in the apps
+    from reportlab import rl_config
+    before = rl_config.useA85
+    target = str(tmp_path / "study.pdf")
+    reports.batch_report(study, target, traces=lambda row: row["trace"])
+    assert rl_config.useA85 == before
+    assert b"ASCII85Decode" not in open(target, "rb").read()
+
+
+def test_design_report():
+    t_rise, deltaT, t, vcap = nb.log_times(22.5, MODEL, nb.SWEEP_LOG_WORKSPACE)
+    profile = ("Periodic", 0.1, 0.02, 25.0, 10.0)
+    buffer = reports.design_report("Find ABS On/Off Time", {"Capacitance (F)": "22.5000"},
+                                   {"ABS On Time (s)": f"{deltaT:.4f}"}, t=t, vcap=vcap,
+                                   x_lim=(0, 5 * (t_rise + deltaT)), profile=profile, profile_duration=deltaT)
+    assert buffer.tell() == 0
+    pdf = buffer.read()
+    assert pdf.startswith(b"%PDF") and pages(pdf) >= 1
+
+
+def test_format_of_missing_values():
+    assert reports._fmt(np.nan) == "n/a"
+    assert reports._fmt(None) == "n/a"
+    assert reports._fmt(2.5, ".2f") == "2.50"
+    assert reports._fmt("x") == "x"
@@ -0,0 +1,168 @@
+"""ResultCache keys, storage and eviction."""
+import os
+import sqlite3
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import native_backend as nb
+import result_cache
+import simulation
+from result_cache import ResultCache, _pack, _repo_sources, _unpack, model_hash, run_kind, workspace_key
+from surrogate import SurrogateStore, profile_key
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = "Week_5_day_4_original"
+WS = dict(nb.SWEEP_LOG_WORKSPACE)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache.sqlite"))
+
+
+def test_key_ignores_number_types_and_order(cache):
+    reordered = dict(reversed(list(WS.items())))
+    as_numpy = {k: np.float64(v) if isinstance(v, float) else v for k, v in WS.items()}
+    key = cache.key(22.5, MODEL, WS, "native")
+    assert cache.key(22.5, MODEL, reordered, "native") == key
+    assert cache.key(np.float64(22.5), MODEL, as_numpy, "native") == key
+    assert cache.key(22.5, MODEL, {**WS, "CurrentSource": 4}, "native") == key
+    assert cache.key(22.5, MODEL, {**WS, "myFlag": np.bool_(True)}, "native") == key
+    # 0.1 in float32 is a different number
+    assert cache.key(22.5, MODEL, {**WS, "TimePeriod": np.float32(0.1)}, "native") != key
+
+
+def test_key_changes_with_every_input(cache):
+    key = cache.key(22.5, MODEL, WS, "native")
+    others = [
+        cache.key(22.51, MODEL, WS, "native"),
+        cache.key(22.5, "Week_6_day_4_original", WS, "native"),
+        cache.key(22.5, MODEL, WS, "matlab"),
+        cache.key(22.5, MODEL, WS, "native", events=True),
+        cache.key(22.5, MODEL, WS, "native", steady_tol=1e-3),
+        cache.key(22.5, MODEL, WS, "native", scalars=True),
+    ] + [cache.key(22.5, MODEL, {**WS, name: value}, "native")
+         for name, value in [("myFlag", False), ("low_current", 11.0), ("high_current", 30.0),
+                             ("TimePeriod", 0.2), ("SpikeTime", 0.03), ("CurrentSource", 2.5), ("OnTime", 15.0)]]
+    assert len({key, *others}) == len(others) + 1
+
+
+def test_key_is_stable_across_processes(cache):
+    code = ("import native_backend as nb; from result_cache import ResultCache; import sys; "
+            f"print(ResultCache(sys.argv[1]).key(22.5, {MODEL!r}, nb.SWEEP_LOG_WORKSPACE, 'native'))")
+    out = subprocess.run([sys.executable, "-c", code, cache.path], cwd=REPO, capture_output=True, text=True,
+                         check=True, env={**os.environ, "PYTHONHASHSEED": "random"})
+    assert out.stdout.strip() == cache.key(22.5, MODEL, WS, "native")
+
+
+def test_native_model_hash_covers_imported_modules():
+    sources = _repo_sources("native_backend")
+    assert "native_backend" in sources
+    assert "current_profile" in sources
+    assert len(model_hash(MODEL, "native")) == 64
+
+
+def test_matlab_key_covers_the_scripts(cache, tmp_path, monkeypatch):
+    scripts = []
+    for name in ("LogTimes.m", "LogTimesBatch.m"):
+        scripts.append(tmp_path / name)
+        scripts[-1].write_text(f"function {name[:-2]}\nend\n")
+    monkeypatch.setattr(result_cache, "MATLAB_SCRIPTS", [str(p) for p in scripts])
+    keys = [cache.key(22.5, MODEL, WS, "matlab")]
+    for script in scripts:
+        script.write_text(script.read_text() + "% edited\n")
+        keys.append(cache.key(22.5, MODEL, WS, "matlab"))
+    assert len(set(keys)) == 3
+    # Native keys do not depend on the MATLAB scripts
+    assert model_hash(MODEL, "native") == model_hash("Week_6_day_4_original", "native")
+
+
+def test_surrogate_profile_uses_cache_normalisation():
+    assert profile_key(MODEL, {**WS, "CurrentSource": 4}, "native") == profile_key(MODEL, WS, "native")
+    assert profile_key(MODEL, WS, "native")[2] == workspace_key(WS)
+
+
+@pytest.mark.parametrize("values", [
+    np.empty(0),
+    np.array([1.5]),
+    np.array([np.nan, -0.0, np.inf, -np.inf, 1e-300, 5e-324]),
+    np.random.default_rng(0).normal(size=10001),
+    np.arange(0, 250, 1e-3),
+])
+def test_pack_is_lossless(values):
+    out = _unpack(_pack(values))
+    assert out.dtype == np.float64
+    np.testing.assert_array_equal(out.view(np.uint64), values.astype(np.float64).view(np.uint64))
+
+
+def test_put_get_round_trip(cache):
+    result = nb.log_times(22.5, MODEL, WS)
+    key = cache.key(22.5, MODEL, WS, "native")
+    assert cache.get(key) is None
+    cache.put(key, result, 22.5, MODEL, WS, "native")
+    t_rise, deltaT, t, vcap = cache.get(key)
+    assert (t_rise, deltaT) == result[:2]
+    np.testing.assert_array_equal(t, result[2])
+    np.testing.assert_array_equal(vcap, result[3])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    # Stored compressed: a 250 s native trace is about 4 MB raw
+    assert stats["bytes"] < (result[2].nbytes + result[3].nbytes) / 10
+
+
+def test_points_and_scalars(cache):
+    for C_val in (10.0, 20.0):
+        cache.put(cache.key(C_val, MODEL, WS, "native"), nb.log_times(C_val, MODEL, WS), C_val, MODEL, WS, "native")
+    cache.put(cache.key(30.0, MODEL, WS, "native", scalars=True), (108.0, 8.0, np.empty(0), np.empty(0)),
+              30.0, MODEL, WS, "native", kind="scalars")
+    cache.put(cache.key(40.0, MODEL, WS, "native", events=True), nb.log_times(40.0, MODEL, WS, events=True),
+              40.0, MODEL, WS, "native", kind="events")
+    same_profile = {**WS, "CurrentSource": 4}
+    assert sorted(c for c, _, _ in cache.points(MODEL, same_profile, "native")) == [10.0, 20.0]
+    assert [c for c, _, _ in cache.points(MODEL, same_profile, "native", kind="events")] == [40.0]
+    assert [c for c, _, _ in cache.points(MODEL, same_profile, "native", kind="scalars")] == [30.0]
+    assert cache.get_scalars(30.0, MODEL, WS, "native") == (108.0, 8.0)
+    assert cache.get_scalars(10.0, MODEL, WS, "native")[1] == pytest.approx(2.65)
+    assert cache.get_scalars(40.0, MODEL, WS, "native") is None
+
+
+def test_run_kind():
+    assert run_kind() == "full"
+    assert run_kind(steady_tol=1e-3) == "steady"
+    assert run_kind(events=True) == "events"
+    assert run_kind(scalars=True) == "scalars"
+
+
+def test_log_times_records_the_kind(cache):
+    simulation.log_times(10.0, MODEL, WS, backend="native", cache=cache, events=True)
+    simulation.log_times(20.0, MODEL, WS, backend="native", cache=cache, steady_tol=1e-3)
+    simulation.log_times(30.0, MODEL, WS, backend="native", cache=cache)
+    kinds = dict(cache._conn().execute("SELECT c_val, kind FROM results").fetchall())
+    assert kinds == {10.0: "events", 20.0: "steady", 30.0: "full"}
+    # The surrogate is seeded from the search's event-terminated runs only
+    assert len(SurrogateStore(cache).get(MODEL, WS, "native")) == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "small.sqlite"), max_entries=2)
+    keys = []
+    for C_val in (1.0, 2.0, 3.0):
+        keys.append(cache.key(C_val, MODEL, WS, "native"))
+        cache.put(keys[-1], (1.0, 1.0, np.zeros(3), np.zeros(3)), C_val, MODEL, WS, "native")
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_old_format_is_dropped(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE results (key TEXT PRIMARY KEY, t BLOB)")
+        conn.execute("INSERT INTO results VALUES ('k', x'00')")
+    cache = ResultCache(path)
+    assert cache.stats()["entries"] == 0
+    cache.put("k", (1.0, 1.0, np.zeros(2), np.ones(2)), 1.0, MODEL, WS, "native")
+    assert ResultCache(path).get("k")[0] == 1.0
@@ -0,0 +1,96 @@
+"""Past design points: question parsing, search and import from the result cache."""
+import time
+
+import numpy as np
+import pytest
+
+import native_backend as nb
+from result_cache import ResultCache
+from results_store import ResultsStore, describe, parse_question
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    now = time.time()
+    runs = [
+        ("14V Charging", "Periodic", 20.0, 5.3, now - 1 * DAY, "quick check"),
+        ("14V Charging", "Periodic", 40.0, 10.6, now - 3 * DAY, "wide margin"),
+        ("14V Charging", "Non-Periodic", 18.0, 4.9, now - 30 * DAY, "braking on ice"),
+        ("48V Charging", "Periodic", 21.0, 5.1, now - 1 * DAY, "48 volt board"),
+    ]
+    for model, profile, c, on_time, created, note in runs:
+        store.add({"Capacitance (F)": f"{c:.4f}", "Note": note}, {"ABS On Time (s)": f"{on_time:.4f}"},
+                  model=model, profile=profile, created=created, capacitance=c, on_time=on_time,
+                  peak_current=25.0, static_current=10.0)
+    return store
+
+
+def test_parse_question():
+    query = parse_question("what capacitance gave 5 s on-time at 14 V last week?")
+    assert query["on_time"] == 5.0
+    assert query["model"] == "14V Charging"
+    assert query["since"] == pytest.approx(time.time() - 14 * DAY, abs=5)
+    assert parse_question("off time of 80 s at 48 V")["off_time"] == 80.0
+    assert parse_question("off time of 80 s at 48 V")["model"] == "48V Charging"
+    assert parse_question("runs with 20 F")["capacitance"] == 20.0
+    assert parse_question("a 30 A spike")["peak_current"] == 30.0
+    assert parse_question("with a 2.5 A source")["current_source"] == 2.5
+    assert parse_question("a 100 ms period")["time_period_ms"] == 100.0
+    assert parse_question("a 20 ms spike")["spike_time_ms"] == 20.0
+
+
+def test_nearest_by_targets(store):
+    runs = store.search(on_time=5.0, limit=4)
+    assert [r["capacitance"] for r in runs] == [21.0, 18.0, 20.0, 40.0]
+    assert runs[0]["distance"] == pytest.approx(0.02)
+
+
+def test_filters(store):
+    runs = store.search_question("what capacitance gave 5 s on-time at 14 V last week?")
+    assert [r["capacitance"] for r in runs] == [20.0, 40.0]
+    assert all(r["model"] == "14V Charging" for r in runs)
+
+
+def test_full_text(store):
+    runs = store.search(text="braking")
+    assert [r["capacitance"] for r in runs] == [18.0]
+
+
+def test_same_run_replaces(store):
+    before = store.count()
+    store.add({}, {}, model="14V Charging", profile="Periodic", capacitance=20.0, on_time=5.3,
+              peak_current=25.0, static_current=10.0)
+    assert store.count() == before
+    assert "quick check" not in store.search(capacitance=20.0, limit=1)[0]["notes"]
+
+
+def test_unknown_field(store):
+    with pytest.raises(ValueError):
+        store.add({}, {}, voltage=14.0)
+    with pytest.raises(ValueError):
+        store.search(voltage=14.0)
+
+
+def test_describe(store):
+    line = describe(store.search(capacitance=20.0, limit=1)[0])
+    assert "14V Charging, Periodic" in line
+    assert "C = 20.0000 F" in line and "on time 5.3000 s" in line
+
+
+def test_import_result_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    model, ws = "Week_5_day_4_original", nb.SWEEP_LOG_WORKSPACE
+    for c in (10.0, 20.0):
+        cache.put(cache.key(c, model, ws, "native"), nb.log_times(c, model, ws), c, model, ws, "native")
+    cache.put(cache.key(30.0, model, ws, "matlab", scalars=True), (108.0, 8.0, np.empty(0), np.empty(0)),
+              30.0, model, ws, "matlab", kind="scalars")
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    assert store.import_result_cache(cache) == 3
+    run = store.search(on_time=8.0, limit=1)[0]
+    assert run["capacitance"] == 30.0
+    assert run["model"] == "14V Charging"
+    assert run["time_period_ms"] == pytest.approx(100.0)
+    assert run["current_source"] == 4.0
@@ -0,0 +1,99 @@
+"""The headless batch runner: job files, checkpoints and resuming."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+import run_batch
+
+JOB_YAML = """\
+backend: native
+workers: 1
+chunk_size: 2
+defaults: {CurrentSource: 4.0}
+grid:
+  C_val: {start: 10, stop: 30, step: 10}
+  peak_current: [25, 30]
+points:
+  - {C_val: 22.5, SpikeTime: 0.05}
+"""
+
+
+@pytest.fixture
+def job(tmp_path):
+    path = tmp_path / "study.csv"
+    pd.DataFrame({"C_val": [10.0, 20.0, 30.0, 40.0, 50.0], "peak_current": [25.0, 30.0, 25.0, 30.0, 25.0]}).to_csv(
+        path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    """C values each evaluate_design_points call was given."""
+    calls = []
+    evaluate = batch.evaluate_design_points
+
+    def recording(points, **kwargs):
+        calls.append(list(points["C_val"]))
+        return evaluate(points, **kwargs)
+
+    monkeypatch.setattr(batch, "evaluate_design_points", recording)
+    return calls
+
+
+def run(job, *args):
+    run_batch.main([job, "--workers", "1", "--no-cache", "--chunk-size", "2", *args])
+    return pd.read_csv(os.path.splitext(job)[0] + ".results.csv")
+
+
+def test_load_yaml_job(tmp_path):
+    path = tmp_path / "job.yaml"
+    path.write_text(JOB_YAML)
+    points, options = run_batch.load_job(str(path))
+    assert len(points) == 3 * 2 + 1
+    assert points["C_val"].tolist()[:2] == [10, 10] and points["C_val"].iloc[-1] == 22.5
+    assert (points["CurrentSource"] == 4.0).all()
+    assert options == {"backend": "native", "workers": 1, "chunk_size": 2}
+
+
+def test_point_ids_ignore_number_types():
+    a = batch.normalise_points({"C_val": [10], "peak_current": [25]})
+    b = batch.normalise_points({"C_val": [np.float32(10.0)], "peak_current": [25.0]})
+    assert run_batch.point_ids(a).iloc[0] == run_batch.point_ids(b).iloc[0]
+    c = batch.normalise_points({"C_val": [10.0], "peak_current": [25.0], "periodic": [False]})
+    assert run_batch.point_ids(a).iloc[0] != run_batch.point_ids(c).iloc[0]
+
+
+def test_run_writes_results_in_job_order(job, evaluated):
+    results = run(job)
+    assert results["C_val"].tolist() == [10.0, 20.0, 30.0, 40.0, 50.0]
+    assert results["error"].isna().all()
+    assert evaluated == [[10.0, 20.0], [30.0, 40.0], [50.0]]
+
+
+def test_resume_runs_only_missing_points(job, evaluated):
+    full = run(job)
+    checkpoint = os.path.splitext(job)[0] + ".results.csv.checkpoint.csv"
+    # Interrupted after the first chunk
+    pd.read_csv(checkpoint).head(2).to_csv(checkpoint, index=False)
+    evaluated.clear()
+    resumed = run(job)
+    assert evaluated == [[30.0, 40.0], [50.0]]
+    pd.testing.assert_frame_equal(resumed.drop(columns="elapsed"), full.drop(columns="elapsed"))
+
+
+def test_no_resume_starts_over(job, evaluated):
+    run(job)
+    evaluated.clear()
+    run(job, "--no-resume")
+    assert sum(evaluated, []) == [10.0, 20.0, 30.0, 40.0, 50.0]
+
+
+def test_report_uses_saved_traces(job, tmp_path):
+    report = str(tmp_path / "study.pdf")
+    run(job, "--report", report)
+    traces = os.path.splitext(job)[0] + ".results.csv.checkpoint.csv.traces"
+    assert len(os.listdir(traces)) == 5
+    assert open(report, "rb").read(4) == b"%PDF"
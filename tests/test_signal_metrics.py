@@ -0,0 +1,99 @@
+"""Waveform metrics, and runs that stop once the waveforms repeat."""
+import math
+
+import numpy as np
+import pytest
+
+import model_registry
+import signal_metrics as sm
+from engine_pool import EnginePool, StubEngine
+
+RECTIFIER = model_registry.MODELS["3-Phase Diode Rectifier"]
+
+
+def uneven(stop=1.0, n=4001, seed=0):
+    # Variable-step style sampling: dense and sparse stretches
+    steps = np.random.default_rng(seed).uniform(0.1, 1.9, n - 1)
+    return np.concatenate([[0.0], np.cumsum(steps)]) * stop / steps.sum()
+
+
+def test_time_mean_weights_by_time():
+    t = np.array([0.0, 0.1, 1.0])
+    y = np.array([0.0, 0.0, 1.0])
+    # The plain mean is 1/3; the signal is a ramp over most of the run
+    assert sm.time_mean(t, y) == pytest.approx(0.45)
+    t = uneven()
+    assert sm.time_mean(t, t) == pytest.approx(0.5)
+    assert sm.time_mean(t, t, fraction=0.2) == pytest.approx(0.9, abs=1e-3)
+
+
+def test_rms_and_ripple():
+    t = uneven(stop=0.2)
+    y = 10.0 + 0.5 * np.sin(2 * np.pi * 50 * t)
+    assert sm.rms(t, np.sin(2 * np.pi * 50 * t)) == pytest.approx(1 / math.sqrt(2), rel=1e-3)
+    assert sm.ripple(t, y) == pytest.approx(1.0, rel=1e-3)
+    assert sm.ripple_percent(t, y) == pytest.approx(10.0, rel=1e-3)
+    assert math.isnan(sm.ripple_percent(t, np.zeros_like(t)))
+
+
+def test_efficiency():
+    t = np.linspace(0.0, 1.0, 101)
+    ones = np.ones_like(t)
+    assert sm.efficiency(t, 100 * ones, 2 * ones, 48 * ones, 3.75 * ones) == pytest.approx(90.0)
+    assert math.isnan(sm.efficiency(t, 0 * ones, ones, ones, ones))
+
+
+def test_settling_time_and_overshoot():
+    t = np.linspace(0.0, 1.0, 100001)
+    assert sm.settling_time(t, 1 - np.exp(-t / 0.05)) == pytest.approx(0.05 * math.log(50), abs=1e-4)
+    assert sm.overshoot_percent(t, 1 - np.exp(-t / 0.05)) == pytest.approx(0.0, abs=1e-4)
+    # Under-damped second order step: overshoot exp(-zeta pi / sqrt(1 - zeta^2))
+    zeta, wn = 0.3, 2 * np.pi * 10
+    wd = wn * math.sqrt(1 - zeta ** 2)
+    step = 1 - np.exp(-zeta * wn * t) * (np.cos(wd * t) + zeta * wn / wd * np.sin(wd * t))
+    expected = 100 * math.exp(-zeta * math.pi / math.sqrt(1 - zeta ** 2))
+    assert sm.overshoot_percent(t, step) == pytest.approx(expected, rel=1e-3)
+    assert sm.settling_time(t, np.ones_like(t)) == 0.0
+
+
+def test_thd():
+    t = uneven(stop=0.2, n=20001)
+    pure = np.sin(2 * np.pi * 50 * t)
+    assert sm.thd(t, pure, 50.0) < 0.1
+    distorted = pure + 0.1 * np.sin(2 * np.pi * 150 * t) + 0.05 * np.sin(2 * np.pi * 250 * t)
+    assert sm.thd(t, distorted, 50.0) == pytest.approx(100 * math.hypot(0.1, 0.05), rel=1e-2)
+    # Without f0 the strongest component is the fundamental
+    assert sm.thd(t, distorted) == pytest.approx(sm.thd(t, distorted, 50.0), rel=1e-2)
+
+
+def test_too_few_samples():
+    with pytest.raises(ValueError):
+        sm.rms([0.0], [1.0])
+
+
+def test_cycle_change_and_steady_state_time():
+    period = 0.02
+    t = np.linspace(0.0, 1.0, 50001)
+    periodic = np.sin(2 * np.pi * t / period)
+    assert sm.cycle_change(t, periodic, period).max() < 1e-6
+    assert sm.steady_state_time(t, periodic, period) == 0.0
+    settling = (1 - np.exp(-t / 0.05)) + 0.02 * periodic
+    start = sm.steady_state_time(t, settling, period, tol=1e-3)
+    assert 0.2 < start < 0.5
+    assert sm.cycle_change(t[t >= start], settling[t >= start], period).max() < 1e-3
+    # Still growing, or too short a run to judge
+    assert math.isnan(sm.steady_state_time(t, t * (1 + 0.02 * periodic), period))
+    assert math.isnan(sm.steady_state_time(t[:200], periodic[:200], period))
+
+
+def test_run_stops_at_steady_state():
+    pool = EnginePool(size=1, factory=StubEngine)
+    params = RECTIFIER.workspace({})
+    full = model_registry.simulate(RECTIFIER, params, pool)
+    early = model_registry.simulate(RECTIFIER, params, pool, steady_tol=1e-3)
+    assert full.t[-1] == pytest.approx(params[RECTIFIER.stop_time])
+    assert early.t[-1] < full.t[-1]
+    steady = early.metrics[model_registry.STEADY_STATE]
+    assert steady <= early.t[-1]
+    assert steady == pytest.approx(full.metrics[model_registry.STEADY_STATE])
+    assert early.metrics["Mean DC voltage"] == pytest.approx(full.metrics["Mean DC voltage"], rel=1e-3)